@@ -0,0 +1,296 @@
+"""Shared HTTP transports for the API client.
+
+Awaitable calls use aiohttp. Its sessions belong to the event loop they were
+created on, so there is one session per loop (and per SSL setting), created
+on first use and reused by every InsightApiClient on that loop. ``run_async``
+runs coroutines from synchronous Streamlit code on a single long-lived loop,
+so connections stay pooled across reruns instead of dying with a throwaway
+loop.
+
+The streaming endpoints are synchronous and use requests. A Session is not
+safe to share between Streamlit's script threads, so each thread gets its
+own, but all of them mount one adapter whose urllib3 pools (which are
+thread-safe) outlive the threads and keep connections warm across reruns.
+"""
+import os
+import asyncio
+import atexit
+import threading
+import weakref
+import logging
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Connector tuning
+HTTP_POOL_LIMIT = int(os.getenv("INSIGHT_HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("INSIGHT_HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("INSIGHT_HTTP_KEEPALIVE", "30"))
+HTTP_DNS_CACHE_SECONDS = int(os.getenv("INSIGHT_HTTP_DNS_TTL", "300"))
+# Streaming pools: hosts kept, connections kept per host, and whether a full
+# pool makes callers wait (True) or open an extra, unpooled connection
+STREAM_POOL_HOSTS = int(os.getenv("INSIGHT_STREAM_POOL_HOSTS", "10"))
+STREAM_POOL_SIZE = int(os.getenv("INSIGHT_STREAM_POOL_SIZE", "20"))
+STREAM_POOL_BLOCK = os.getenv("INSIGHT_STREAM_POOL_BLOCK", "0") == "1"
+# Default deadlines, in seconds: to connect, between two reads, and for the
+# whole call (a stream's total spans its reconnects)
+API_CONNECT_TIMEOUT = float(os.getenv("INSIGHT_API_CONNECT_TIMEOUT", "10"))
+API_READ_TIMEOUT = float(os.getenv("INSIGHT_API_READ_TIMEOUT", "60"))
+API_TOTAL_TIMEOUT = float(os.getenv("INSIGHT_API_TOTAL_TIMEOUT", "120"))
+STREAM_READ_TIMEOUT = float(os.getenv("INSIGHT_STREAM_READ_TIMEOUT", "120"))
+STREAM_TOTAL_TIMEOUT = float(os.getenv("INSIGHT_STREAM_TOTAL_TIMEOUT", "900"))
+
+
+@dataclass(frozen=True)
+class ApiTimeout:
+    connect: float = API_CONNECT_TIMEOUT
+    read: float = API_READ_TIMEOUT
+    total: float = API_TOTAL_TIMEOUT
+
+    def for_aiohttp(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.total, sock_connect=self.connect, sock_read=self.read)
+
+    def for_requests(self) -> Tuple[float, float]:
+        """(connect, read) as requests takes them; requests has no total deadline"""
+        return self.connect, self.read
+
+
+DEFAULT_TIMEOUT = ApiTimeout()
+STREAM_TIMEOUT = ApiTimeout(read=STREAM_READ_TIMEOUT, total=STREAM_TOTAL_TIMEOUT)
+
+
+@dataclass
+class HttpStats:
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    sessions_created: int = 0
+    timeouts: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        connections = self.connections_created + self.connections_reused
+        data['reuse_ratio'] = self.connections_reused / connections if connections else 0.0
+        return data
+
+
+@dataclass
+class StreamPoolStats:
+    checkouts: int = 0
+    connections_created: int = 0
+    # Checkouts that found every pooled connection in use
+    pool_exhausted: int = 0
+    # Connections closed on return because the pool was already full
+    discarded: int = 0
+    in_use: int = 0
+    peak_in_use: int = 0
+    timeouts: int = 0
+    # Opened is counted before the request goes out and closed after the
+    # response has released its connection, so an open stream always covers
+    # the connection it holds
+    streams_opened: int = 0
+    streams_closed: int = 0
+    # Streams closed by their consumer before the final event
+    streams_cancelled: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        data['pool_size'] = STREAM_POOL_SIZE
+        data['streams_open'] = self.streams_opened - self.streams_closed
+        # The pool only serves streams, so a connection checked out by no open
+        # stream belongs to a response nobody closed
+        data['leaked_connections'] = max(self.in_use - data['streams_open'], 0)
+        reused = max(self.checkouts - self.connections_created, 0)
+        data['reuse_ratio'] = reused / self.checkouts if self.checkouts else 0.0
+        return data
+
+
+_stats = HttpStats()
+_stream_stats = StreamPoolStats()
+_stats_lock = threading.Lock()
+# Leaked stream connections last warned about; only a rise is reported again
+_leaks_reported = 0
+# loop -> {verify_ssl: session}; entries go away with their loop
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[bool, aiohttp.ClientSession]]" = weakref.WeakKeyDictionary()
+
+
+def _count(name: str, stats=_stats) -> None:
+    with _stats_lock:
+        setattr(stats, name, getattr(stats, name) + 1)
+
+
+def count_timeout(stream: bool = False) -> None:
+    _count('timeouts', _stream_stats if stream else _stats)
+
+
+def count_stream(event: str) -> None:
+    """Record a stream being ``opened``, ``closed`` or ``cancelled``"""
+    _count(f'streams_{event}', _stream_stats)
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    async def on_request_start(session, context, params):
+        _count('requests')
+
+    async def on_connection_create_end(session, context, params):
+        _count('connections_created')
+
+    async def on_connection_reuseconn(session, context, params):
+        _count('connections_reused')
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace
+
+
+def get_session(verify_ssl: bool = True) -> aiohttp.ClientSession:
+    """The shared session of the running event loop. Do not close it; see ``close_sessions``."""
+    loop = asyncio.get_running_loop()
+    sessions = _sessions.setdefault(loop, {})
+    session = sessions.get(verify_ssl)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+            use_dns_cache=True,
+            ttl_dns_cache=HTTP_DNS_CACHE_SECONDS,
+            ssl=None if verify_ssl else False,
+        )
+        session = aiohttp.ClientSession(connector=connector, trace_configs=[_trace_config()])
+        sessions[verify_ssl] = session
+        _count('sessions_created')
+    return session
+
+
+async def close_sessions() -> None:
+    """Close the running loop's sessions; the next request opens new ones"""
+    sessions = _sessions.pop(asyncio.get_running_loop(), {})
+    for session in sessions.values():
+        await session.close()
+
+
+def get_http_stats() -> Dict[str, float]:
+    with _stats_lock:
+        return _stats.as_dict()
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="insight-http", daemon=True).start()
+        return _loop
+
+
+def run_async(coroutine: Awaitable[Any]) -> Any:
+    """Run ``coroutine`` to completion on the shared API loop and return its result"""
+    return asyncio.run_coroutine_threadsafe(coroutine, _get_loop()).result()
+
+
+def shutdown(timeout: float = 5.0) -> None:
+    """Close the shared loop's sessions and stop it"""
+    global _loop
+    with _loop_lock:
+        loop, _loop = _loop, None
+    if loop is None or loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(close_sessions(), loop).result(timeout)
+    except Exception as e:
+        logger.warning(f"Closing HTTP sessions failed: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(shutdown)
+
+
+class _MeteredPoolMixin:
+    """Counts checkouts, new connections and saturation of a urllib3 pool"""
+
+    def _new_conn(self):
+        _count('connections_created', _stream_stats)
+        return super()._new_conn()
+
+    def _get_conn(self, timeout=None):
+        if self.pool is not None and self.pool.empty():
+            _count('pool_exhausted', _stream_stats)
+        conn = super()._get_conn(timeout)
+        with _stats_lock:
+            _stream_stats.checkouts += 1
+            _stream_stats.in_use += 1
+            _stream_stats.peak_in_use = max(_stream_stats.peak_in_use, _stream_stats.in_use)
+        return conn
+
+    def _put_conn(self, conn):
+        with _stats_lock:
+            _stream_stats.in_use -= 1
+            if self.pool is not None and self.pool.full():
+                _stream_stats.discarded += 1
+        super()._put_conn(conn)
+
+
+class _MeteredHTTPConnectionPool(_MeteredPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _MeteredHTTPSConnectionPool(_MeteredPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _MeteredAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _MeteredHTTPConnectionPool,
+            'https': _MeteredHTTPSConnectionPool,
+        }
+
+
+_stream_adapter = _MeteredAdapter(
+    pool_connections=STREAM_POOL_HOSTS,
+    pool_maxsize=STREAM_POOL_SIZE,
+    pool_block=STREAM_POOL_BLOCK,
+)
+_thread_sessions = threading.local()
+
+
+def get_stream_session() -> requests.Session:
+    """This thread's Session for the streaming endpoints, backed by the shared connection pools"""
+    session = getattr(_thread_sessions, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.mount('http://', _stream_adapter)
+        session.mount('https://', _stream_adapter)
+        _thread_sessions.session = session
+    return session
+
+
+def get_stream_pool_stats() -> Dict[str, float]:
+    with _stats_lock:
+        return _stream_stats.as_dict()
+
+
+def check_stream_leaks() -> int:
+    """Warn when more streaming connections are held by unclosed responses than at the last check"""
+    global _leaks_reported
+    with _stats_lock:
+        leaked = _stream_stats.as_dict()['leaked_connections']
+        rose = leaked > _leaks_reported
+        _leaks_reported = leaked
+    if rose:
+        logger.warning(f"{leaked} streaming connections are held by responses nobody closed")
+    return leaked
@@ -1,57 +1,115 @@
+import os
 import requests
+import urllib3
 import json
 from typing import Optional, Dict, Any, List, Union, AsyncGenerator, Tuple
-from ..exceptions.api_exceptions import ApiError
+from ..exceptions.api_exceptions import ApiError, ApiTimeoutError, RateLimitError
 from ..models.responses import (
     OutreachResponse,
     ProfileCompanyFitResponse,
     MeetingResponse
 )
 import streamlit as st
-from sseclient import SSEClient  # Add this import at the top
-import aiohttp  # Add this import
+import asyncio
+import aiohttp
+from .http import (
+    ApiTimeout, DEFAULT_TIMEOUT, STREAM_TIMEOUT, count_stream, count_timeout, get_session, get_stream_session
+)
+from .sse import SSE_CHUNK_SIZE, SSEParser, iter_sse
+from .retry import DEFAULT_RETRY, NO_RETRY, RetryPolicy, get_retry_budget, parse_retry_after
+from dataclasses import replace
+import time
 
 # Optional: Add logging for better debugging
 import logging
 logger = logging.getLogger(__name__)
 
+# Dropped streams are reopened with Last-Event-ID this many times in a row
+# before giving up; the delay doubles per attempt, starting from the server's
+# retry field when it sent one
+STREAM_MAX_RECONNECTS = int(os.getenv("INSIGHT_STREAM_RECONNECTS", "5"))
+STREAM_RECONNECT_DELAY_SECONDS = float(os.getenv("INSIGHT_STREAM_RECONNECT_DELAY", "0.5"))
+STREAM_RECONNECT_MAX_DELAY_SECONDS = float(os.getenv("INSIGHT_STREAM_RECONNECT_MAX_DELAY", "10"))
+# Payload key holding the SSE id of the event it came in
+STREAM_EVENT_ID_KEY = '_event_id'
+STREAM_FINAL_EVENT_TYPES = ('complete', 'error')
+# Read timeouts count as drops too: the total deadline bounds the retries
+STREAM_DROP_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+    urllib3.exceptions.ProtocolError,
+    # A garbled event is fetched again rather than failing the research
+    json.JSONDecodeError,
+)
+STREAM_ENDPOINTS = (
+    "/api/v2/profile_insight/stream",
+    "/api/v2/company_insight/stream",
+    "/api/v2/my_company_insight/stream",
+)
+# endpoint -> deadlines; anything not listed gets DEFAULT_TIMEOUT
+ENDPOINT_TIMEOUTS: Dict[str, ApiTimeout] = {endpoint: STREAM_TIMEOUT for endpoint in STREAM_ENDPOINTS}
+# endpoint -> retry policy. GETs not listed get DEFAULT_RETRY and other
+# methods NO_RETRY, since a repeated POST may run the work twice.
+ENDPOINT_RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    # A key is minted per call
+    "/api/generateApiKey": NO_RETRY,
+    # 429 and 503 are refused before any work starts; a 502 or a lost
+    # connection may have cost tokens already
+    "/api/generateProfileCompanyInteractionStrategy": RetryPolicy(statuses=frozenset({429, 503}), retry_errors=False),
+    # Retried only until the first event; later drops resume instead
+    **{endpoint: DEFAULT_RETRY for endpoint in STREAM_ENDPOINTS},
+}
+
+
+def _is_timeout(error: Exception) -> bool:
+    # iter_content wraps a read timeout in a ConnectionError
+    cause = error.args[0] if error.args else None
+    return isinstance(error, requests.exceptions.Timeout) or isinstance(cause, urllib3.exceptions.TimeoutError)
+
+
 class InsightApiClient:
     def __init__(
         self, 
         base_url: str, 
         api_key: str, 
         openai_api_key: str,
-        verify_ssl: bool = True
+        verify_ssl: bool = True,
+        timeouts: Optional[Dict[str, ApiTimeout]] = None,
+        retry_policies: Optional[Dict[str, RetryPolicy]] = None
     ):
         self.base_url = base_url
         self.api_key = api_key
         self.openai_api_key = openai_api_key
         self.verify_ssl = verify_ssl
-        self.session = requests.Session()
-        self.session.verify = verify_ssl
+        # Per-endpoint deadlines; a timeout passed to a call wins over these
+        self.timeouts = {**ENDPOINT_TIMEOUTS, **(timeouts or {})}
+        self.retry_policies = {**ENDPOINT_RETRY_POLICIES, **(retry_policies or {})}
         
         logger.debug(f"Initializing InsightApiClient with base_url: {base_url}")
         
-        # Set up headers according to API spec
-        self.session.headers.update({
+        # Set up headers according to API spec. Sent per request, since the
+        # aiohttp session is shared with clients holding other keys.
+        self.headers = {
             'X-API-Key': self.api_key,
             'X-OpenAI-API-Key': self.openai_api_key,
             'Content-Type': 'application/json',
             'Accept': 'application/json'
-        })
+        }
 
-    async def generate_api_key(self, email: str) -> str:
+    async def generate_api_key(self, email: str, timeout: Optional[ApiTimeout] = None) -> str:
         """Generate new API key"""
         endpoint = "/api/generateApiKey"
         data = {"email": email}
-        return await self.post(endpoint, data)
+        return await self.post(endpoint, data, timeout=timeout)
 
     async def get_company_insight(
         self,
         company_name: str,
         industry: str,
         language: str = "en",
-        scrape_employees: bool = False
+        scrape_employees: bool = False,
+        timeout: Optional[ApiTimeout] = None
     ) -> Dict[str, Any]:
         """Get company insights"""
         endpoint = "/api/getCompanyInsight"
@@ -61,13 +119,14 @@ class InsightApiClient:
             "language": language,
             "scrapeEmployees": scrape_employees
         }
-        return await self.get(endpoint, params)
+        return await self.get(endpoint, params, timeout=timeout)
 
     async def get_company_insight_by_url(
         self,
         company_url: str,
         language: str = "en",
-        scrape_employees: bool = False
+        scrape_employees: bool = False,
+        timeout: Optional[ApiTimeout] = None
     ) -> Dict[str, Any]:
         """Get company insights by URL"""
         endpoint = "/api/getCompanyInsightByUrl"
@@ -76,13 +135,14 @@ class InsightApiClient:
             "language": language,
             "scrapeEmployees": scrape_employees
         }
-        return await self.get(endpoint, params)
+        return await self.get(endpoint, params, timeout=timeout)
 
     async def get_profile_insight(
         self,
         full_name: str,
         company_name: str,
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ) -> Dict[str, Any]:
         """Get profile insights"""
         endpoint = "/api/getProfileInsight"
@@ -92,14 +152,15 @@ class InsightApiClient:
             "companyName": company_name,
             "language": language
         }
-        return await self.get(endpoint, params)
+        return await self.get(endpoint, params, timeout=timeout)
 
     async def get_outreach_email(
         self,
         profile: Dict[str, Any],
         sender_info: Optional[Dict[str, Any]] = None,
         language: str = "en",
-        proposal_url: Optional[str] = None
+        proposal_url: Optional[str] = None,
+        timeout: Optional[ApiTimeout] = None
     ) -> Dict[str, Any]:
         """Generate outreach email"""
         endpoint = "/api/getOutreachEmail"
@@ -113,49 +174,101 @@ class InsightApiClient:
         if proposal_url:
             params["proposalUrl"] = proposal_url
             
-        return await self.get(endpoint, params)
+        return await self.get(endpoint, params, timeout=timeout)
 
-    async def get(self, endpoint: str, params: Optional[dict] = None) -> dict:
-        """Make GET request to API"""
+    def _timeout(self, endpoint: str, timeout: Optional[ApiTimeout] = None) -> ApiTimeout:
+        return timeout or self.timeouts.get(endpoint, DEFAULT_TIMEOUT)
+
+    def _retry_policy(self, method: str, endpoint: str) -> RetryPolicy:
+        return self.retry_policies.get(endpoint, DEFAULT_RETRY if method == "GET" else NO_RETRY)
+
+    @staticmethod
+    def _status_error(status: int, message: str) -> ApiError:
+        error = RateLimitError if status == 429 else ApiError
+        return error(message, status_code=status)
+
+    def _retry_delay(self, policy: RetryPolicy, retry: int, retry_after: Optional[float],
+                     deadline: float, endpoint: str, failure: Exception) -> Optional[float]:
+        """Seconds to wait before retrying ``failure``, or None to give up on it"""
+        budget = get_retry_budget()
+        delay = policy.delay(retry, retry_after)
+        if delay is None or time.monotonic() + delay >= deadline or not budget.try_retry(retry_after is not None):
+            budget.record_outcome(retried=retry > 0, failed=True, retryable=policy.max_attempts > 1)
+            return None
+        logger.info(f"{endpoint} failed ({failure}); retry {retry + 1} in {delay:.2f}s")
+        return delay
+
+    def _not_retried(self, failure: Exception, retry: int) -> Exception:
+        """Count ``failure``, an error the policy never retries, as the end of its call and return it"""
+        get_retry_budget().record_outcome(retried=retry > 0, failed=True, retryable=False)
+        return failure
+
+    async def _request(self, method: str, endpoint: str, timeout: Optional[ApiTimeout] = None, **kwargs) -> dict:
+        """Send a request over the event loop's shared aiohttp session, retrying as the endpoint's policy allows"""
         url = f"{self.base_url}{endpoint}"
-        try:
-            response = self.session.get(url, params=params)
-            print(f"Debug - GET Request URL: {response.url}")
-            print(f"Debug - Response Status: {response.status_code}")
-            
-            if response.status_code in [401, 403]:
-                print(f"Debug - Auth Error Response: {response.text}")
-                raise ApiError(
-                    f"Authentication failed: {response.text}",
-                    status_code=response.status_code
-                )
-                
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Debug - Request Error: {str(e)}")
-            raise ApiError(str(e))
+        timeout = self._timeout(endpoint, timeout)
+        policy = self._retry_policy(method, endpoint)
+        get_retry_budget().record_call()
+        # Retries and their waits come out of the same total deadline
+        deadline = time.monotonic() + timeout.total
+        retry = 0
+        while True:
+            retry_after = None
+            attempt_timeout = replace(timeout, total=max(deadline - time.monotonic(), 0.001))
+            try:
+                async with get_session(self.verify_ssl).request(
+                    method, url, headers=self.headers, timeout=attempt_timeout.for_aiohttp(), **kwargs
+                ) as response:
+                    print(f"Debug - {method} Request URL: {response.url}")
+                    print(f"Debug - Response Status: {response.status}")
+                    
+                    if response.status in [401, 403]:
+                        text = await response.text()
+                        print(f"Debug - Auth Error Response: {text}")
+                        raise self._not_retried(ApiError(
+                            f"Authentication failed: {text}",
+                            status_code=response.status
+                        ), retry)
+
+                    if response.status in policy.statuses:
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        failure = self._status_error(response.status, f"{response.status} {response.reason} from {endpoint}")
+                    else:
+                        response.raise_for_status()
+                        result = await response.json(content_type=None)
+                        get_retry_budget().record_outcome(retried=retry > 0, failed=False)
+                        return result
+            except aiohttp.ClientResponseError as e:
+                print(f"Debug - Request Error: {str(e)}")
+                raise self._not_retried(self._status_error(e.status, str(e)), retry)
+            except asyncio.TimeoutError as e:
+                # Checked before ClientError: aiohttp's read timeouts are both
+                count_timeout()
+                print(f"Debug - Request timed out: {method} {endpoint}")
+                failure = ApiTimeoutError(f"{method} {endpoint} timed out ({timeout})")
+                if not policy.retry_errors:
+                    raise self._not_retried(failure, retry) from e
+            except aiohttp.ClientError as e:
+                print(f"Debug - Request Error: {str(e)}")
+                failure = ApiError(str(e))
+                if not policy.retry_errors:
+                    raise self._not_retried(failure, retry) from e
+
+            delay = self._retry_delay(policy, retry, retry_after, deadline, endpoint, failure)
+            if delay is None:
+                raise failure
+            await asyncio.sleep(delay)
+            retry += 1
+
+    async def get(self, endpoint: str, params: Optional[dict] = None, timeout: Optional[ApiTimeout] = None) -> dict:
+        """Make GET request to API"""
+        # Query values must be strings for aiohttp; None is dropped as requests did
+        query = {key: str(value) for key, value in (params or {}).items() if value is not None}
+        return await self._request("GET", endpoint, timeout=timeout, params=query)
 
-    async def post(self, endpoint: str, data: dict) -> dict:
+    async def post(self, endpoint: str, data: dict, timeout: Optional[ApiTimeout] = None) -> dict:
         """Make POST request to API"""
-        url = f"{self.base_url}{endpoint}"
-        try:
-            response = self.session.post(url, json=data)
-            print(f"Debug - POST Request URL: {response.url}")
-            print(f"Debug - Response Status: {response.status_code}")
-            
-            if response.status_code in [401, 403]:
-                print(f"Debug - Auth Error Response: {response.text}")
-                raise ApiError(
-                    f"Authentication failed: {response.text}",
-                    status_code=response.status_code
-                )
-                
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Debug - Request Error: {str(e)}")
-            raise ApiError(str(e))
+        return await self._request("POST", endpoint, timeout=timeout, json=data)
 
     async def _make_strategy_request(
         self,
@@ -164,7 +277,8 @@ class InsightApiClient:
         company: Optional[Dict[str, Any]] = None,
         targetCompany: Optional[Dict[str, Any]] = None,
         language: str = "en",
-        sender_info: Optional[Dict[str, Any]] = None
+        sender_info: Optional[Dict[str, Any]] = None,
+        timeout: Optional[ApiTimeout] = None
     ) -> Dict[str, Any]:
         """Make a strategy request to the API"""
         endpoint = "/api/generateProfileCompanyInteractionStrategy"
@@ -185,7 +299,7 @@ class InsightApiClient:
         print(f"Debug - Request data: {json.dumps(data, indent=2)}")
         
         try:
-            response = await self.post(endpoint, data)
+            response = await self.post(endpoint, data, timeout=timeout)
             return response
         except Exception as e:
             print(f"Debug - Error in _make_strategy_request: {str(e)}")
@@ -196,7 +310,8 @@ class InsightApiClient:
         profile: Dict[str, Any],
         company: Dict[str, Any],
         sender_info: Dict[str, Any],
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ) -> OutreachResponse:
         """Generate an outreach email"""
         response = await self._make_strategy_request(
@@ -204,7 +319,8 @@ class InsightApiClient:
             profile=profile,
             company=company,
             language=language,
-            sender_info=sender_info
+            sender_info=sender_info,
+            timeout=timeout
         )
         
         if response.get('action') == 'outreach' and 'outreach_data' in response:
@@ -222,7 +338,8 @@ class InsightApiClient:
         profile: Optional[Dict[str, Any]] = None,
         company: Optional[Dict[str, Any]] = None,
         targetCompany: Optional[Dict[str, Any]] = None,
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ) -> ProfileCompanyFitResponse:
         print(f"Debug - Sending target company data: {targetCompany}")
         try:
@@ -231,7 +348,8 @@ class InsightApiClient:
                 profile=profile,
                 company=company,
                 targetCompany=targetCompany,
-                language=language
+                language=language,
+                timeout=timeout
             )
             
             # Add debug logging
@@ -252,14 +370,16 @@ class InsightApiClient:
         self,
         profile: Dict[str, Any],
         company: Dict[str, Any],
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ) -> MeetingResponse:
         """Prepare meeting strategy"""
         response = await self._make_strategy_request(
             action="meeting",
             profile=profile,
             company=company,
-            language=language
+            language=language,
+            timeout=timeout
         )
         
         if response.get('action') == 'meeting' and 'meeting_data' in response:
@@ -305,146 +425,193 @@ class InsightApiClient:
             print(f"DEBUG: Full response content: {response.content}")
             raise ApiError(str(e))
 
+    def _stream(self, endpoint: str, data: Dict[str, Any], timeout: Optional[ApiTimeout] = None):
+        """
+        POST to a server-sent events endpoint and yield each event's JSON
+        payload.
+
+        Until the first event arrives, failures are retried under the
+        endpoint's retry policy. After that, a connection that drops before
+        the final event is reopened with ``Last-Event-ID``; payloads carry
+        their event id under ``STREAM_EVENT_ID_KEY`` so callers can skip
+        events the server replays.
+
+        The whole stream, retries and reconnects included, must finish within
+        the total timeout. Closing the generator closes the response.
+        """
+        url = f"{self.base_url}{endpoint}"
+        timeout = self._timeout(endpoint, timeout)
+        policy = self._retry_policy("POST", endpoint)
+        get_retry_budget().record_call()
+        deadline = time.monotonic() + timeout.total
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+            'X-API-Key': self.api_key,
+            'X-OpenAI-API-Key': self.openai_api_key
+        }
+        parser = SSEParser()
+        # Id of the last event handed to the caller
+        delivered_id = None
+        received = 0
+        retries = 0
+        failures = 0
+        while True:
+            resumed_from = parser.last_event_id
+            if resumed_from is not None:
+                headers['Last-Event-ID'] = resumed_from
+            finished = False
+            retry_after = None
+            dropped = None
+            connect, read = timeout.for_requests()
+            remaining = deadline - time.monotonic()
+            try:
+                # Counted before the request so a stream holding a pooled
+                # connection is always counted as open
+                count_stream('opened')
+                try:
+                    # Closing the response hands its connection back to the pool
+                    with get_stream_session().post(
+                        url,
+                        json=data,
+                        stream=True,
+                        verify=self.verify_ssl,
+                        headers=headers,
+                        timeout=(min(connect, remaining), min(read, remaining))
+                    ) as response:
+                        try:
+                            print(f"Debug - Response status: {response.status_code}")
+                            if response.status_code >= 400:
+                                failure = self._status_error(
+                                    response.status_code,
+                                    f"Stream request failed: {response.status_code} {response.reason}"
+                                )
+                                if response.status_code not in policy.statuses:
+                                    raise self._not_retried(failure, retries) if not received else failure
+                                dropped = failure
+                                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                            else:
+                                for event in iter_sse(response.iter_content(chunk_size=SSE_CHUNK_SIZE), parser):
+                                    if not event.data:
+                                        continue
+                                    try:
+                                        event_data = event.json()
+                                    except json.JSONDecodeError:
+                                        # Resume from the event before this one
+                                        parser.last_event_id = delivered_id
+                                        raise
+                                    print(f"Debug - Event: {event_data}")
+                                    if isinstance(event_data, dict):
+                                        if event.id:
+                                            event_data[STREAM_EVENT_ID_KEY] = event.id
+                                        finished = event_data.get('type') in STREAM_FINAL_EVENT_TYPES
+                                    if not received:
+                                        get_retry_budget().record_outcome(retried=retries > 0, failed=False)
+                                    received += 1
+                                    # A replay of the event resumed from is not progress
+                                    if event.id != resumed_from:
+                                        failures = 0
+                                    delivered_id = event.id
+                                    yield event_data
+                                    if not finished and time.monotonic() > deadline:
+                                        count_timeout(stream=True)
+                                        raise ApiTimeoutError(f"{endpoint} stream passed its {timeout.total:g}s deadline")
+                        except GeneratorExit:
+                            if not finished:
+                                count_stream('cancelled')
+                                print(f"Debug - Stream cancelled: {endpoint}")
+                            raise
+                finally:
+                    count_stream('closed')
+                if finished:
+                    return
+                # Ended without a final event: the connection was cut
+                # between two chunks rather than in the middle of one
+                dropped = dropped or ApiError("Stream ended before its final event")
+            except ApiError:
+                raise
+            except STREAM_DROP_ERRORS as e:
+                if _is_timeout(e):
+                    count_timeout(stream=True)
+                dropped = e
+            except Exception as e:
+                print(f"Debug - Error in stream: {str(e)}")
+                raise ApiError(str(e))
+
+            error = ApiTimeoutError if _is_timeout(dropped) else ApiError
+            if not received:
+                # Nothing delivered yet, so this is a plain retry of the request
+                if getattr(dropped, 'status_code', None) not in policy.statuses and not policy.retry_errors:
+                    raise self._not_retried(dropped if isinstance(dropped, ApiError) else error(str(dropped)), retries)
+                delay = self._retry_delay(policy, retries, retry_after, deadline, endpoint, dropped)
+                if delay is None:
+                    raise dropped if isinstance(dropped, ApiError) else error(str(dropped))
+                retries += 1
+                # Drop whatever the failed attempt left half-parsed
+                parser = SSEParser.resume(parser)
+                time.sleep(delay)
+                continue
+
+            # Resuming needs an event id
+            if parser.last_event_id is None:
+                raise error(f"Stream dropped and cannot be resumed: {dropped}")
+            if failures >= STREAM_MAX_RECONNECTS:
+                raise error(f"Stream dropped {failures + 1} times in a row: {dropped}")
+            delay = retry_after if retry_after is not None else min(
+                (parser.retry / 1000 if parser.retry is not None else STREAM_RECONNECT_DELAY_SECONDS) * 2 ** failures,
+                STREAM_RECONNECT_MAX_DELAY_SECONDS
+            )
+            if time.monotonic() + delay >= deadline:
+                count_timeout(stream=True)
+                raise ApiTimeoutError(f"{endpoint} stream passed its {timeout.total:g}s deadline: {dropped}")
+            failures += 1
+            logger.info(f"{endpoint} stream dropped ({dropped}); resuming after event "
+                        f"{parser.last_event_id} in {delay:.1f}s (attempt {failures})")
+            # Events cut off mid-way are replayed by the server
+            parser = SSEParser.resume(parser)
+            time.sleep(delay)
+
     def get_profile_insight_stream(
         self,
         full_name: str,
         company_name: str,
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ):
         """Get streaming profile insights"""
         print("\n=== Starting Profile Stream ===")
-        endpoint = "/api/v2/profile_insight/stream"
-        data = {
+        return self._stream("/api/v2/profile_insight/stream", {
             "profile": full_name,
             "company": company_name,
             "language": language
-        }
-        
-        url = f"{self.base_url}{endpoint}"
-        try:
-            print("Debug - Getting profile insight stream 1")
-            
-            response = requests.post(
-                url, 
-                json=data,
-                stream=True,
-                verify=False,
-                headers={
-                    'Content-Type': 'application/json',
-                    'X-API-Key': self.api_key,
-                    'X-OpenAI-API-Key': self.openai_api_key
-                }
-            )
-            
-            print(f"Debug - Response status: {response.status_code}")
-            
-            # Process the response line by line
-            for line in response.iter_lines():
-                if line:
-                    line_text = line.decode('utf-8')
-                    print(f"Debug - Raw line: {line_text}")
-                    
-                    if line_text.startswith('data: '):
-                        event_data = json.loads(line_text[6:])
-                        print(f"Debug - Event: {event_data}")
-                        yield event_data
-                        
-        except Exception as e:
-            print(f"Debug - Error in stream: {str(e)}")
-            raise ApiError(str(e))
+        }, timeout=timeout)
 
     def get_company_insight_stream(
         self,
         company_name: str,
         industry: str,
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ):
         """Get streaming company insights"""
         print("\n=== Starting Company Stream ===")
-        endpoint = "/api/v2/company_insight/stream"
-        data = {
+        return self._stream("/api/v2/company_insight/stream", {
             "company": company_name,
             "industry": industry,
             "language": language
-        }
-        
-        url = f"{self.base_url}{endpoint}"
-        try:
-            print("Debug - Getting company insight stream")
-            
-            response = requests.post(
-                url, 
-                json=data,
-                stream=True,
-                verify=False,
-                headers={
-                    'Content-Type': 'application/json',
-                    'X-API-Key': self.api_key,
-                    'X-OpenAI-API-Key': self.openai_api_key
-                }
-            )
-            
-            print(f"Debug - Response status: {response.status_code}")
-            
-            # Process the response line by line
-            for line in response.iter_lines():
-                if line:
-                    line_text = line.decode('utf-8')
-                    print(f"Debug - Raw line: {line_text}")
-                    
-                    if line_text.startswith('data: '):
-                        event_data = json.loads(line_text[6:])
-                        print(f"Debug - Event: {event_data}")
-                        yield event_data
-                        
-        except Exception as e:
-            print(f"Debug - Error in stream: {str(e)}")
-            raise ApiError(str(e))
+        }, timeout=timeout)
 
     def get_my_company_insight_stream(
         self,
         company_name: str,
         industry: str,
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ):
         """Get streaming company insights for the user's own company"""
         print("\n=== Starting My Company Stream ===")
-        endpoint = "/api/v2/my_company_insight/stream"
-        data = {
+        return self._stream("/api/v2/my_company_insight/stream", {
             "company": company_name,
             "industry": industry,
             "language": language
-        }
-        
-        url = f"{self.base_url}{endpoint}"
-        try:
-            print("Debug - Getting my company insight stream")
-            
-            response = requests.post(
-                url, 
-                json=data,
-                stream=True,
-                verify=False,
-                headers={
-                    'Content-Type': 'application/json',
-                    'X-API-Key': self.api_key,
-                    'X-OpenAI-API-Key': self.openai_api_key
-                }
-            )
-            
-            print(f"Debug - Response status: {response.status_code}")
-            
-            # Process the response line by line
-            for line in response.iter_lines():
-                if line:
-                    line_text = line.decode('utf-8')
-                    print(f"Debug - Raw line: {line_text}")
-                    
-                    if line_text.startswith('data: '):
-                        event_data = json.loads(line_text[6:])
-                        print(f"Debug - Event: {event_data}")
-                        yield event_data
-                        
-        except Exception as e:
-            print(f"Debug - Error in stream: {str(e)}")
-            raise ApiError(str(e))
\ No newline at end of file
+        }, timeout=timeout)
@@ -0,0 +1,156 @@
+"""Retry policies for the insight API.
+
+A RetryPolicy decides which failures of one endpoint are retried and how
+long to wait: exponential backoff with full jitter, or the server's
+``Retry-After`` when it sends one. All endpoints share one RetryBudget, so
+retries stay a bounded fraction of traffic and an upstream outage is not
+multiplied by the retries of every caller.
+"""
+import os
+import time
+import random
+import threading
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, FrozenSet, Optional
+
+logger = logging.getLogger(__name__)
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("INSIGHT_API_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("INSIGHT_API_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("INSIGHT_API_RETRY_MAX_DELAY", "8"))
+# A longer Retry-After is not waited out; the call fails instead
+RETRY_AFTER_MAX_SECONDS = float(os.getenv("INSIGHT_API_RETRY_AFTER_MAX", "30"))
+# Retries allowed per first attempt, plus a trickle per second so a quiet
+# app can still retry
+RETRY_BUDGET_RATIO = float(os.getenv("INSIGHT_API_RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_PER_SECOND = float(os.getenv("INSIGHT_API_RETRY_BUDGET_PER_SECOND", "1"))
+RETRY_BUDGET_MAX = float(os.getenv("INSIGHT_API_RETRY_BUDGET_MAX", "10"))
+
+TRANSIENT_STATUSES = frozenset({429, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    # Attempts in total, the first one included; 1 never retries
+    max_attempts: int = RETRY_MAX_ATTEMPTS
+    base_delay: float = RETRY_BASE_DELAY_SECONDS
+    max_delay: float = RETRY_MAX_DELAY_SECONDS
+    statuses: FrozenSet[int] = TRANSIENT_STATUSES
+    # Also retry connection errors and timeouts. Only safe when a request
+    # that may have reached the server can be repeated.
+    retry_errors: bool = True
+
+    def backoff(self, retry: int) -> float:
+        """Full jitter: uniform between 0 and the capped exponential delay of the ``retry``-th retry"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    def delay(self, retry: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before the ``retry``-th retry (0-based); None when it should not be made"""
+        if retry + 1 >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= RETRY_AFTER_MAX_SECONDS else None
+        return self.backoff(retry)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+DEFAULT_RETRY = RetryPolicy()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header, given as seconds or as an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass
+class RetryStats:
+    calls: int = 0
+    retries: int = 0
+    # Calls that needed at least one retry and then succeeded
+    recovered: int = 0
+    # Calls that failed after retrying, or with retries left but no budget
+    exhausted: int = 0
+    # Calls that failed on the first attempt with an error their policy never retries
+    non_retryable: int = 0
+    budget_denied: int = 0
+    retry_after_honoured: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        data['retry_ratio'] = self.retries / self.calls if self.calls else 0.0
+        return data
+
+
+class RetryBudget:
+    """Token bucket shared by all calls: each call adds ``ratio`` tokens, each retry spends one"""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, per_second: float = RETRY_BUDGET_PER_SECOND,
+                 max_tokens: float = RETRY_BUDGET_MAX):
+        self.ratio = ratio
+        self.per_second = per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = RetryStats()
+
+    def _refill(self, amount: float) -> None:
+        now = time.monotonic()
+        amount += (now - self._refilled_at) * self.per_second
+        self._refilled_at = now
+        self._tokens = min(self.max_tokens, self._tokens + amount)
+
+    def record_call(self) -> None:
+        with self._lock:
+            self.stats.calls += 1
+            self._refill(self.ratio)
+
+    def try_retry(self, retry_after: bool = False) -> bool:
+        with self._lock:
+            self._refill(0)
+            if self._tokens < 1:
+                self.stats.budget_denied += 1
+                return False
+            self._tokens -= 1
+            self.stats.retries += 1
+            if retry_after:
+                self.stats.retry_after_honoured += 1
+            return True
+
+    def record_outcome(self, retried: bool, failed: bool, retryable: bool = True) -> None:
+        """Count how a call ended; ``retryable`` is False when its last error was never going to be retried"""
+        if not retried and not failed:
+            return
+        with self._lock:
+            if not failed:
+                self.stats.recovered += 1
+            elif retried or retryable:
+                self.stats.exhausted += 1
+            else:
+                self.stats.non_retryable += 1
+
+
+_budget = RetryBudget()
+
+
+def get_retry_budget() -> RetryBudget:
+    return _budget
+
+
+def get_retry_stats() -> Dict[str, float]:
+    with _budget._lock:
+        return _budget.stats.as_dict()
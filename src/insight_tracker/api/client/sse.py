@@ -0,0 +1,123 @@
+"""Incremental server-sent events parser.
+
+Follows the field rules of the HTML event-stream format: ``data:`` lines are
+joined with newlines, ``event:``, ``id:`` and ``retry:`` are honoured, lines
+starting with ``:`` are comments, and CR, LF or CRLF end a line even when
+the terminator is split across network chunks. Lines are split on bytes and
+each field value is decoded once.
+"""
+import os
+import json
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Optional
+
+# Bytes requested per read from the response body
+SSE_CHUNK_SIZE = int(os.getenv("INSIGHT_SSE_CHUNK_SIZE", "512"))
+
+
+@dataclass
+class SSEEvent:
+    data: str
+    event: str = 'message'
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+    def json(self) -> Any:
+        return json.loads(self.data)
+
+
+class SSEParser:
+    """Feed response bytes in, get complete events out"""
+
+    def __init__(self):
+        self._buffer = b''
+        # A chunk ended in CR; an LF at the start of the next one belongs to it
+        self._pending_cr = False
+        self._data: List[str] = []
+        self._event = ''
+        self._retry: Optional[int] = None
+        # An id line takes effect when its event is dispatched, so an event
+        # cut off by a dropped connection is not skipped on resume
+        self._id_buffer: Optional[str] = None
+        # Both persist across events, as in the spec
+        self.last_event_id: Optional[str] = None
+        self.retry: Optional[int] = None
+
+    @classmethod
+    def resume(cls, previous: "SSEParser") -> "SSEParser":
+        """A parser for a reconnected stream, keeping ``previous``'s event id and retry delay"""
+        parser = cls()
+        parser._id_buffer = parser.last_event_id = previous.last_event_id
+        parser.retry = previous.retry
+        return parser
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        if self._pending_cr and chunk[:1] == b'\n':
+            chunk = chunk[1:]
+        buffer = self._buffer + chunk if self._buffer else chunk
+        # Only complete lines are parsed; the rest waits for the next chunk
+        end = max(buffer.rfind(b'\n'), buffer.rfind(b'\r'))
+        if end == -1:
+            self._buffer, self._pending_cr = buffer, False
+            return []
+        self._buffer = buffer[end + 1:]
+        self._pending_cr = end == len(buffer) - 1 and buffer[end] == 0x0D
+
+        events = []
+        data = self._data
+        # bytes.splitlines splits on exactly CR, LF and CRLF, as the format requires
+        for line in buffer[:end + 1].splitlines():
+            if line.startswith(b'data:'):
+                value = line[6:] if line[5:6] == b' ' else line[5:]
+                data.append(value.decode('utf-8', errors='replace'))
+            elif not line:
+                event = self._dispatch()
+                if event is not None:
+                    events.append(event)
+                data = self._data
+            else:
+                self._process_field(line)
+        return events
+
+    def flush(self) -> None:
+        """
+        End of stream: discard the event in progress, as the spec says. Its
+        id does not become ``last_event_id``, so a reconnect asks for it again.
+        """
+        self._buffer, self._pending_cr = b'', False
+        self._data, self._event, self._retry = [], '', None
+        self._id_buffer = self.last_event_id
+
+    def _process_field(self, line: bytes) -> None:
+        if line[:1] == b':':
+            return
+        name, sep, value = line.partition(b':')
+        if sep and value[:1] == b' ':
+            value = value[1:]
+        if name == b'data':
+            self._data.append(value.decode('utf-8', errors='replace'))
+        elif name == b'event':
+            self._event = value.decode('utf-8', errors='replace')
+        elif name == b'id':
+            if b'\0' not in value:
+                self._id_buffer = value.decode('utf-8', errors='replace')
+        elif name == b'retry':
+            if value.isdigit():
+                self._retry = self.retry = int(value)
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        data, event, retry = self._data, self._event, self._retry
+        self._data, self._event, self._retry = [], '', None
+        self.last_event_id = self._id_buffer
+        if not data:
+            return None
+        return SSEEvent(data='\n'.join(data), event=event or 'message', id=self.last_event_id, retry=retry)
+
+
+def iter_sse(chunks: Iterable[bytes], parser: Optional[SSEParser] = None) -> Iterator[SSEEvent]:
+    """Events parsed from an iterable of byte chunks, e.g. ``response.iter_content(SSE_CHUNK_SIZE)``"""
+    parser = parser or SSEParser()
+    for chunk in chunks:
+        if chunk:
+            yield from parser.feed(chunk)
+    parser.flush()
@@ -4,6 +4,9 @@ class ApiError(Exception):
         self.status_code = status_code
         super().__init__(self.error_message)
 
+class ApiTimeoutError(ApiError):
+    pass
+
 class AuthenticationError(ApiError):
     pass
 
@@ -302,4 +302,30 @@ class MeetingResponse:
             meeting_preparation=meeting_preparation,
             total_tokens=data['total_tokens'],
             status_code=data.get('status_code', 200)
-        )
\ No newline at end of file
+        )
+def _verified_value(field_data: Any) -> Any:
+    """Streamed insights wrap each field as {'value': ..., 'verification_status': ..., 'sources': ...}"""
+    if isinstance(field_data, dict):
+        return field_data.get('value')
+    return field_data
+
+def _as_list(value: Any) -> Optional[List[str]]:
+    if value is None or isinstance(value, list):
+        return value
+    return [value]
+
+def profile_from_insight(profile_insight: Dict[str, Any]) -> ProfessionalProfile:
+    """Summary ProfessionalProfile from the `profile_insight` of a streamed `complete` event"""
+    values = {name: _verified_value(profile_insight.get(name)) for name in ProfessionalProfile.__dataclass_fields__}
+    values['full_name'] = values['full_name'] or ''
+    return ProfessionalProfile(**values)
+
+def company_from_insight(company_insight: Dict[str, Any]) -> Company:
+    """Summary Company from the `company_insight` of a streamed `complete` event"""
+    company_info = company_insight.get('company') or company_insight
+    values = {name: _verified_value(company_info.get(name)) for name in Company.__dataclass_fields__}
+    values['company_name'] = values['company_name'] or ''
+    for name in ('company_services', 'company_industries', 'company_awards_recognitions',
+                 'company_clients_partners', 'company_culture', 'company_recent_updates'):
+        values[name] = _as_list(values[name])
+    return Company(**values)
@@ -1,17 +1,119 @@
 from typing import Optional, Dict, Any, List, AsyncGenerator
-from ..client.insight_client import InsightApiClient
+from ..client.insight_client import InsightApiClient, STREAM_EVENT_ID_KEY
+from ..client.http import ApiTimeout
 from ..exceptions.api_exceptions import ApiError
 from ..models.responses import ProfileInsightResponse, CompanyInsightResponse, EmailResponse, ProfessionalProfile, Company, ProfileCompanyFitResponse, OutreachResponse, MeetingResponse, MeetingPreparation
+from .research_cache import ResearchCache, event_tokens
+# Module import: insight_tracker.db imports the api package
+import insight_tracker.db as db
 import json
+import time
+from contextlib import closing
 
 class InsightService:
-    def __init__(self, api_client: InsightApiClient):
+    def __init__(
+        self,
+        api_client: InsightApiClient,
+        cache: Optional[ResearchCache] = None,
+        stale_while_revalidate: bool = False,
+        user_email: Optional[str] = None
+    ):
         self.api_client = api_client
+        self.cache = cache
+        # Serve company research past its TTL immediately and refresh it in the background
+        self.stale_while_revalidate = stale_while_revalidate
+        # Calls are recorded in this user's usage ledger; None records nothing
+        self.user_email = user_email
+
+    def _record_usage(self, endpoint: str, entity: Optional[str], started: float, total_tokens: int = 0,
+                      cache_hit: bool = False, error: bool = False) -> None:
+        if self.user_email is None:
+            return
+        try:
+            db.record_api_usage(
+                self.user_email, endpoint, entity, total_tokens,
+                (time.perf_counter() - started) * 1000, cache_hit=cache_hit, error=error
+            )
+        except Exception as e:
+            print(f"Debug - Failed to record {endpoint} usage: {str(e)}")
 
-    async def generate_api_key(self, email: str) -> str:
+    async def _metered_call(self, endpoint: str, entity: Optional[str], request):
+        """Await ``request`` and record its tokens and latency"""
+        started = time.perf_counter()
+        try:
+            response = await request
+        except Exception:
+            self._record_usage(endpoint, entity, started, error=True)
+            raise
+        tokens = response.get('total_tokens', 0) if isinstance(response, dict) else getattr(response, 'total_tokens', 0)
+        self._record_usage(endpoint, entity, started, tokens or 0)
+        return response
+
+    def _metered_stream(self, endpoint: str, entity: Optional[str], events):
+        """Pass ``events`` through, recording the run once it completes or fails"""
+        started = time.perf_counter()
+        try:
+            with closing(events):
+                for event in events:
+                    if event.get('type') == 'complete':
+                        self._record_usage(endpoint, entity, started, event_tokens(event))
+                    elif event.get('type') == 'error':
+                        self._record_usage(endpoint, entity, started, error=True)
+                    yield event
+        except Exception:
+            self._record_usage(endpoint, entity, started, error=True)
+            raise
+
+    @staticmethod
+    def _deduplicated(events):
+        """Drop events a resumed stream replays, so callers see each event once"""
+        seen = set()
+        with closing(events):
+            for event in events:
+                event_id = event.pop(STREAM_EVENT_ID_KEY, None) if isinstance(event, dict) else None
+                if event_id is not None:
+                    if event_id in seen:
+                        print(f"Debug - Service: Skipping replayed event {event_id}")
+                        continue
+                    seen.add(event_id)
+                yield event
+
+    def _cached_stream(self, kind: str, entity: str, context: str, language: str, stream, allow_stale: bool = False):
+        """Replay a cached final result, or run ``stream()`` and cache its ``complete`` event"""
+        endpoint = f'{kind}_insight_stream'
+        upstream = stream
+        # Background refreshes go through the meter too, so their tokens are counted
+        stream = lambda: self._metered_stream(endpoint, f'{entity} @ {context}', self._deduplicated(upstream()))
+        if self.cache is not None:
+            started = time.perf_counter()
+            cached = self.cache.get(kind, entity, context, language, allow_stale=allow_stale)
+            if cached is not None:
+                self._record_usage(endpoint, f'{entity} @ {context}', started, cache_hit=True)
+                if cached['stale']:
+                    self.cache.revalidate(kind, entity, context, language, stream)
+                    cached['revalidating'] = True
+                yield cached
+                return
+
+        with closing(stream()) as events:
+            for event in events:
+                if self.cache is not None and event.get('type') == 'complete' and event.get('content'):
+                    event = self.cache.put(kind, entity, context, language, event)
+                yield event
+
+    def get_cached_company_analysis(self, company_name: str, industry: str, language: str = "en") -> Optional[Dict[str, Any]]:
+        """Latest cached company result, e.g. to swap in a finished background refresh"""
+        if self.cache is None:
+            return None
+        return self.cache.get('company', company_name, industry, language, allow_stale=True)
+
+    def is_refreshing_company_analysis(self, company_name: str, industry: str, language: str = "en") -> bool:
+        return self.cache is not None and self.cache.is_refreshing('company', company_name, industry, language)
+
+    async def generate_api_key(self, email: str, timeout: Optional[ApiTimeout] = None) -> str:
         """Generate new API key"""
         try:
-            return await self.api_client.generate_api_key(email)
+            return await self.api_client.generate_api_key(email, timeout=timeout)
         except ApiError as e:
             raise
 
@@ -20,16 +122,18 @@ class InsightService:
         company_name: str,
         industry: str,
         language: str = "en",
-        scrape_employees: bool = False
+        scrape_employees: bool = False,
+        timeout: Optional[ApiTimeout] = None
     ) -> CompanyInsightResponse:
         """Get company analysis"""
         try:
-            response = await self.api_client.get_company_insight(
+            response = await self._metered_call('company_insight', f'{company_name} @ {industry}', self.api_client.get_company_insight(
                 company_name=company_name,
                 industry=industry,
                 language=language,
-                scrape_employees=scrape_employees
-            )
+                scrape_employees=scrape_employees,
+                timeout=timeout
+            ))
             
             # Extract the company data from the response
             company_data = response.get('company', {})
@@ -51,15 +155,17 @@ class InsightService:
         self,
         company_url: str,
         language: str = "en",
-        scrape_employees: bool = False
+        scrape_employees: bool = False,
+        timeout: Optional[ApiTimeout] = None
     ) -> CompanyInsightResponse:
         """Get company analysis by URL"""
         try:
-            response = await self.api_client.get_company_insight_by_url(
+            response = await self._metered_call('company_insight_by_url', company_url, self.api_client.get_company_insight_by_url(
                 company_url=company_url,
                 language=language,
-                scrape_employees=scrape_employees
-            )
+                scrape_employees=scrape_employees,
+                timeout=timeout
+            ))
 
             # Extract the company data from the response
             company_data = response.get('company', {})
@@ -79,15 +185,17 @@ class InsightService:
         self,
         full_name: str,
         company_name: str,
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ) -> ProfileInsightResponse:
         """Get profile analysis"""
         try:
-            response = await self.api_client.get_profile_insight(
+            response = await self._metered_call('profile_insight', f'{full_name} @ {company_name}', self.api_client.get_profile_insight(
                 full_name=full_name,
                 company_name=company_name,
-                language=language
-            )
+                language=language,
+                timeout=timeout
+            ))
             
             # Convert the profile dict to ProfessionalProfile object
             profile_data = response.get('profile', {})
@@ -111,16 +219,18 @@ class InsightService:
         profile: Dict[str, Any],
         company: Dict[str, Any],
         sender_info: Dict[str, Any],
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ) -> str:
         """Generate personalized outreach email"""
         try:
-            response = await self.api_client.generate_outreach_email(
+            response = await self._metered_call('outreach_email', (profile or {}).get('full_name'), self.api_client.generate_outreach_email(
                 profile=profile,
                 company=company,
                 sender_info=sender_info,
-                language=language
-            )
+                language=language,
+                timeout=timeout
+            ))
             # Return just the email string
             return response.email
         except ApiError as e:
@@ -135,7 +245,8 @@ class InsightService:
         profile: Optional[Dict[str, Any]] = None,
         company: Optional[Dict[str, Any]] = None,
         targetCompany: Optional[Dict[str, Any]] = None,
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ) -> ProfileCompanyFitResponse:
         """Evaluate profile fit"""
         try:
@@ -144,12 +255,13 @@ class InsightService:
             print("Debug - Sending company data:", company)
             print("Debug - Sending target company data:", targetCompany)
             
-            response = await self.api_client.evaluate_profile_fit(
+            response = await self._metered_call('profile_fit', (profile or {}).get('full_name'), self.api_client.evaluate_profile_fit(
                 profile=profile,
                 company=company,
                 targetCompany=targetCompany,
-                language=language
-            )
+                language=language,
+                timeout=timeout
+            ))
             return response
         except ApiError as e:
             print(f"Debug - API Error in evaluate_profile_fit: {str(e)}")
@@ -163,15 +275,17 @@ class InsightService:
         self,
         profile: Dict[str, Any],
         company: Dict[str, Any],
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ) -> MeetingPreparation:
         """Prepare meeting strategy"""
         try:
-            response = await self.api_client.prepare_meeting(
+            response = await self._metered_call('meeting_preparation', (profile or {}).get('full_name'), self.api_client.prepare_meeting(
                 profile=profile,
                 company=company,
-                language=language
-            )
+                language=language,
+                timeout=timeout
+            ))
             # Return just the meeting preparation data
             return response.meeting_preparation
         except ApiError as e:
@@ -185,15 +299,20 @@ class InsightService:
         self,
         full_name: str,
         company_name: str,
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ):
         """Get streaming profile analysis"""
         print("Debug - Service: Starting profile analysis stream")
         try:
-            for event in self.api_client.get_profile_insight_stream(
-                full_name=full_name,
-                company_name=company_name,
-                language=language
+            for event in self._cached_stream(
+                'profile', full_name, company_name, language,
+                lambda: self.api_client.get_profile_insight_stream(
+                    full_name=full_name,
+                    company_name=company_name,
+                    language=language,
+                    timeout=timeout
+                )
             ):
                 print(f"Debug - Service got event: {event}")
                 yield event
@@ -206,15 +325,21 @@ class InsightService:
         self,
         company_name: str,
         industry: str,
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ):
         """Get streaming company analysis"""
         print("Debug - Service: Starting company analysis stream")
         try:
-            for event in self.api_client.get_company_insight_stream(
-                company_name=company_name,
-                industry=industry,
-                language=language
+            for event in self._cached_stream(
+                'company', company_name, industry, language,
+                lambda: self.api_client.get_company_insight_stream(
+                    company_name=company_name,
+                    industry=industry,
+                    language=language,
+                    timeout=timeout
+                ),
+                allow_stale=self.stale_while_revalidate
             ):
                 print(f"Debug - Service got event: {event}")
                 yield event
@@ -227,16 +352,18 @@ class InsightService:
         self,
         company_name: str,
         industry: str,
-        language: str = "en"
+        language: str = "en",
+        timeout: Optional[ApiTimeout] = None
     ):
         """Get streaming company analysis for the user's own company"""
         print("Debug - Service: Starting my company analysis stream")
         try:
-            for event in self.api_client.get_my_company_insight_stream(
+            for event in self._metered_stream('my_company_insight_stream', f'{company_name} @ {industry}', self._deduplicated(self.api_client.get_my_company_insight_stream(
                 company_name=company_name,
                 industry=industry,
-                language=language
-            ):
+                language=language,
+                timeout=timeout
+            ))):
                 print(f"Debug - Service got event: {event}")
                 yield event
                     
@@ -0,0 +1,201 @@
+import os
+import threading
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+# Module import: insight_tracker.db imports the api package, which imports this module
+import insight_tracker.db as db
+from insight_tracker.storage.dedupe import research_cache_key
+
+logger = logging.getLogger(__name__)
+
+RESEARCH_CACHE_TTL_SECONDS = float(os.getenv("INSIGHT_RESEARCH_CACHE_TTL", str(24 * 3600)))
+# Up to this age a cached result may still be served while it is re-researched
+# in the background (stale-while-revalidate); older results block on a new run
+RESEARCH_CACHE_SOFT_TTL_SECONDS = float(os.getenv("INSIGHT_RESEARCH_CACHE_SOFT_TTL", str(7 * 24 * 3600)))
+RESEARCH_CACHE_ENABLED = os.getenv("INSIGHT_RESEARCH_CACHE", "1") != "0"
+
+
+@dataclass
+class ResearchCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+    stores: int = 0
+    tokens_saved: int = 0
+    refreshes_started: int = 0
+    refreshes_failed: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        lookups = self.hits + self.misses
+        data['hit_ratio'] = self.hits / lookups if lookups else 0.0
+        return data
+
+
+def event_tokens(event: Dict[str, Any]) -> int:
+    """Tokens an upstream run reported in its final event, if any"""
+    content = event.get('content')
+    for source in (content if isinstance(content, dict) else {}, event):
+        if source.get('total_tokens'):
+            return int(source['total_tokens'])
+        usage = source.get('token_usage')
+        if isinstance(usage, dict) and usage.get('total_tokens'):
+            return int(usage['total_tokens'])
+    return 0
+
+
+def insight_fields(kind: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    """Field name -> value of the insight carried by a ``complete`` event"""
+    content = event.get('content') or {}
+    insight = content.get(f'{kind}_insight') or {}
+    if isinstance(insight.get('company'), dict):
+        insight = insight['company']
+    return {
+        name: field_data.get('value') if isinstance(field_data, dict) else field_data
+        for name, field_data in insight.items()
+    }
+
+
+def merge_field_freshness(kind: str, event: Dict[str, Any], previous: Optional[Dict[str, Any]], checked_at: str) -> Dict[str, Dict[str, str]]:
+    """Per-field ``checked_at`` (last research run) and ``changed_at`` (last time the value differed)"""
+    fields = insight_fields(kind, event)
+    previous_fields = insight_fields(kind, previous) if previous else {}
+    previous_freshness = (previous or {}).get('field_freshness') or {}
+    freshness = {}
+    for name, value in fields.items():
+        changed_at = checked_at
+        if name in previous_fields and previous_fields[name] == value:
+            changed_at = previous_freshness.get(name, {}).get('changed_at', checked_at)
+        freshness[name] = {'checked_at': checked_at, 'changed_at': changed_at}
+    return freshness
+
+
+class ResearchCache:
+    """Shared cache of final research results, keyed by (entity, company/industry, language).
+
+    Upstream research runs take minutes and spend tokens, and colleagues often
+    research the same person or company. A hit replays the stored ``complete``
+    event instead of starting a new run. Results older than ``ttl_seconds`` but
+    within ``soft_ttl_seconds`` can be served stale while ``revalidate`` re-runs
+    the research on a background thread.
+    """
+
+    def __init__(self, ttl_seconds: float = RESEARCH_CACHE_TTL_SECONDS, soft_ttl_seconds: float = RESEARCH_CACHE_SOFT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.soft_ttl_seconds = max(soft_ttl_seconds, ttl_seconds)
+        self._stats = ResearchCacheStats()
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+
+    def get(self, kind: str, entity: str, context: Optional[str], language: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        The cached ``complete`` event, marked with ``cached``, ``cached_at`` and
+        ``stale``; None on a miss. Stale results are only returned with ``allow_stale``.
+        """
+        key = research_cache_key(kind, entity, context, language)
+        try:
+            cached = db.get_cached_research(key)
+        except Exception as e:
+            # A broken cache must never stop research from running
+            logger.error(f"Research cache lookup failed: {e}")
+            cached = None
+
+        stale = False
+        if cached is not None:
+            age = (datetime.now() - datetime.strptime(cached.created_at, db.SEARCH_DATE_FORMAT)).total_seconds()
+            stale = age > self.ttl_seconds
+            if stale and (not allow_stale or age > self.soft_ttl_seconds):
+                cached = None
+
+        with self._lock:
+            if cached is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            self._stats.stale_hits += stale
+            self._stats.tokens_saved += cached.total_tokens
+        try:
+            db.record_research_cache_hit(key)
+        except Exception as e:
+            # Only the hit count is lost; the cached result is still good
+            logger.warning(f"Could not record research cache hit: {e}")
+        logger.info(f"Research cache {'stale ' if stale else ''}hit for {kind} {entity!r}, saved {cached.total_tokens} tokens")
+        return dict(cached.event, cached=True, cached_at=cached.created_at, stale=stale)
+
+    def put(self, kind: str, entity: str, context: Optional[str], language: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a ``complete`` event and return it annotated with ``field_freshness``"""
+        key = research_cache_key(kind, entity, context, language)
+        checked_at = datetime.now().strftime(db.SEARCH_DATE_FORMAT)
+        try:
+            previous = db.get_cached_research(key, include_expired=True)
+            stored = dict(event, field_freshness=merge_field_freshness(
+                kind, event, previous.event if previous else None, checked_at
+            ))
+            db.save_cached_research(key, kind, stored, event_tokens(event), self.soft_ttl_seconds)
+        except Exception as e:
+            logger.error(f"Research cache store failed: {e}")
+            return event
+        with self._lock:
+            self._stats.stores += 1
+        return stored
+
+    def is_refreshing(self, kind: str, entity: str, context: Optional[str], language: str) -> bool:
+        with self._lock:
+            return research_cache_key(kind, entity, context, language) in self._refreshing
+
+    def revalidate(self, kind: str, entity: str, context: Optional[str], language: str,
+                   stream: Callable[[], Iterable[Dict[str, Any]]]) -> bool:
+        """
+        Re-run ``stream()`` on a background thread and cache its ``complete``
+        event. At most one refresh per key runs at a time; returns False if one
+        already is.
+        """
+        key = research_cache_key(kind, entity, context, language)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._stats.refreshes_started += 1
+
+        def refresh() -> None:
+            completed = False
+            try:
+                for event in stream():
+                    if event.get('type') == 'complete' and event.get('content'):
+                        self.put(kind, entity, context, language, event)
+                        completed = True
+                        break
+                    if event.get('type') == 'error':
+                        raise RuntimeError(event.get('content'))
+            except Exception as e:
+                logger.error(f"Background refresh of {kind} {entity!r} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+                    self._stats.refreshes_failed += not completed
+            if completed:
+                logger.info(f"Background refresh of {kind} {entity!r} completed")
+
+        threading.Thread(target=refresh, name="insight-research-refresh", daemon=True).start()
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            data = self._stats.as_dict()
+            data['refreshing'] = len(self._refreshing)
+            return data
+
+
+_cache = ResearchCache()
+
+
+def get_research_cache() -> Optional[ResearchCache]:
+    """Process-wide research cache, or None when disabled with INSIGHT_RESEARCH_CACHE=0"""
+    return _cache if RESEARCH_CACHE_ENABLED else None
+
+
+def get_research_cache_stats() -> Dict[str, float]:
+    return _cache.stats()
@@ -1,128 +1,303 @@
-import sqlite3
-from datetime import datetime
-from typing import List, Optional
+import base64
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from insight_tracker.api.models.responses import ProfessionalProfile, Company
-def init_db():
-    """Initialize the SQLite database and create the users table"""
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            full_name TEXT,
-            email TEXT UNIQUE,
-            company TEXT,
-            role TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-def init_recent_searches_db():
-    """Initialize the recent searches database"""
-    conn = sqlite3.connect('recent_searches.db')
-    c = conn.cursor()
-    
-    # Create profile_searches table matching ProfessionalProfile model
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS profile_searches (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_email TEXT,
-            full_name TEXT NOT NULL,
-            current_company TEXT,
-            current_company_url TEXT,
-            current_job_title TEXT,
-            current_company TEXT,
-            current_company_url TEXT,
-            professional_background TEXT,
-            past_jobs TEXT,
-            key_achievements TEXT,
-            contact TEXT,
-            linkedin_url TEXT,
-            search_date TIMESTAMP
-        )
-    ''')
-    
-    # Create company_searches table matching Company model
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS company_searches (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_email TEXT,
-            company_name TEXT NOT NULL,
-            company_website TEXT,
-            company_linkedin TEXT,
-            company_summary TEXT,
-            company_industry TEXT,
-            company_size TEXT,
-            company_services TEXT,
-            company_industries TEXT,
-            company_awards_recognitions TEXT,
-            company_clients_partners TEXT,
-            company_founded_year INTEGER,
-            company_headquarters TEXT,
-            company_culture TEXT,
-            company_recent_updates TEXT,
-            search_date TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-def save_profile_search(user_email: str, profile: ProfessionalProfile) -> None:
-    """Save profile search to database"""
-    conn = sqlite3.connect('recent_searches.db')
-    cursor = conn.cursor()
-    
-    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
+from insight_tracker.storage.connection import connection
+from concurrent.futures import ThreadPoolExecutor
+from insight_tracker.storage.migrations import ensure_schema
+from insight_tracker.storage.sharding import get_router
+from insight_tracker.storage.writer import get_writer
+from insight_tracker.storage.dedupe import company_content_hash, profile_content_hash
+from insight_tracker.storage.facets import FACET_FIELDS, company_facets, decode_list, encode_list, facet_key
+from insight_tracker.storage.payloads import decode_payload, encode_payload
+from insight_tracker.storage.lookup_cache import register_lookup_cache
+
+SEARCH_DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Testing the payload for NULL reads only the record header, never the blob
+ENTRY_COLUMNS = "id, last_seen, first_seen, hit_count, payload IS NOT NULL"
+
+# Control characters around search matches; unlike brackets they never occur in saved research
+SNIPPET_START, SNIPPET_END = '\x02', '\x03'
+
+# Read on every Streamlit rerun; invalidated by the functions that write them
+_user_cache = register_lookup_cache('users')
+_user_company_cache = register_lookup_cache('user_companies')
+
+RESEARCH_TABLES = {
+    'profile': 'profile_searches',
+    'company': 'company_searches',
+}
+
+LEAD_STATUSES = ('pending', 'researched', 'skipped')
+USAGE_ROLLUP_TABLES = {
+    'hourly': 'api_usage_hourly',
+    'daily': 'api_usage_daily',
+}
+# Leads inserted per transaction by import_leads
+LEAD_INSERT_BATCH_SIZE = 20000
+
+PROFILE_COLUMNS = '''
+    full_name, current_job_title, current_company, current_company_url, professional_background,
+    past_jobs, key_achievements, contact, linkedin_url
+'''
+
+COMPANY_COLUMNS = '''
+    company_name, company_website, company_linkedin, company_summary,
+    company_industry, company_size, company_services, company_industries,
+    company_awards_recognitions, company_clients_partners,
+    company_founded_year, company_headquarters, company_culture,
+    company_recent_updates
+'''
+
+@dataclass
+class HistoryEntry:
+    """A saved search together with the keys used to page past it"""
+    id: int
+    last_seen: str
+    record: Union[ProfessionalProfile, Company]
+    first_seen: Optional[str] = None
+    hit_count: int = 1
+    has_payload: bool = False
+
+@dataclass
+class HistoryPage:
+    entries: List[HistoryEntry]
+    next_cursor: Optional[str] = None
+
+@dataclass
+class HistoryHit:
+    """A full-text match in saved research; ``snippet`` wraps matches in SNIPPET_START and SNIPPET_END"""
+    kind: str
+    id: int
+    title: str
+    snippet: str
+    search_date: str
+    score: float
+
+@dataclass
+class HistorySearchResults:
+    hits: List[HistoryHit]
+    next_cursor: Optional[str] = None
+
+@dataclass
+class Lead:
+    """A person queued for research"""
+    id: int
+    full_name: str
+    company: str
+    status: str
+    imported_at: str
+    researched_at: Optional[str] = None
+
+@dataclass
+class UserStats:
+    """Dashboard counters maintained by triggers; searches count repeat research, saved_* distinct rows"""
+    user_email: str
+    profile_searches: int = 0
+    company_searches: int = 0
+    saved_profiles: int = 0
+    saved_companies: int = 0
+    last_activity: Optional[str] = None
+    top_industries: List[Tuple[str, int]] = field(default_factory=list)
+
+@dataclass
+class UsageBucket:
+    """API usage of one endpoint in one hour or day"""
+    bucket: str
+    endpoint: str
+    calls: int
+    cache_hits: int
+    errors: int
+    total_tokens: int
+    avg_latency_ms: float
+
+@dataclass
+class CachedResearch:
+    """The final event of an earlier research run, replayed instead of a new one"""
+    event: dict
+    total_tokens: int
+    created_at: str
+    expires_at: str
+
+def _connect(user_email: Optional[str]):
+    """Pooled connection to the database holding ``user_email``'s data (the
+    global database for None), migrated on first use"""
+    db_path = get_router().path_for(user_email)
+    ensure_schema(db_path)
+    return connection(db_path)
+
+def _encode_cursor(last_seen: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{last_seen}|{row_id}".encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
     try:
-        cursor.execute("""
-            INSERT INTO profile_searches 
-            (user_email, full_name, current_job_title, current_company, current_company_url, professional_background, past_jobs, key_achievements, contact, linkedin_url, search_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user_email,
-            profile.full_name,
-            profile.current_job_title,
-            profile.current_company,
-            profile.current_company_url,
-            profile.professional_background,
-            profile.past_jobs,
-            profile.key_achievements,
-            profile.contact,
-            profile.linkedin_url,
-            current_time
-        ))
-        conn.commit()
-    except Exception as e:
-        print(f"Error saving profile search: {e}")
-        raise
-    finally:
-        conn.close()
-
-def save_company_search(user_email: str, company: Company) -> None:
-    """Save company search to database"""
-    conn = sqlite3.connect('recent_searches.db')
-    c = conn.cursor()
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
-    
-    # Convert lists to strings for storage
-    company_services = ','.join(company.company_services) if company.company_services else None
-    company_industries = ','.join(company.company_industries) if company.company_industries else None
-    company_awards = ','.join(company.company_awards_recognitions) if company.company_awards_recognitions else None
-    company_clients = ','.join(company.company_clients_partners) if company.company_clients_partners else None
-    company_culture = ','.join(company.company_culture) if company.company_culture else None
-    company_updates = ','.join(company.company_recent_updates) if company.company_recent_updates else None
-    
-    c.execute('''
+        last_seen, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        return last_seen, int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid history cursor: {cursor!r}") from e
+
+def _row_to_profile(row) -> ProfessionalProfile:
+    return ProfessionalProfile(
+        full_name=row[0],
+        current_job_title=row[1],
+        current_company=row[2],
+        current_company_url=row[3],
+        professional_background=row[4],
+        past_jobs=row[5],
+        key_achievements=row[6],
+        contact=row[7],
+        linkedin_url=row[8]
+    )
+
+def _row_to_company(row) -> Company:
+    return Company(
+        company_name=row[0],
+        company_website=row[1],
+        company_linkedin=row[2],
+        company_summary=row[3],
+        company_industry=row[4],
+        company_size=row[5],
+        company_services=decode_list(row[6]),
+        company_industries=decode_list(row[7]),
+        company_awards_recognitions=decode_list(row[8]),
+        company_clients_partners=decode_list(row[9]),
+        company_founded_year=row[10],
+        company_headquarters=row[11],
+        company_culture=decode_list(row[12]),
+        company_recent_updates=decode_list(row[13])
+    )
+
+def _row_to_entry(row, to_record) -> HistoryEntry:
+    """Build a HistoryEntry from ``ENTRY_COLUMNS, <record columns>``"""
+    return HistoryEntry(
+        id=row[0],
+        last_seen=row[1],
+        first_seen=row[2],
+        hit_count=row[3],
+        has_payload=bool(row[4]),
+        record=to_record(row[5:])
+    )
+
+def _history_page(table: str, columns: str, to_record, user_email: str, limit: int, after: Optional[str]) -> HistoryPage:
+    """Keyset-paginate ``table`` newest first using the (user_email, last_seen, id) index"""
+    query = f"SELECT {ENTRY_COLUMNS}, {columns} FROM {table} WHERE user_email = ?"
+    params: list = [user_email]
+    if after:
+        last_seen, row_id = _decode_cursor(after)
+        query += " AND (last_seen, id) < (?, ?)"
+        params += [last_seen, row_id]
+    query += " ORDER BY last_seen DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    with _connect(user_email) as conn:
+        rows = conn.execute(query, params).fetchall()
+
+    entries = [_row_to_entry(row, to_record) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = entries[-1]
+        next_cursor = _encode_cursor(last.last_seen, last.id)
+    return HistoryPage(entries=entries, next_cursor=next_cursor)
+
+def _submit_write(write, description: str, user_email: Optional[str]) -> None:
+    """Hand a write to the background writer; it is committed with the next batch
+    on the database that holds ``user_email``'s data (the global one for None)"""
+    db_path = get_router().path_for(user_email)
+    ensure_schema(db_path)
+    get_writer().submit(db_path, write, description)
+
+def flush_pending_writes(timeout: Optional[float] = 5.0) -> bool:
+    """Block until queued search saves are committed, e.g. before reading them back"""
+    return get_writer().flush(timeout)
+
+def _upsert_profile_search(conn, user_email: str, profile: ProfessionalProfile, current_time: str,
+                           payload: Tuple[Optional[bytes], Optional[str]] = (None, None)) -> int:
+    """Insert a profile search, or refresh the existing row for the same person and bump its hit count"""
+    payload_blob, payload_codec = payload
+    return conn.execute("""
+        INSERT INTO profile_searches
+        (user_email, full_name, current_job_title, current_company, current_company_url, professional_background, past_jobs, key_achievements, contact, linkedin_url,
+         content_hash, first_seen, last_seen, payload_codec, payload)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_email, content_hash) DO UPDATE SET
+            full_name=excluded.full_name,
+            current_job_title=excluded.current_job_title,
+            current_company=excluded.current_company,
+            current_company_url=excluded.current_company_url,
+            professional_background=excluded.professional_background,
+            past_jobs=excluded.past_jobs,
+            key_achievements=excluded.key_achievements,
+            contact=excluded.contact,
+            linkedin_url=excluded.linkedin_url,
+            last_seen=excluded.last_seen,
+            -- A save without a payload keeps the one already stored
+            payload_codec=CASE WHEN excluded.payload IS NULL THEN payload_codec ELSE excluded.payload_codec END,
+            payload=CASE WHEN excluded.payload IS NULL THEN payload ELSE excluded.payload END,
+            hit_count=hit_count + 1
+        RETURNING id
+    """, (
+        user_email,
+        profile.full_name,
+        profile.current_job_title,
+        profile.current_company,
+        profile.current_company_url,
+        profile.professional_background,
+        profile.past_jobs,
+        profile.key_achievements,
+        profile.contact,
+        profile.linkedin_url,
+        profile_content_hash(profile.full_name, profile.current_company),
+        current_time,
+        current_time,
+        payload_codec,
+        payload_blob
+    )).fetchone()[0]
+
+def _upsert_company_search(conn, user_email: str, company: Company, current_time: str,
+                           payload: Tuple[Optional[bytes], Optional[str]] = (None, None)) -> int:
+    """Insert a company search, or refresh the existing row for the same company and bump its hit count"""
+    payload_blob, payload_codec = payload
+    # Store lists as JSON so values containing commas survive the round trip
+    company_services = encode_list(company.company_services)
+    company_industries = encode_list(company.company_industries)
+    company_awards = encode_list(company.company_awards_recognitions)
+    company_clients = encode_list(company.company_clients_partners)
+    company_culture = encode_list(company.company_culture)
+    company_updates = encode_list(company.company_recent_updates)
+
+    search_id = conn.execute('''
         INSERT INTO company_searches (
             user_email, company_name, company_website, company_linkedin,
             company_summary, company_industry, company_size,
             company_services, company_industries, company_awards_recognitions,
             company_clients_partners, company_founded_year, company_headquarters,
-            company_culture, company_recent_updates, search_date
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            company_culture, company_recent_updates,
+            content_hash, first_seen, last_seen, payload_codec, payload
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_email, content_hash) DO UPDATE SET
+            company_name=excluded.company_name,
+            company_website=excluded.company_website,
+            company_linkedin=excluded.company_linkedin,
+            company_summary=excluded.company_summary,
+            company_industry=excluded.company_industry,
+            company_size=excluded.company_size,
+            company_services=excluded.company_services,
+            company_industries=excluded.company_industries,
+            company_awards_recognitions=excluded.company_awards_recognitions,
+            company_clients_partners=excluded.company_clients_partners,
+            company_founded_year=excluded.company_founded_year,
+            company_headquarters=excluded.company_headquarters,
+            company_culture=excluded.company_culture,
+            company_recent_updates=excluded.company_recent_updates,
+            last_seen=excluded.last_seen,
+            -- A save without a payload keeps the one already stored
+            payload_codec=CASE WHEN excluded.payload IS NULL THEN payload_codec ELSE excluded.payload_codec END,
+            payload=CASE WHEN excluded.payload IS NULL THEN payload ELSE excluded.payload END,
+            hit_count=hit_count + 1
+        RETURNING id
     ''', (
         user_email,
         company.company_name,
@@ -139,287 +314,524 @@ def save_company_search(user_email: str, company: Company) -> None:
         company.company_headquarters,
         company_culture,
         company_updates,
-        current_time
-    ))
-    
-    conn.commit()
-    conn.close()
+        company_content_hash(company.company_name),
+        current_time,
+        current_time,
+        payload_codec,
+        payload_blob
+    )).fetchone()[0]
+    # Re-index facets from the latest research for this company
+    conn.execute("DELETE FROM company_search_facets WHERE search_id = ?", (search_id,))
+    conn.executemany('''
+        INSERT OR IGNORE INTO company_search_facets (user_email, facet, value_key, search_id, value)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [
+        (user_email, facet, key, search_id, value)
+        for facet, value, key in company_facets(vars(company))
+    ])
+    return search_id
+
+def _encode_research(payload: Optional[dict]) -> Tuple[Optional[bytes], Optional[str]]:
+    # Compressed on the caller's thread so the queued write holds no reference
+    # to session state that may change before the writer gets to it
+    return encode_payload(payload) if payload is not None else (None, None)
+
+def save_profile_search(user_email: str, profile: ProfessionalProfile, payload: Optional[dict] = None) -> None:
+    """
+    Queue a profile search for saving. ``payload`` is the full streamed result
+    (verification, sources, trust evaluation), stored compressed and read back
+    with get_research_payload. Returns immediately; failures are logged by the writer.
+    """
+    current_time = datetime.now().strftime(SEARCH_DATE_FORMAT)
+    encoded = _encode_research(payload)
+    _submit_write(
+        lambda conn: _upsert_profile_search(conn, user_email, profile, current_time, encoded),
+        f"profile search for {profile.full_name}",
+        user_email
+    )
+
+def save_company_search(user_email: str, company: Company, payload: Optional[dict] = None) -> None:
+    """Queue a company search for saving, with its optional full streamed result (see save_profile_search)"""
+    current_time = datetime.now().strftime(SEARCH_DATE_FORMAT)
+    encoded = _encode_research(payload)
+    _submit_write(
+        lambda conn: _upsert_company_search(conn, user_email, company, current_time, encoded),
+        f"company search for {company.company_name}",
+        user_email
+    )
+
+def get_research_payload(user_email: str, kind: str, search_id: int) -> Optional[dict]:
+    """Decompress the full research saved with a history entry; None if it has none"""
+    if kind not in RESEARCH_TABLES:
+        raise ValueError(f"Unknown research kind: {kind}")
+    with _connect(user_email) as conn:
+        row = conn.execute(
+            f"SELECT payload, payload_codec FROM {RESEARCH_TABLES[kind]} WHERE id = ? AND user_email = ?",
+            (search_id, user_email)
+        ).fetchone()
+    if row is None:
+        return None
+    return decode_payload(row[0], row[1])
+
+def get_profile_search_page(user_email: str, limit: int = 20, after: Optional[str] = None) -> HistoryPage:
+    """Get one page of profile searches, newest first. Pass ``next_cursor`` as ``after`` for the next page."""
+    return _history_page('profile_searches', PROFILE_COLUMNS, _row_to_profile, user_email, limit, after)
+
+def get_company_search_page(user_email: str, limit: int = 20, after: Optional[str] = None) -> HistoryPage:
+    """Get one page of company searches, newest first. Pass ``next_cursor`` as ``after`` for the next page."""
+    return _history_page('company_searches', COMPANY_COLUMNS, _row_to_company, user_email, limit, after)
+
+def iter_history_chunks(user_email: str, kind: str, chunk_size: int = 1000) -> Iterator[List[HistoryEntry]]:
+    """
+    Yield a user's entire saved research of ``kind`` newest first, ``chunk_size``
+    entries at a time. Each chunk is its own short keyset query, so no read
+    transaction or pooled connection is held between chunks.
+    """
+    fetch_page = {'profile': get_profile_search_page, 'company': get_company_search_page}.get(kind)
+    if fetch_page is None:
+        raise ValueError(f"Unknown research kind: {kind}")
+    after = None
+    while True:
+        page = fetch_page(user_email, limit=chunk_size, after=after)
+        if page.entries:
+            yield page.entries
+        if not page.next_cursor:
+            return
+        after = page.next_cursor
 
 def get_recent_profile_searches(user_email: str, limit: int = 5) -> List[ProfessionalProfile]:
     """Get recent profile searches from database"""
-    conn = sqlite3.connect('recent_searches.db')
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT full_name, current_job_title, current_company, current_company_url, professional_background,
-               past_jobs, key_achievements, contact, linkedin_url
-        FROM profile_searches
-        WHERE user_email = ?
-        ORDER BY search_date DESC
-        LIMIT ?
-    ''', (user_email, limit))
-    
-    searches = c.fetchall()
-    conn.close()
-    
-    return [
-        ProfessionalProfile(
-            full_name=row[0],
-            current_job_title=row[1],
-            current_company=row[2],
-            current_company_url=row[3],
-            professional_background=row[4],
-            past_jobs=row[5],
-            key_achievements=row[6],
-            contact=row[7],
-            linkedin_url=row[6]
-        )
-        for row in searches
-    ]
+    return [entry.record for entry in get_profile_search_page(user_email, limit).entries]
 
 def get_recent_company_searches(user_email: str, limit: int = 5) -> List[Company]:
     """Get recent company searches from database"""
-    conn = sqlite3.connect('recent_searches.db')
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT company_name, company_website, company_linkedin, company_summary,
-               company_industry, company_size, company_services, company_industries,
-               company_awards_recognitions, company_clients_partners,
-               company_founded_year, company_headquarters, company_culture,
-               company_recent_updates
-        FROM company_searches
-        WHERE user_email = ?
-        ORDER BY search_date DESC
-        LIMIT ?
-    ''', (user_email, limit))
-    
-    searches = c.fetchall()
-    conn.close()
-    
-    return [
-        Company(
-            company_name=row[0],
-            company_website=row[1],
-            company_linkedin=row[2],
-            company_summary=row[3],
-            company_industry=row[4],
-            company_size=row[5],
-            company_services=row[6].split(',') if row[6] else None,
-            company_industries=row[7].split(',') if row[7] else None,
-            company_awards_recognitions=row[8].split(',') if row[8] else None,
-            company_clients_partners=row[9].split(',') if row[9] else None,
-            company_founded_year=row[10],
-            company_headquarters=row[11],
-            company_culture=row[12].split(',') if row[12] else None,
-            company_recent_updates=row[13].split(',') if row[13] else None
-        )
-        for row in searches
+    return [entry.record for entry in get_company_search_page(user_email, limit).entries]
+
+def find_companies_by_facets(user_email: str, facets: Dict[str, str], limit: int = 50) -> List[HistoryEntry]:
+    """
+    Find saved company searches matching every facet, e.g.
+    ``{'industry': 'Fintech', 'service': 'Payments'}``. Each facet is an
+    index seek on company_search_facets; the matches are intersected in SQL.
+    """
+    if not facets:
+        return []
+    unknown = set(facets) - set(FACET_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown facets: {', '.join(sorted(unknown))}")
+
+    facet_query = " INTERSECT ".join(
+        "SELECT search_id FROM company_search_facets WHERE user_email = ? AND facet = ? AND value_key = ?"
+        for _ in facets
+    )
+    params: list = []
+    for facet, value in facets.items():
+        params += [user_email, facet, facet_key(value)]
+    params.append(limit)
+
+    with _connect(user_email) as conn:
+        rows = conn.execute(f'''
+            SELECT {ENTRY_COLUMNS}, {COMPANY_COLUMNS}
+            FROM company_searches
+            WHERE id IN ({facet_query})
+            ORDER BY last_seen DESC, id DESC
+            LIMIT ?
+        ''', params).fetchall()
+
+    return [_row_to_entry(row, _row_to_company) for row in rows]
+
+def get_facet_values(user_email: str, facet: str, limit: int = 50) -> List[Tuple[str, int]]:
+    """Most common values of ``facet`` across a user's saved companies, with counts"""
+    if facet not in FACET_FIELDS:
+        raise ValueError(f"Unknown facet: {facet}")
+    with _connect(user_email) as conn:
+        return conn.execute('''
+            SELECT MIN(value), COUNT(*) AS companies
+            FROM company_search_facets
+            WHERE user_email = ? AND facet = ?
+            GROUP BY value_key
+            ORDER BY companies DESC, value_key
+            LIMIT ?
+        ''', (user_email, facet, limit)).fetchall()
+
+def _fts_query(user_email: str, query: str) -> Optional[str]:
+    """Turn free text into an FTS5 expression scoped to one user's rows"""
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    # Quote every term so user input can never inject FTS operators; prefix-match the last one
+    match = ' '.join(f'"{term}"' for term in terms) + '*'
+    owner = 'u' + user_email.encode('utf-8').hex()
+    return f'owner : "{owner}" AND ({match})'
+
+def search_history(user_email: str, query: str, limit: int = 20, cursor: Optional[str] = None) -> HistorySearchResults:
+    """
+    Rank a user's saved profile and company research by relevance to
+    ``query``. The cursor is keyed on the last hit's rank and row, so a page
+    skips no earlier matches; research saved between pages can still shift
+    the ranks of later ones.
+    """
+    match = _fts_query(user_email, query)
+    if match is None:
+        return HistorySearchResults(hits=[])
+    after_rank, after_rowid = float('-inf'), -1
+    if cursor:
+        try:
+            rank, after_rowid = _decode_cursor(cursor)
+            after_rank = float(rank)
+        except ValueError as e:
+            raise ValueError("Invalid search cursor") from e
+
+    with _connect(user_email) as conn:
+        rows = conn.execute('''
+            SELECT rowid, kind, title, snippet(search_history_fts, 1, ?, ?, '…', 12), search_date, rank
+            FROM search_history_fts
+            WHERE search_history_fts MATCH ?
+              AND (rank > ? OR (rank = ? AND rowid > ?))
+            ORDER BY rank, rowid
+            LIMIT ?
+        ''', (SNIPPET_START, SNIPPET_END, match, after_rank, after_rank, after_rowid, limit + 1)).fetchall()
+
+    hits = [
+        HistoryHit(kind=row[1], id=row[0] // 2, title=row[2], snippet=row[3], search_date=row[4], score=-row[5])
+        for row in rows[:limit]
     ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor(repr(last[5]), last[0])
+    return HistorySearchResults(hits=hits, next_cursor=next_cursor)
+
+# Research cache
+def get_cached_research(cache_key: str, include_expired: bool = False) -> Optional[CachedResearch]:
+    """Cached research for ``cache_key``, or None. Expired entries not yet purged
+    are only returned with ``include_expired``."""
+    now = datetime.now().strftime(SEARCH_DATE_FORMAT)
+    with _connect(None) as conn:
+        row = conn.execute('''
+            SELECT payload, payload_codec, total_tokens, created_at, expires_at
+            FROM research_cache
+            WHERE cache_key = ? AND (expires_at > ? OR ?)
+        ''', (cache_key, now, include_expired)).fetchone()
+    if row is None:
+        return None
+    return CachedResearch(
+        event=decode_payload(row[0], row[1]),
+        total_tokens=row[2],
+        created_at=row[3],
+        expires_at=row[4]
+    )
+
+def save_cached_research(cache_key: str, kind: str, event: dict, total_tokens: int, ttl_seconds: float) -> None:
+    """Queue ``event`` as the cached result for ``cache_key``, replacing any older one"""
+    created = datetime.now()
+    created_at = created.strftime(SEARCH_DATE_FORMAT)
+    expires_at = (created + timedelta(seconds=ttl_seconds)).strftime(SEARCH_DATE_FORMAT)
+    payload_blob, payload_codec = encode_payload(event)
+    _submit_write(
+        lambda conn: conn.execute('''
+            INSERT INTO research_cache (cache_key, kind, total_tokens, created_at, expires_at, payload_codec, payload)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                kind=excluded.kind,
+                total_tokens=excluded.total_tokens,
+                created_at=excluded.created_at,
+                expires_at=excluded.expires_at,
+                hit_count=0,
+                payload_codec=excluded.payload_codec,
+                payload=excluded.payload
+        ''', (cache_key, kind, total_tokens, created_at, expires_at, payload_codec, payload_blob)),
+        f"{kind} research cache entry",
+        None
+    )
+
+def record_research_cache_hit(cache_key: str) -> None:
+    _submit_write(
+        lambda conn: conn.execute(
+            "UPDATE research_cache SET hit_count = hit_count + 1 WHERE cache_key = ?", (cache_key,)
+        ),
+        "research cache hit",
+        None
+    )
+
+# Dashboard stats
+def get_user_stats(user_email: str, top_industries: int = 5) -> UserStats:
+    """
+    Read the user's precomputed statistics: a primary-key lookup plus a range
+    scan over their industry counters, never an aggregate over saved research.
+    """
+    with _connect(user_email) as conn:
+        row = conn.execute('''
+            SELECT profile_searches, company_searches, saved_profiles, saved_companies, last_activity
+            FROM user_stats
+            WHERE user_email = ?
+        ''', (user_email,)).fetchone()
+        industries = conn.execute('''
+            SELECT value, companies FROM user_industry_stats
+            WHERE user_email = ?
+            ORDER BY companies DESC, value_key
+            LIMIT ?
+        ''', (user_email, top_industries)).fetchall() if row else []
+    if row is None:
+        return UserStats(user_email=user_email)
+    return UserStats(user_email, *row, top_industries=industries)
+
+# API usage ledger
+def record_api_usage(user_email: str, endpoint: str, entity: Optional[str], total_tokens: int,
+                     latency_ms: float, cache_hit: bool = False, error: bool = False) -> None:
+    """Queue a ledger row for one API call; a trigger adds it to the hourly and daily rollups"""
+    created_at = datetime.now().strftime(SEARCH_DATE_FORMAT)
+    _submit_write(
+        lambda conn: conn.execute('''
+            INSERT INTO api_usage (user_email, endpoint, entity, total_tokens, latency_ms, cache_hit, error, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (user_email, endpoint, entity, int(total_tokens or 0), latency_ms, int(cache_hit), int(error), created_at)),
+        f"{endpoint} usage",
+        user_email
+    )
+
+def get_usage_rollup(user_email: str, granularity: str = 'daily', since: Optional[datetime] = None) -> List[UsageBucket]:
+    """Pre-aggregated usage per endpoint, oldest bucket first. ``since`` is inclusive."""
+    table = USAGE_ROLLUP_TABLES.get(granularity)
+    if table is None:
+        raise ValueError(f"Unknown usage granularity: {granularity}")
+    # Buckets are prefixes of SEARCH_DATE_FORMAT timestamps, so they compare as text
+    start = since.strftime('%Y-%m-%d %H:00' if granularity == 'hourly' else '%Y-%m-%d') if since else ''
+    with _connect(user_email) as conn:
+        rows = conn.execute(f'''
+            SELECT bucket, endpoint, calls, cache_hits, errors, total_tokens, latency_ms / calls
+            FROM {table}
+            WHERE user_email = ? AND bucket >= ?
+            ORDER BY bucket, endpoint
+        ''', (user_email, start)).fetchall()
+    return [UsageBucket(*row) for row in rows]
+
+# Lead queue
+def import_leads(user_email: str, leads: Iterable[Tuple[str, str]], source: Optional[str] = None,
+                 batch_size: int = LEAD_INSERT_BATCH_SIZE) -> int:
+    """
+    Add ``(full_name, company)`` pairs to the user's lead queue, ``batch_size``
+    rows per transaction. Leads already queued under the same normalized name
+    and company are skipped. Returns the number of leads inserted.
+    """
+    imported_at = datetime.now().strftime(SEARCH_DATE_FORMAT)
+    inserted = 0
+    batch = []
+
+    def insert_batch() -> int:
+        with _connect(user_email) as conn:
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT INTO leads (user_email, full_name, company, lead_key, source, imported_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_email, lead_key) DO NOTHING
+            ''', batch)
+            return conn.total_changes - before
+
+    for full_name, company in leads:
+        batch.append((user_email, full_name, company, profile_content_hash(full_name, company), source, imported_at))
+        if len(batch) >= batch_size:
+            inserted += insert_batch()
+            batch = []
+    if batch:
+        inserted += insert_batch()
+    return inserted
+
+def get_pending_leads(user_email: str, limit: int = 20) -> List[Lead]:
+    """Oldest queued leads first"""
+    with _connect(user_email) as conn:
+        rows = conn.execute('''
+            SELECT id, full_name, company, status, imported_at, researched_at
+            FROM leads
+            WHERE user_email = ? AND status = 'pending'
+            ORDER BY id
+            LIMIT ?
+        ''', (user_email, limit)).fetchall()
+    return [Lead(*row) for row in rows]
+
+def get_lead_counts(user_email: str) -> Dict[str, int]:
+    with _connect(user_email) as conn:
+        rows = conn.execute(
+            "SELECT status, COUNT(*) FROM leads WHERE user_email = ? GROUP BY status", (user_email,)
+        ).fetchall()
+    return dict(rows)
+
+def update_lead_status(user_email: str, lead_id: int, status: str) -> None:
+    if status not in LEAD_STATUSES:
+        raise ValueError(f"Unknown lead status: {status}")
+    researched_at = None if status == 'pending' else datetime.now().strftime(SEARCH_DATE_FORMAT)
+    with _connect(user_email) as conn:
+        conn.execute(
+            "UPDATE leads SET status = ?, researched_at = ? WHERE id = ? AND user_email = ?",
+            (status, researched_at, lead_id, user_email)
+        )
 
 # User management functions remain unchanged
 def save_user_info(full_name: str, email: str, company: str, role: str) -> None:
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO users (full_name, email, company, role)
-        VALUES (?, ?, ?, ?)
-    ''', (full_name, email, company, role))
-    conn.commit()
-    conn.close()
+    with _connect(email) as conn:
+        conn.execute('''
+            INSERT INTO users (full_name, email, company, role)
+            VALUES (?, ?, ?, ?)
+        ''', (full_name, email, company, role))
+    _user_cache.invalidate(email)
+
+def _load_user(email: str) -> Optional[tuple]:
+    with _connect(email) as conn:
+        return conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
 
 def getUserByEmail(email: str) -> Optional[tuple]:
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('SELECT * FROM users WHERE email = ?', (email,))
-    user = c.fetchone()
-    conn.close()
-    return user
+    return _user_cache.get_or_load(email, lambda: _load_user(email))
 
 def update_user_info(company: str, role: str, email: str) -> None:
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''
-        UPDATE users
-        SET company = ?, role = ?
-        WHERE email = ?
-    ''', (company, role, email))
-    conn.commit()
-    conn.close()
+    with _connect(email) as conn:
+        conn.execute('''
+            UPDATE users
+            SET company = ?, role = ?
+            WHERE email = ?
+        ''', (company, role, email))
+    _user_cache.invalidate(email)
 
 def create_user_if_not_exists(full_name, email, company="", role=""):
     """
     Creates a user if they don't exist.
     Returns: (bool, bool) - (success, is_new_user)
     """
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
     try:
-        # Check if user exists
-        c.execute('SELECT * FROM users WHERE email = ?', (email,))
-        existing_user = c.fetchone()
-        
-        if existing_user:
-            return True, False  # User exists, not new
-        
-        # Create new user
-        c.execute('''
-            INSERT INTO users (name, email, role, company)
-            VALUES (?, ?, ?, ?)
-        ''', (full_name, email, role, company))
-        conn.commit()
+        with _connect(email) as conn:
+            # Check if user exists
+            existing_user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+
+            if existing_user:
+                return True, False  # User exists, not new
+
+            # Create new user
+            conn.execute('''
+                INSERT INTO users (full_name, email, role, company)
+                VALUES (?, ?, ?, ?)
+            ''', (full_name, email, role, company))
+        _user_cache.invalidate(email)
         return True, True  # User created, is new
     except Exception as e:
         print(f"Error creating user: {e}")
         return False, False
-    finally:
-        conn.close()
-
-def alter_profile_searches_table():
-    conn = sqlite3.connect('recent_searches.db')
-    c = conn.cursor()
-    
-    # Add the new columns
-    c.execute('ALTER TABLE profile_searches ADD COLUMN current_company TEXT')
-    c.execute('ALTER TABLE profile_searches ADD COLUMN current_company_url TEXT')
-    
-    conn.commit()
-    conn.close()
-
-def init_user_company_db():
-    """Initialize the SQLite database for user company information"""
-    conn = sqlite3.connect('user_company_data.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS user_companies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_email TEXT UNIQUE,
-            company_name TEXT,
-            company_website TEXT,
-            company_linkedin TEXT,
-            company_summary TEXT,
-            company_industry TEXT,
-            company_size TEXT,
-            company_services TEXT,
-            company_industries TEXT,
-            company_awards_recognitions TEXT,
-            company_clients_partners TEXT,
-            company_founded_year INTEGER,
-            company_headquarters TEXT,
-            company_culture TEXT,
-            company_recent_updates TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
 
 def save_user_company_info(user_email: str, company: Company) -> None:
     """Save user company information to the database"""
-    conn = sqlite3.connect('user_company_data.db')
-    c = conn.cursor()
-    
-    # Convert lists to strings for storage
-    company_services = ','.join(company.company_services) if company.company_services else None
-    company_industries = ','.join(company.company_industries) if company.company_industries else None
-    company_awards = ','.join(company.company_awards_recognitions) if company.company_awards_recognitions else None
-    company_clients = ','.join(company.company_clients_partners) if company.company_clients_partners else None
-    company_culture = ','.join(company.company_culture) if company.company_culture else None
-    company_updates = ','.join(company.company_recent_updates) if company.company_recent_updates else None
-    
+    # Store lists as JSON so values containing commas survive the round trip
+    company_services = encode_list(company.company_services)
+    company_industries = encode_list(company.company_industries)
+    company_awards = encode_list(company.company_awards_recognitions)
+    company_clients = encode_list(company.company_clients_partners)
+    company_culture = encode_list(company.company_culture)
+    company_updates = encode_list(company.company_recent_updates)
+
     try:
-        c.execute('''
-            INSERT INTO user_companies (
-                user_email, company_name, company_website, company_linkedin,
-                company_summary, company_industry, company_size,
-                company_services, company_industries, company_awards_recognitions,
-                company_clients_partners, company_founded_year, company_headquarters,
-                company_culture, company_recent_updates
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(user_email) DO UPDATE SET
-                company_name=excluded.company_name,
-                company_website=excluded.company_website,
-                company_linkedin=excluded.company_linkedin,
-                company_summary=excluded.company_summary,
-                company_industry=excluded.company_industry,
-                company_size=excluded.company_size,
-                company_services=excluded.company_services,
-                company_industries=excluded.company_industries,
-                company_awards_recognitions=excluded.company_awards_recognitions,
-                company_clients_partners=excluded.company_clients_partners,
-                company_founded_year=excluded.company_founded_year,
-                company_headquarters=excluded.company_headquarters,
-                company_culture=excluded.company_culture,
-                company_recent_updates=excluded.company_recent_updates
-        ''', (
-            user_email,
-            company.company_name,
-            company.company_website,
-            company.company_linkedin,
-            company.company_summary,
-            company.company_industry,
-            company.company_size,
-            company_services,
-            company_industries,
-            company_awards,
-            company_clients,
-            company.company_founded_year,
-            company.company_headquarters,
-            company_culture,
-            company_updates
-        ))
-        conn.commit()
+        with _connect(user_email) as conn:
+            conn.execute('''
+                INSERT INTO user_companies (
+                    user_email, company_name, company_website, company_linkedin,
+                    company_summary, company_industry, company_size,
+                    company_services, company_industries, company_awards_recognitions,
+                    company_clients_partners, company_founded_year, company_headquarters,
+                    company_culture, company_recent_updates
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_email) DO UPDATE SET
+                    company_name=excluded.company_name,
+                    company_website=excluded.company_website,
+                    company_linkedin=excluded.company_linkedin,
+                    company_summary=excluded.company_summary,
+                    company_industry=excluded.company_industry,
+                    company_size=excluded.company_size,
+                    company_services=excluded.company_services,
+                    company_industries=excluded.company_industries,
+                    company_awards_recognitions=excluded.company_awards_recognitions,
+                    company_clients_partners=excluded.company_clients_partners,
+                    company_founded_year=excluded.company_founded_year,
+                    company_headquarters=excluded.company_headquarters,
+                    company_culture=excluded.company_culture,
+                    company_recent_updates=excluded.company_recent_updates
+            ''', (
+                user_email,
+                company.company_name,
+                company.company_website,
+                company.company_linkedin,
+                company.company_summary,
+                company.company_industry,
+                company.company_size,
+                company_services,
+                company_industries,
+                company_awards,
+                company_clients,
+                company.company_founded_year,
+                company.company_headquarters,
+                company_culture,
+                company_updates
+            ))
     except Exception as e:
         print(f"Error saving user company info: {e}")
         raise
     finally:
-        conn.close()
+        _user_company_cache.invalidate(user_email)
+
+def _load_user_company(user_email: str) -> Optional[Company]:
+    with _connect(user_email) as conn:
+        row = conn.execute(f'''
+            SELECT {COMPANY_COLUMNS}
+            FROM user_companies
+            WHERE user_email = ?
+        ''', (user_email,)).fetchone()
 
-def get_user_company_info(user_email: str) -> Optional[Company]:
-    """Retrieve user company information from the database"""
-    conn = sqlite3.connect('user_company_data.db')
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT company_name, company_website, company_linkedin, company_summary,
-               company_industry, company_size, company_services, company_industries,
-               company_awards_recognitions, company_clients_partners,
-               company_founded_year, company_headquarters, company_culture,
-               company_recent_updates
-        FROM user_companies
-        WHERE user_email = ?
-    ''', (user_email,))
-    
-    row = c.fetchone()
-    conn.close()
-    
     if row:
-        return Company(
-            company_name=row[0],
-            company_website=row[1],
-            company_linkedin=row[2],
-            company_summary=row[3],
-            company_industry=row[4],
-            company_size=row[5],
-            company_services=row[6].split(',') if row[6] else None,
-            company_industries=row[7].split(',') if row[7] else None,
-            company_awards_recognitions=row[8].split(',') if row[8] else None,
-            company_clients_partners=row[9].split(',') if row[9] else None,
-            company_founded_year=row[10],
-            company_headquarters=row[11],
-            company_culture=row[12].split(',') if row[12] else None,
-            company_recent_updates=row[13].split(',') if row[13] else None
-        )
+        return _row_to_company(row)
     return None
 
-def check_and_alter_table():
-    """Check if the table needs alteration and perform it if necessary."""
-    conn = sqlite3.connect('recent_searches.db')
-    c = conn.cursor()
-    try:
-        # Check if the column exists
-        c.execute("PRAGMA table_info(profile_searches)")
-        columns = [column[1] for column in c.fetchall()]
-        if 'current_company' not in columns or 'current_company_url' not in columns:
-            alter_profile_searches_table()
-    finally:
-        conn.close()
+def get_user_company_info(user_email: str) -> Optional[Company]:
+    """Retrieve user company information, cached per user (treat the result as read-only)"""
+    return _user_company_cache.get_or_load(user_email, lambda: _load_user_company(user_email))
+
+def _fan_out(query: str, params: Union[tuple, dict] = ()) -> List[Tuple[str, list]]:
+    """Run a read-only ``query`` on every shard concurrently; returns ``(db_path, rows)`` per shard"""
+    paths = get_router().paths
+
+    def run(db_path: str) -> Tuple[str, list]:
+        ensure_schema(db_path)
+        with connection(db_path) as conn:
+            return db_path, conn.execute(query, params).fetchall()
+
+    if len(paths) == 1:
+        return [run(paths[0])]
+    with ThreadPoolExecutor(max_workers=len(paths), thread_name_prefix="insight-shard-query") as pool:
+        return list(pool.map(run, paths))
+
+def get_shard_stats() -> List[Dict[str, object]]:
+    """Users and saved research per shard, to spot unbalanced or hot shards"""
+    results = _fan_out('''
+        SELECT
+            (SELECT COUNT(*) FROM users),
+            (SELECT COUNT(*) FROM profile_searches),
+            (SELECT COUNT(*) FROM company_searches)
+    ''')
+    return [
+        {'db_path': db_path, 'users': rows[0][0], 'profile_searches': rows[0][1], 'company_searches': rows[0][2]}
+        for db_path, rows in results
+    ]
+
+def list_all_users(limit: int = 100, after_email: Optional[str] = None) -> List[tuple]:
+    """Users across every shard ordered by email; pass the last email as ``after_email`` for the next page"""
+    query = 'SELECT * FROM users'
+    params: tuple = ()
+    if after_email is not None:
+        query += ' WHERE email > ?'
+        params = (after_email,)
+    query += ' ORDER BY email LIMIT ?'
+    rows = [row for _, shard_rows in _fan_out(query, params + (limit,)) for row in shard_rows]
+    return sorted(rows, key=lambda row: row[2])[:limit]
+
+def locate_user(email: str) -> List[str]:
+    """Every shard that holds rows for ``email``; more than the routed one means a reshard is pending"""
+    results = _fan_out('''
+        SELECT EXISTS (SELECT 1 FROM users WHERE email = :email)
+            OR EXISTS (SELECT 1 FROM profile_searches WHERE user_email = :email)
+            OR EXISTS (SELECT 1 FROM company_searches WHERE user_email = :email)
+            OR EXISTS (SELECT 1 FROM user_companies WHERE user_email = :email)
+    ''', {'email': email})
+    return [db_path for db_path, rows in results if rows[0][0]]
@@ -0,0 +1,115 @@
+import io
+import csv
+import json
+from dataclasses import asdict, fields
+from typing import Any, BinaryIO, Dict, Iterator, List
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+from insight_tracker.db import HistoryEntry, iter_history_chunks
+from insight_tracker.api.models.responses import ProfessionalProfile, Company
+from insight_tracker.storage.facets import LIST_FIELDS
+
+EXPORT_CHUNK_SIZE = 1000
+
+# format -> (mime type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'ndjson': ('application/x-ndjson', '.ndjson'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+
+_RECORD_TYPES = {'profile': ProfessionalProfile, 'company': Company}
+_ENTRY_FIELDS = ['id', 'first_seen', 'last_seen', 'hit_count']
+
+
+def export_columns(kind: str) -> List[str]:
+    if kind not in _RECORD_TYPES:
+        raise ValueError(f"Unknown research kind: {kind}")
+    return _ENTRY_FIELDS + [field.name for field in fields(_RECORD_TYPES[kind])]
+
+
+def _entry_row(entry: HistoryEntry) -> Dict[str, Any]:
+    row = {name: getattr(entry, name) for name in _ENTRY_FIELDS}
+    row.update(asdict(entry.record))
+    return row
+
+
+def iter_export_rows(user_email: str, kind: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """A user's saved research as lists of flat row dicts, one chunk at a time"""
+    for entries in iter_history_chunks(user_email, kind, chunk_size):
+        yield [_entry_row(entry) for entry in entries]
+
+
+def iter_csv(user_email: str, kind: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """UTF-8 CSV, one encoded chunk per database chunk. List values are joined with '; '."""
+    columns = export_columns(kind)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    # BOM so spreadsheet apps detect UTF-8
+    buffer.write('\ufeff')
+    writer.writeheader()
+    yield buffer.getvalue().encode('utf-8')
+
+    for rows in iter_export_rows(user_email, kind, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            writer.writerow({
+                name: '; '.join(value) if name in LIST_FIELDS and value else value
+                for name, value in row.items()
+            })
+        yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson(user_email: str, kind: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """One JSON object per line; list values stay arrays"""
+    for rows in iter_export_rows(user_email, kind, chunk_size):
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows).encode('utf-8')
+
+
+def _parquet_schema(kind: str) -> "pyarrow.Schema":
+    columns = []
+    for name in export_columns(kind):
+        if name in ('id', 'hit_count'):
+            columns.append(pyarrow.field(name, pyarrow.int64()))
+        elif name in LIST_FIELDS:
+            columns.append(pyarrow.field(name, pyarrow.list_(pyarrow.string())))
+        else:
+            # Founded year and friends arrive as ints or strings depending on the source
+            columns.append(pyarrow.field(name, pyarrow.string()))
+    return pyarrow.schema(columns)
+
+
+def write_parquet(user_email: str, kind: str, out: BinaryIO, chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """Write a Parquet file with one row group per chunk; returns the row count"""
+    if pyarrow is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+    schema = _parquet_schema(kind)
+    text_columns = [field.name for field in schema if pyarrow.types.is_string(field.type)]
+    count = 0
+    with pyarrow.parquet.ParquetWriter(out, schema, compression='zstd') as writer:
+        for rows in iter_export_rows(user_email, kind, chunk_size):
+            for row in rows:
+                for name in text_columns:
+                    if row[name] is not None and not isinstance(row[name], str):
+                        row[name] = str(row[name])
+            writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+            count += len(rows)
+    return count
+
+
+def export_research(user_email: str, kind: str, fmt: str, out: BinaryIO, chunk_size: int = EXPORT_CHUNK_SIZE) -> None:
+    """Stream a user's saved research of ``kind`` into the binary file ``out`` as ``fmt``"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'parquet':
+        write_parquet(user_email, kind, out, chunk_size)
+        return
+    chunks = iter_csv if fmt == 'csv' else iter_ndjson
+    for chunk in chunks(user_email, kind, chunk_size):
+        out.write(chunk)
@@ -0,0 +1,147 @@
+import io
+import csv
+import os
+import re
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import openpyxl
+except ImportError:  # XLSX import is optional
+    openpyxl = None
+
+from insight_tracker.db import import_leads
+from insight_tracker.storage.dedupe import profile_content_hash
+
+LEAD_FILE_TYPES = ('csv', 'xlsx')
+MAX_FIELD_LENGTH = 200
+# Only the first few problems are worth showing; the rest are counted
+MAX_REPORTED_ERRORS = 20
+
+# Accepted header spellings, compared after lowercasing and dropping punctuation
+NAME_HEADERS = {'name', 'fullname', 'full name', 'person', 'contact', 'contact name'}
+COMPANY_HEADERS = {'company', 'company name', 'organization', 'organisation', 'employer', 'account'}
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+@dataclass
+class LeadImportReport:
+    rows: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def add_error(self, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+
+def _clean(value) -> str:
+    if value is None:
+        return ''
+    return _WHITESPACE.sub(' ', str(value)).strip()
+
+
+def _header_key(value) -> str:
+    return re.sub(r'[^a-z ]', '', _clean(value).lower().replace('_', ' '))
+
+
+def _find_columns(header: Sequence) -> Optional[Tuple[int, int]]:
+    keys = [_header_key(cell) for cell in header]
+    name = next((i for i, key in enumerate(keys) if key in NAME_HEADERS), None)
+    company = next((i for i, key in enumerate(keys) if key in COMPANY_HEADERS), None)
+    if name is None or company is None:
+        return None
+    return name, company
+
+
+def _iter_csv_rows(data: BinaryIO) -> Iterator[Sequence]:
+    text = io.TextIOWrapper(data, encoding='utf-8-sig', errors='replace', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    try:
+        yield from csv.reader(text, dialect)
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def _iter_xlsx_rows(data: BinaryIO) -> Iterator[Sequence]:
+    if openpyxl is None:
+        raise RuntimeError("XLSX import requires openpyxl")
+    # Read-only mode streams rows instead of loading the whole sheet
+    workbook = openpyxl.load_workbook(data, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_lead_rows(data: BinaryIO, filename: str) -> Iterator[Sequence]:
+    """Raw rows of an uploaded CSV or XLSX file, header first"""
+    file_type = os.path.splitext(filename)[1].lstrip('.').lower()
+    if file_type not in LEAD_FILE_TYPES:
+        raise ValueError(f"Unsupported lead file type: {filename}")
+    return _iter_csv_rows(data) if file_type == 'csv' else _iter_xlsx_rows(data)
+
+
+def validate_leads(rows: Iterable[Sequence], report: LeadImportReport) -> Iterator[Tuple[str, str]]:
+    """
+    Yield clean ``(full_name, company)`` pairs from ``rows`` (header first),
+    counting invalid rows and repeats within the file on ``report``. Without a
+    recognizable header the first two columns are used.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _find_columns(header)
+    if columns is None:
+        columns = (0, 1)
+        rows = _prepend(header, rows)
+        line = 0
+    else:
+        line = 1
+
+    seen = set()
+    for row in rows:
+        line += 1
+        if not any(_clean(cell) for cell in row):
+            continue
+        report.rows += 1
+        full_name = _clean(row[columns[0]]) if len(row) > columns[0] else ''
+        company = _clean(row[columns[1]]) if len(row) > columns[1] else ''
+        if not full_name or not company:
+            report.add_error(f"Row {line}: name and company are both required")
+            continue
+        if len(full_name) > MAX_FIELD_LENGTH or len(company) > MAX_FIELD_LENGTH:
+            report.add_error(f"Row {line}: values longer than {MAX_FIELD_LENGTH} characters")
+            continue
+        key = profile_content_hash(full_name, company)
+        if key in seen:
+            report.duplicates += 1
+            continue
+        seen.add(key)
+        yield full_name, company
+
+
+def _prepend(first: Sequence, rows: Iterator[Sequence]) -> Iterator[Sequence]:
+    yield first
+    yield from rows
+
+
+def import_lead_file(user_email: str, data: BinaryIO, filename: str) -> LeadImportReport:
+    """Validate an uploaded spreadsheet and queue its leads for ``user_email``"""
+    report = LeadImportReport()
+    unique = validate_leads(iter_lead_rows(data, filename), report)
+    report.inserted = import_leads(user_email, unique, source=os.path.basename(filename))
+    # Leads queued by an earlier import count as duplicates too
+    report.duplicates += report.rows - report.invalid - report.duplicates - report.inserted
+    return report
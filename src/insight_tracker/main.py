@@ -1,4 +1,5 @@
 import sqlite3
+import logging
 import streamlit as st
 # First Streamlit command must be set_page_config
 st.set_page_config(
@@ -24,7 +25,7 @@ from insight_tracker import (
 
 # Rest of the imports
 from insight_tracker.utils.cookie_manager import load_auth_cookie, clear_auth_cookie
-from insight_tracker.db import getUserByEmail, init_db, init_recent_searches_db, check_and_alter_table, init_user_company_db, get_user_company_info
+from insight_tracker.db import getUserByEmail, get_user_company_info
 from insight_tracker.ui.profile_insight_section import profile_insight_section
 from insight_tracker.ui.company_insight_section import company_insight_section
 from insight_tracker.ui.recent_searches_section import recent_searches_section
@@ -36,6 +37,15 @@ from insight_tracker.ui.onboarding_section import onboarding_section
 from insight_tracker.ui.components.loading_dialog import show_loading_dialog
 from insight_tracker.utils.url_manager import redirect_to_base_url, BASE_URL
 from insight_tracker.utils.logger import logger
+from insight_tracker.storage.connection import get_db_stats
+from insight_tracker.storage.migrations import ensure_schema
+from insight_tracker.storage.maintenance import start_maintenance
+from insight_tracker.storage.backup import start_backups, get_backup_reports
+from insight_tracker.storage.writer import get_writer_stats
+from insight_tracker.storage.lookup_cache import get_lookup_cache_stats
+from insight_tracker.api.services.research_cache import get_research_cache_stats
+from insight_tracker.api.client.http import get_http_stats, get_stream_pool_stats, check_stream_leaks
+from insight_tracker.api.client.retry import get_retry_stats
 
 # Initialize cookie manager
 cookie_manager = get_cookie_manager()
@@ -49,12 +59,11 @@ hide_streamlit_style = """
     """
 st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
-# Initialize session state and database
+# Initialize session state and database (migrations run once per process)
 initialize_session_state()
-init_db()
-init_recent_searches_db()
-check_and_alter_table()  # Check and alter the table if necessary
-init_user_company_db()
+ensure_schema()
+start_maintenance()
+start_backups()
 
 def show_loading_screen():
     loading_container = show_loading_dialog(
@@ -177,4 +186,7 @@ def main():
         auth_section()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"DB stats after rerun: {get_db_stats()}, writer: {get_writer_stats()}, research cache: {get_research_cache_stats()}, lookups: {get_lookup_cache_stats()}, backups: {get_backup_reports()}, http: {get_http_stats()}, stream pool: {get_stream_pool_stats()}, retries: {get_retry_stats()}")
+    check_stream_leaks()
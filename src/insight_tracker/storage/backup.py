@@ -0,0 +1,281 @@
+"""Online snapshots of the SQLite databases, and restoring them.
+
+    python -m insight_tracker.storage.backup snapshot
+    python -m insight_tracker.storage.backup list
+    python -m insight_tracker.storage.backup restore <snapshot> [--db PATH]
+
+Snapshots are taken with the SQLite backup API a few pages at a time while
+the app keeps running. Each shard is copied on its own, so snapshots of
+different shards are not from the same instant. Stop the app before
+restoring.
+"""
+import os
+import re
+import glob
+import sqlite3
+import argparse
+import threading
+import time
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from insight_tracker.storage.connection import BUSY_TIMEOUT_MS
+from insight_tracker.storage.migrations import DB_PATH, ensure_schema
+from insight_tracker.storage.sharding import get_router
+
+logger = logging.getLogger(__name__)
+
+BACKUP_DIR = os.getenv("INSIGHT_BACKUP_DIR", "backups")
+# Snapshots kept per database; older ones are deleted after each new snapshot
+BACKUP_KEEP = int(os.getenv("INSIGHT_BACKUP_KEEP", "7"))
+# Pages copied per step, and the pause between steps that lets writers in
+BACKUP_PAGES_PER_STEP = int(os.getenv("INSIGHT_BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_PAUSE_SECONDS = float(os.getenv("INSIGHT_BACKUP_STEP_PAUSE", "0.01"))
+# 0 disables the background task
+BACKUP_INTERVAL_SECONDS = float(os.getenv("INSIGHT_BACKUP_INTERVAL", str(6 * 3600)))
+
+# A write from another connection restarts a stepped backup. After this many
+# restarts the copy finishes in one step: in WAL mode that is a single read
+# transaction, which writers do not wait on.
+MAX_BACKUP_RESTARTS = 3
+
+_SNAPSHOT_TIME_FORMAT = "%Y%m%d-%H%M%S"
+
+
+@dataclass
+class BackupReport:
+    db_path: str
+    snapshot_path: str
+    pages: int = 0
+    steps: int = 0
+    restarts: int = 0
+    size_bytes: int = 0
+    duration_seconds: float = 0.0
+    finished_at: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+def _snapshot_pattern(db_path: str) -> re.Pattern:
+    stem, ext = os.path.splitext(os.path.basename(db_path))
+    return re.compile('^' + re.escape(stem) + r'-(\d{8}-\d{6}(?:-\d+)?)' + re.escape(ext or '.db') + '$')
+
+
+def list_snapshots(db_path: str = DB_PATH, backup_dir: str = BACKUP_DIR) -> List[str]:
+    """Snapshots of ``db_path`` in ``backup_dir``, newest first"""
+    stem, ext = os.path.splitext(os.path.basename(db_path))
+    pattern = _snapshot_pattern(db_path)
+    found = [path for path in glob.glob(os.path.join(glob.escape(backup_dir), f"{glob.escape(stem)}-*{ext or '.db'}"))
+             if pattern.search(os.path.basename(path))]
+    return sorted(found, key=lambda path: pattern.search(os.path.basename(path)).group(1), reverse=True)
+
+
+def _snapshot_path(db_path: str, backup_dir: str) -> str:
+    stem, ext = os.path.splitext(os.path.basename(db_path))
+    base = os.path.join(backup_dir, f"{stem}-{datetime.now().strftime(_SNAPSHOT_TIME_FORMAT)}")
+    path, suffix = f"{base}{ext or '.db'}", 1
+    while os.path.exists(path):
+        path, suffix = f"{base}-{suffix}{ext or '.db'}", suffix + 1
+    return path
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _copy(source: sqlite3.Connection, target: sqlite3.Connection, report: BackupReport,
+          pages_per_step: int, pause_seconds: float) -> None:
+    """Stepped backup API copy from ``source`` into ``target``, counting steps and restarts on ``report``"""
+    remaining_before = None
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        nonlocal remaining_before
+        report.steps += 1
+        report.pages = total
+        if remaining_before is not None and remaining > remaining_before:
+            report.restarts += 1
+            if report.restarts >= MAX_BACKUP_RESTARTS:
+                raise _TooManyRestarts()
+        remaining_before = remaining
+
+    try:
+        source.backup(target, pages=pages_per_step, progress=progress, sleep=pause_seconds)
+    except _TooManyRestarts:
+        logger.info(f"{report.db_path} changed during {report.restarts} backup passes; copying in one step")
+        source.backup(target, pages=-1)
+
+
+def snapshot_database(db_path: str = DB_PATH, backup_dir: str = BACKUP_DIR, keep: int = BACKUP_KEEP,
+                      pages_per_step: int = BACKUP_PAGES_PER_STEP,
+                      pause_seconds: float = BACKUP_STEP_PAUSE_SECONDS) -> BackupReport:
+    """Copy ``db_path`` into a new timestamped snapshot and drop all but the ``keep`` newest"""
+    ensure_schema(db_path)
+    os.makedirs(backup_dir, exist_ok=True)
+    snapshot_path = _snapshot_path(db_path, backup_dir)
+    partial_path = snapshot_path + ".partial"
+    report = BackupReport(db_path=db_path, snapshot_path=snapshot_path)
+    started = time.perf_counter()
+
+    # Own connections rather than pooled ones, so the copy never holds a
+    # connection a request is waiting for
+    source = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(partial_path)
+    try:
+        _copy(source, target, report, pages_per_step, pause_seconds)
+        if target.execute("PRAGMA quick_check").fetchone()[0] != 'ok':
+            raise sqlite3.DatabaseError(f"Snapshot of {db_path} failed its integrity check")
+    except Exception:
+        target.close()
+        os.remove(partial_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+    # Readers of backup_dir only ever see complete snapshots
+    os.replace(partial_path, snapshot_path)
+
+    report.size_bytes = os.path.getsize(snapshot_path)
+    report.duration_seconds = time.perf_counter() - started
+    report.finished_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+    logger.info(
+        f"Snapshot of {db_path} written to {snapshot_path}: {report.pages} pages in {report.steps} steps, "
+        f"{report.restarts} restarts, {report.duration_seconds:.2f}s"
+    )
+
+    if keep > 0:
+        for old in list_snapshots(db_path, backup_dir)[keep:]:
+            os.remove(old)
+            logger.info(f"Removed old snapshot {old}")
+    return report
+
+
+def restore_snapshot(snapshot_path: str, db_path: str = DB_PATH, backup_dir: str = BACKUP_DIR) -> Optional[str]:
+    """
+    Replace the contents of ``db_path`` with ``snapshot_path``. The current
+    database is snapshotted first; returns that snapshot's path (None if
+    ``db_path`` did not exist). The app must not be running.
+    """
+    snapshot = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    try:
+        if snapshot.execute("PRAGMA quick_check").fetchone()[0] != 'ok':
+            raise sqlite3.DatabaseError(f"{snapshot_path} failed its integrity check")
+
+        safety_copy = None
+        if os.path.exists(db_path):
+            safety_copy = snapshot_database(db_path, backup_dir, keep=0).snapshot_path
+
+        # Copying through the backup API rewrites the pages in place, so the
+        # WAL and -shm files stay consistent with the restored contents
+        target = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+        try:
+            snapshot.backup(target)
+        finally:
+            target.close()
+    finally:
+        snapshot.close()
+    logger.info(f"Restored {db_path} from {snapshot_path}")
+    return safety_copy
+
+
+class BackupTask:
+    """Snapshots every database on a background thread every ``interval_seconds``"""
+
+    def __init__(self, db_paths: Optional[List[str]] = None, interval_seconds: float = BACKUP_INTERVAL_SECONDS):
+        self.db_paths = db_paths or get_router().paths
+        self.interval_seconds = interval_seconds
+        self.last_reports: Dict[str, BackupReport] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.interval_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="insight-db-backup", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> List[BackupReport]:
+        reports = []
+        for db_path in self.db_paths:
+            try:
+                report = snapshot_database(db_path)
+            except Exception as e:
+                logger.error(f"Backup of {db_path} failed: {e}")
+                continue
+            self.last_reports[db_path] = report
+            reports.append(report)
+        return reports
+
+    def _run(self) -> None:
+        # The first snapshot waits one interval so restarts do not pile up copies
+        while not self._stop.wait(self.interval_seconds):
+            self.run_once()
+
+
+_task: Optional[BackupTask] = None
+_task_lock = threading.Lock()
+
+
+def start_backups(db_paths: Optional[List[str]] = None) -> BackupTask:
+    """Start the process-wide backup task (idempotent across Streamlit reruns)"""
+    global _task
+    with _task_lock:
+        if _task is None:
+            _task = BackupTask(db_paths)
+        _task.start()
+        return _task
+
+
+def get_backup_reports() -> Dict[str, Dict[str, object]]:
+    """Most recent snapshot per database"""
+    if _task is None:
+        return {}
+    return {db_path: report.as_dict() for db_path, report in _task.last_reports.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snapshot, list and restore the app databases")
+    parser.add_argument("--backup-dir", default=BACKUP_DIR, help="directory holding the snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("snapshot", help="snapshot every database now")
+    commands.add_parser("list", help="list the snapshots of every database")
+    restore = commands.add_parser("restore", help="restore one database from a snapshot (stop the app first)")
+    restore.add_argument("snapshot", help="snapshot file to restore")
+    restore.add_argument("--db", help="database to overwrite; defaults to the one the snapshot was taken of")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    paths = get_router().paths
+    if args.command == "snapshot":
+        for db_path in paths:
+            report = snapshot_database(db_path, args.backup_dir)
+            print(f"{db_path} -> {report.snapshot_path} ({report.size_bytes} bytes)")
+    elif args.command == "list":
+        for db_path in paths:
+            print(db_path)
+            for snapshot in list_snapshots(db_path, args.backup_dir):
+                print(f"  {snapshot}")
+    else:
+        db_path = args.db or next(
+            (path for path in paths if _snapshot_pattern(path).search(os.path.basename(args.snapshot))), None
+        )
+        if db_path is None:
+            parser.error(f"Cannot tell which database {args.snapshot} belongs to; pass --db")
+        safety_copy = restore_snapshot(args.snapshot, db_path, args.backup_dir)
+        print(f"Restored {db_path} from {args.snapshot}")
+        if safety_copy:
+            print(f"The previous contents were saved to {safety_copy}")
+
+
+if __name__ == "__main__":
+    main()
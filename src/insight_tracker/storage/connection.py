@@ -0,0 +1,195 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import atexit
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("INSIGHT_DB_POOL_SIZE", "8"))
+BUSY_TIMEOUT_MS = int(os.getenv("INSIGHT_DB_BUSY_TIMEOUT_MS", "5000"))
+STATEMENT_CACHE_SIZE = 256
+CHECKOUT_TIMEOUT_SECONDS = 30.0
+
+
+@dataclass
+class DbStats:
+    """Latency counters for one database file"""
+    checkouts: int = 0
+    connections_opened: int = 0
+    errors: int = 0
+    wait_seconds: float = 0.0
+    busy_seconds: float = 0.0
+    max_busy_seconds: float = 0.0
+
+    @property
+    def avg_busy_ms(self) -> float:
+        return (self.busy_seconds / self.checkouts) * 1000 if self.checkouts else 0.0
+
+    @property
+    def avg_wait_ms(self) -> float:
+        return (self.wait_seconds / self.checkouts) * 1000 if self.checkouts else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        data['avg_busy_ms'] = self.avg_busy_ms
+        data['avg_wait_ms'] = self.avg_wait_ms
+        return data
+
+
+class ConnectionPool:
+    """A bounded pool of SQLite connections for a single database file.
+
+    Connections are opened lazily up to ``size`` and handed to one thread at a
+    time. A thread that re-enters ``connection()`` while it already holds a
+    connection gets the same one back, so nested db helpers share a transaction.
+    """
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self.stats = DbStats()
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        # Only takes effect on a new file, and only before the WAL switch
+        # writes its header; existing files are converted offline
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL").fetchone()
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA foreign_keys=ON")
+        self.stats.connections_opened += 1
+        logger.debug(f"Opened SQLite connection to {self.db_path}")
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self._open()
+                self._all.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=CHECKOUT_TIMEOUT_SECONDS)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"No pooled connection to {self.db_path} within {CHECKOUT_TIMEOUT_SECONDS}s"
+            ) from None
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection, committing on success and rolling back on error"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+
+        wait_start = time.perf_counter()
+        conn = self._checkout()
+        busy_start = time.perf_counter()
+        self._local.conn = conn
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            with self._lock:
+                self.stats.errors += 1
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self._idle.put(conn)
+            busy = time.perf_counter() - busy_start
+            with self._lock:
+                self.stats.checkouts += 1
+                self.stats.wait_seconds += busy_start - wait_start
+                self.stats.busy_seconds += busy
+                self.stats.max_busy_seconds = max(self.stats.max_busy_seconds, busy)
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._all:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"Error closing connection to {self.db_path}: {e}")
+            self._all.clear()
+            self._idle = queue.LifoQueue()
+
+
+class ConnectionManager:
+    """Process-wide registry of connection pools, one per database file"""
+
+    def __init__(self, pool_size: int = POOL_SIZE):
+        self.pool_size = pool_size
+        self._pools: Dict[str, ConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def pool(self, db_path: str) -> ConnectionPool:
+        key = os.path.abspath(db_path)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = ConnectionPool(key, self.pool_size)
+                    self._pools[key] = pool
+        return pool
+
+    def connection(self, db_path: str):
+        return self.pool(db_path).connection()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {path: pool.stats.as_dict() for path, pool in self._pools.items()}
+
+    def reset_stats(self) -> None:
+        for pool in self._pools.values():
+            pool.stats = DbStats()
+
+    def close_all(self) -> None:
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+
+
+_manager = ConnectionManager()
+atexit.register(_manager.close_all)
+
+
+def get_connection_manager() -> ConnectionManager:
+    return _manager
+
+
+def connection(db_path: str):
+    """Context manager yielding a pooled connection to ``db_path``"""
+    return _manager.connection(db_path)
+
+
+def get_db_stats() -> Dict[str, Dict[str, float]]:
+    """Per-database latency counters since start-up or the last reset"""
+    return _manager.stats()
+
+
+def reset_db_stats() -> None:
+    _manager.reset_stats()
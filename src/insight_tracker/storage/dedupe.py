@@ -0,0 +1,26 @@
+import hashlib
+from typing import Optional
+
+from insight_tracker.storage.facets import facet_key
+
+# Saved research is keyed by who/what was researched, not by the generated
+# text, which differs on every run. Identity fields are normalized so
+# "Jane  Doe" at "ACME" and "jane doe" at "Acme" collapse into one row.
+
+
+def _hash(*parts: Optional[str]) -> str:
+    normalized = '\x1f'.join(facet_key(part) if part else '' for part in parts)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def profile_content_hash(full_name: Optional[str], current_company: Optional[str]) -> str:
+    return _hash(full_name, current_company)
+
+
+def company_content_hash(company_name: Optional[str]) -> str:
+    return _hash(company_name)
+
+
+def research_cache_key(kind: str, entity: Optional[str], context: Optional[str], language: Optional[str]) -> str:
+    """Key for a research run: who/what, the company or industry it is framed by, and the output language"""
+    return _hash(kind, entity, context, language)
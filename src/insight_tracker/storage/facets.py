@@ -0,0 +1,68 @@
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Facet name -> Company list attribute it is built from
+FACET_FIELDS = {
+    'industry': 'company_industries',
+    'service': 'company_services',
+    'client_partner': 'company_clients_partners',
+    'award': 'company_awards_recognitions',
+    'culture': 'company_culture',
+}
+
+# List attributes stored as JSON arrays
+LIST_FIELDS = [
+    'company_services',
+    'company_industries',
+    'company_awards_recognitions',
+    'company_clients_partners',
+    'company_culture',
+    'company_recent_updates',
+]
+
+
+def encode_list(values: Optional[List[str]]) -> Optional[str]:
+    """Serialize a list attribute losslessly (values may contain commas)"""
+    if not values:
+        return None
+    return json.dumps(list(values), ensure_ascii=False)
+
+
+def decode_list(stored: Optional[str]) -> Optional[List[str]]:
+    """Read a list attribute, accepting the legacy comma-joined format"""
+    if not stored:
+        return None
+    if stored.startswith('['):
+        try:
+            return json.loads(stored)
+        except json.JSONDecodeError:
+            pass
+    return stored.split(',')
+
+
+def facet_key(value: str) -> str:
+    """Normalized lookup key so facet matches ignore case and spacing"""
+    return ' '.join(str(value).split()).casefold()
+
+
+def company_facets(fields: Dict[str, object]) -> List[Tuple[str, str, str]]:
+    """(facet, value, value_key) triples for one company, deduplicated per facet"""
+    facets = []
+    seen = set()
+
+    def add(facet: str, values: Iterable) -> None:
+        for value in values or []:
+            if value is None or not str(value).strip():
+                continue
+            key = facet_key(value)
+            if (facet, key) in seen:
+                continue
+            seen.add((facet, key))
+            facets.append((facet, str(value).strip(), key))
+
+    # The primary industry is searchable alongside the secondary ones
+    if fields.get('company_industry'):
+        add('industry', [fields['company_industry']])
+    for facet, field_name in FACET_FIELDS.items():
+        add(facet, fields.get(field_name))
+    return facets
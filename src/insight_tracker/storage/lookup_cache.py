@@ -0,0 +1,87 @@
+import os
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Hashable, List
+
+from cachetools import TTLCache
+
+LOOKUP_CACHE_SIZE = int(os.getenv("INSIGHT_LOOKUP_CACHE_SIZE", "1024"))
+LOOKUP_CACHE_TTL_SECONDS = float(os.getenv("INSIGHT_LOOKUP_CACHE_TTL", "300"))
+
+_MISSING = object()
+
+
+@dataclass
+class LookupCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        lookups = self.hits + self.misses
+        data['hit_ratio'] = self.hits / lookups if lookups else 0.0
+        return data
+
+
+class LookupCache:
+    """Read-through LRU cache with a TTL for small, hot lookups.
+
+    ``None`` results are cached too, so repeated lookups of a missing row stay
+    off the database; writers must call ``invalidate`` for the keys they change.
+    Cached objects are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, name: str, maxsize: int = LOOKUP_CACHE_SIZE, ttl: float = LOOKUP_CACHE_TTL_SECONDS):
+        self.name = name
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._stats = LookupCacheStats()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so a load that raced one is not cached
+        self._generation = 0
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            value = self._cache.get(key, _MISSING)
+            if value is not _MISSING:
+                self._stats.hits += 1
+                return value
+            self._stats.misses += 1
+            generation = self._generation
+        # Load outside the lock; a concurrent miss for the same key just loads twice
+        value = load()
+        with self._lock:
+            if generation == self._generation:
+                self._cache[key] = value
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
+            self._generation += 1
+            self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._generation += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            data = self._stats.as_dict()
+            data['size'] = len(self._cache)
+            return data
+
+
+_caches: List[LookupCache] = []
+
+
+def register_lookup_cache(name: str, **kwargs) -> LookupCache:
+    cache = LookupCache(name, **kwargs)
+    _caches.append(cache)
+    return cache
+
+
+def get_lookup_cache_stats() -> Dict[str, Dict[str, float]]:
+    """Hit ratio and size of every registered lookup cache"""
+    return {cache.name: cache.stats() for cache in _caches}
@@ -0,0 +1,312 @@
+"""Retention and space reclamation for the app databases.
+
+    python -m insight_tracker.storage.maintenance run
+    python -m insight_tracker.storage.maintenance enable-incremental-vacuum
+
+The app runs maintenance on a background thread. Databases created before
+incremental auto_vacuum existed need ``enable-incremental-vacuum`` once,
+with the app stopped: it rewrites each file with a full VACUUM.
+"""
+import os
+import argparse
+import threading
+import time
+import logging
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from insight_tracker.storage.connection import connection
+from insight_tracker.storage.migrations import DB_PATH, convert_to_incremental_vacuum, ensure_schema
+from insight_tracker.storage.sharding import get_router
+
+logger = logging.getLogger(__name__)
+
+HISTORY_TABLES = ('profile_searches', 'company_searches')
+
+# Matches SEARCH_DATE_FORMAT in insight_tracker.db
+_SEARCH_DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    """Read a positive int from the environment; 0 disables the limit"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return int(value) if int(value) > 0 else None
+
+
+@dataclass
+class RetentionPolicy:
+    """How much saved research to keep. ``None`` disables a limit.
+    Saved research is never pruned unless a limit for it is configured."""
+    max_rows_per_user: Optional[int] = None
+    max_age_days: Optional[int] = None
+    # Raw API usage rows; the hourly and daily rollups are kept
+    usage_ledger_days: Optional[int] = 90
+    batch_size: int = 500
+    # Pause between delete batches so foreground writes get the lock
+    batch_pause_seconds: float = 0.05
+    vacuum_pages_per_step: int = 1000
+    interval_seconds: float = 3600.0
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        return cls(
+            max_rows_per_user=_env_int("INSIGHT_RETENTION_MAX_ROWS_PER_USER", None),
+            max_age_days=_env_int("INSIGHT_RETENTION_MAX_AGE_DAYS", None),
+            usage_ledger_days=_env_int("INSIGHT_USAGE_LEDGER_DAYS", 90),
+            batch_size=int(os.getenv("INSIGHT_RETENTION_BATCH_SIZE", "500")),
+            batch_pause_seconds=float(os.getenv("INSIGHT_RETENTION_BATCH_PAUSE", "0.05")),
+            vacuum_pages_per_step=int(os.getenv("INSIGHT_VACUUM_PAGES_PER_STEP", "1000")),
+            interval_seconds=float(os.getenv("INSIGHT_MAINTENANCE_INTERVAL", "3600")),
+        )
+
+
+@dataclass
+class MaintenanceReport:
+    db_path: str
+    expired_rows: Dict[str, int] = field(default_factory=dict)
+    capped_rows: Dict[str, int] = field(default_factory=dict)
+    expired_cache_entries: int = 0
+    freed_pages: int = 0
+    reclaimed_bytes: int = 0
+    duration_seconds: float = 0.0
+    finished_at: Optional[str] = None
+
+    @property
+    def deleted_rows(self) -> int:
+        return sum(self.expired_rows.values()) + sum(self.capped_rows.values()) + self.expired_cache_entries
+
+    def as_dict(self) -> Dict[str, object]:
+        data = asdict(self)
+        data['deleted_rows'] = self.deleted_rows
+        return data
+
+
+def _delete_in_batches(db_path: str, table: str, select_ids: str, params: tuple, policy: RetentionPolicy,
+                       key_column: str = 'id') -> int:
+    """Repeatedly delete the ids returned by ``select_ids`` (which must end in
+    ``LIMIT ?``), committing each batch so no transaction holds the write lock
+    for long"""
+    deleted = 0
+    while True:
+        with connection(db_path) as conn:
+            cursor = conn.execute(
+                f"DELETE FROM {table} WHERE {key_column} IN ({select_ids})",
+                params + (policy.batch_size,)
+            )
+            count = cursor.rowcount
+        deleted += count
+        if count < policy.batch_size:
+            return deleted
+        time.sleep(policy.batch_pause_seconds)
+
+
+def expire_old_rows(db_path: str, table: str, policy: RetentionPolicy) -> int:
+    """Delete research last seen more than ``max_age_days`` ago"""
+    if not policy.max_age_days:
+        return 0
+    cutoff = (datetime.now() - timedelta(days=policy.max_age_days)).strftime(_SEARCH_DATE_FORMAT)
+    return _delete_in_batches(
+        db_path,
+        table,
+        f"SELECT id FROM {table} WHERE last_seen < ? LIMIT ?",
+        (cutoff,),
+        policy
+    )
+
+
+def expire_usage_ledger(db_path: str, policy: RetentionPolicy) -> int:
+    """Delete raw API usage rows older than ``usage_ledger_days``"""
+    if not policy.usage_ledger_days:
+        return 0
+    cutoff = (datetime.now() - timedelta(days=policy.usage_ledger_days)).strftime(_SEARCH_DATE_FORMAT)
+    return _delete_in_batches(
+        db_path,
+        'api_usage',
+        "SELECT id FROM api_usage WHERE created_at < ? LIMIT ?",
+        (cutoff,),
+        policy
+    )
+
+
+def purge_research_cache(db_path: str, policy: RetentionPolicy) -> int:
+    """Drop cached research results past their expiry"""
+    now = datetime.now().strftime(_SEARCH_DATE_FORMAT)
+    return _delete_in_batches(
+        db_path,
+        'research_cache',
+        "SELECT cache_key FROM research_cache WHERE expires_at <= ? LIMIT ?",
+        (now,),
+        policy,
+        key_column='cache_key'
+    )
+
+
+def cap_rows_per_user(db_path: str, table: str, policy: RetentionPolicy) -> int:
+    """Keep only the ``max_rows_per_user`` most recently seen rows per user"""
+    if not policy.max_rows_per_user:
+        return 0
+    with connection(db_path) as conn:
+        users = [row[0] for row in conn.execute(
+            f"SELECT user_email FROM {table} GROUP BY user_email HAVING COUNT(*) > ?",
+            (policy.max_rows_per_user,)
+        )]
+
+    deleted = 0
+    for user_email in users:
+        # Walks the (user_email, last_seen DESC, id DESC) index past the rows to keep
+        deleted += _delete_in_batches(
+            db_path,
+            table,
+            f'''SELECT id FROM {table} WHERE user_email = ?
+                ORDER BY last_seen DESC, id DESC LIMIT ? OFFSET {policy.max_rows_per_user}''',
+            (user_email,),
+            policy
+        )
+    return deleted
+
+
+def incremental_vacuum(db_path: str, policy: RetentionPolicy) -> Dict[str, int]:
+    """Return free pages to the filesystem in small steps.
+
+    Requires ``auto_vacuum=INCREMENTAL`` (schema migration 7). The file itself
+    only shrinks once the WAL is checkpointed, so progress is measured as
+    ``page_count * page_size`` before and after.
+    """
+    with connection(db_path) as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            logger.warning(f"{db_path} is not in incremental auto_vacuum mode; skipping vacuum "
+                           f"(convert it with `python -m insight_tracker.storage.maintenance enable-incremental-vacuum`)")
+            return {'freed_pages': 0, 'reclaimed_bytes': 0}
+
+    while True:
+        with connection(db_path) as conn:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                break
+            conn.execute(f"PRAGMA incremental_vacuum({policy.vacuum_pages_per_step})").fetchall()
+        time.sleep(policy.batch_pause_seconds)
+
+    with connection(db_path) as conn:
+        pages_after = conn.execute("PRAGMA page_count").fetchone()[0]
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    freed = max(pages_before - pages_after, 0)
+    return {'freed_pages': freed, 'reclaimed_bytes': freed * page_size}
+
+
+def run_maintenance(db_path: str = DB_PATH, policy: Optional[RetentionPolicy] = None) -> MaintenanceReport:
+    """Apply the retention policy to ``db_path`` and reclaim the freed space"""
+    policy = policy or RetentionPolicy.from_env()
+    ensure_schema(db_path)
+    started = time.perf_counter()
+    report = MaintenanceReport(db_path=db_path)
+
+    for table in HISTORY_TABLES:
+        report.expired_rows[table] = expire_old_rows(db_path, table, policy)
+        report.capped_rows[table] = cap_rows_per_user(db_path, table, policy)
+    report.expired_rows['api_usage'] = expire_usage_ledger(db_path, policy)
+    report.expired_cache_entries = purge_research_cache(db_path, policy)
+
+    if report.deleted_rows:
+        vacuum = incremental_vacuum(db_path, policy)
+        report.freed_pages = vacuum['freed_pages']
+        report.reclaimed_bytes = vacuum['reclaimed_bytes']
+
+    report.duration_seconds = time.perf_counter() - started
+    report.finished_at = datetime.now().strftime(_SEARCH_DATE_FORMAT)
+    logger.info(
+        f"Maintenance on {db_path}: deleted {report.deleted_rows} rows, "
+        f"reclaimed {report.reclaimed_bytes} bytes in {report.duration_seconds:.2f}s"
+    )
+    return report
+
+
+class MaintenanceTask:
+    """Runs ``run_maintenance`` on a background thread every ``interval_seconds``"""
+
+    def __init__(self, db_paths: Optional[List[str]] = None, policy: Optional[RetentionPolicy] = None):
+        self.db_paths = db_paths or get_router().paths
+        self.policy = policy or RetentionPolicy.from_env()
+        self.last_reports: Dict[str, MaintenanceReport] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="insight-db-maintenance", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> List[MaintenanceReport]:
+        reports = []
+        for db_path in self.db_paths:
+            try:
+                report = run_maintenance(db_path, self.policy)
+            except Exception as e:
+                logger.error(f"Maintenance on {db_path} failed: {e}")
+                continue
+            self.last_reports[db_path] = report
+            reports.append(report)
+        return reports
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.policy.interval_seconds)
+
+
+_task: Optional[MaintenanceTask] = None
+_task_lock = threading.Lock()
+
+
+def start_maintenance(db_paths: Optional[List[str]] = None) -> MaintenanceTask:
+    """Start the process-wide maintenance task (idempotent across Streamlit reruns)"""
+    global _task
+    with _task_lock:
+        if _task is None:
+            _task = MaintenanceTask(db_paths)
+        _task.start()
+        return _task
+
+
+def get_maintenance_reports() -> Dict[str, Dict[str, object]]:
+    """Most recent maintenance report per database"""
+    if _task is None:
+        return {}
+    return {db_path: report.as_dict() for db_path, report in _task.last_reports.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply the retention policy and reclaim space in the app databases")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("run", help="apply the retention policy to every database now")
+    commands.add_parser("enable-incremental-vacuum",
+                        help="rewrite every database in incremental auto_vacuum mode (stop the app first)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    for db_path in get_router().paths:
+        if args.command == "run":
+            report = run_maintenance(db_path)
+            print(f"{db_path}: deleted {report.deleted_rows} rows, reclaimed {report.reclaimed_bytes} bytes")
+            continue
+        ensure_schema(db_path)
+        with connection(db_path) as conn:
+            converted = convert_to_incremental_vacuum(conn)
+        print(f"{db_path}: {'converted to' if converted else 'already in'} incremental auto_vacuum mode")
+
+
+if __name__ == "__main__":
+    main()
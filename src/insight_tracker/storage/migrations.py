@@ -0,0 +1,594 @@
+import os
+import re
+import sqlite3
+import threading
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Set
+
+from insight_tracker.storage.connection import connection
+from insight_tracker.storage.facets import LIST_FIELDS, company_facets, decode_list, encode_list
+from insight_tracker.storage.dedupe import company_content_hash, profile_content_hash
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("INSIGHT_TRACKER_DB", "insight_tracker.db")
+# Migration 7 rebuilds files up to this size in place; larger ones are converted offline
+VACUUM_ON_MIGRATE_MAX_BYTES = int(os.getenv("INSIGHT_VACUUM_ON_MIGRATE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Pre-migration layout: one file per concern, imported once into DB_PATH
+LEGACY_DATABASES = {
+    'user_data.db': ['users'],
+    'recent_searches.db': ['profile_searches', 'company_searches'],
+    'user_company_data.db': ['user_companies'],
+}
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+    # Steps such as VACUUM cannot run inside a transaction. These run outside
+    # the migration lock, so they must be safe to apply twice.
+    transactional: bool = True
+
+
+def _create_initial_schema(conn: sqlite3.Connection) -> None:
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            full_name TEXT,
+            email TEXT UNIQUE,
+            company TEXT,
+            role TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS profile_searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email TEXT,
+            full_name TEXT NOT NULL,
+            current_job_title TEXT,
+            current_company TEXT,
+            current_company_url TEXT,
+            professional_background TEXT,
+            past_jobs TEXT,
+            key_achievements TEXT,
+            contact TEXT,
+            linkedin_url TEXT,
+            search_date TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS company_searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email TEXT,
+            company_name TEXT NOT NULL,
+            company_website TEXT,
+            company_linkedin TEXT,
+            company_summary TEXT,
+            company_industry TEXT,
+            company_size TEXT,
+            company_services TEXT,
+            company_industries TEXT,
+            company_awards_recognitions TEXT,
+            company_clients_partners TEXT,
+            company_founded_year INTEGER,
+            company_headquarters TEXT,
+            company_culture TEXT,
+            company_recent_updates TEXT,
+            search_date TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_companies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email TEXT UNIQUE,
+            company_name TEXT,
+            company_website TEXT,
+            company_linkedin TEXT,
+            company_summary TEXT,
+            company_industry TEXT,
+            company_size TEXT,
+            company_services TEXT,
+            company_industries TEXT,
+            company_awards_recognitions TEXT,
+            company_clients_partners TEXT,
+            company_founded_year INTEGER,
+            company_headquarters TEXT,
+            company_culture TEXT,
+            company_recent_updates TEXT
+        )
+    ''')
+
+
+def _import_legacy_databases(conn: sqlite3.Connection) -> None:
+    """Copy rows from the old per-concern files that sit next to the new database"""
+    main_path = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == 'main')
+    if re.search(r'\.shard\d+$', os.path.splitext(os.path.basename(main_path))[0]):
+        # Shards start empty; legacy rows land in the primary database and the
+        # reshard tool moves them to the shard that owns them
+        return
+    base_dir = os.path.dirname(main_path)
+    for filename, tables in LEGACY_DATABASES.items():
+        legacy_path = os.path.join(base_dir, filename)
+        if not os.path.exists(legacy_path) or os.path.abspath(legacy_path) == main_path:
+            continue
+
+        legacy = sqlite3.connect(f"file:{legacy_path}?mode=ro", uri=True)
+        try:
+            for table in tables:
+                legacy_columns = {row[1] for row in legacy.execute(f"PRAGMA table_info({table})")}
+                if not legacy_columns:
+                    continue
+                target_columns = [
+                    row[1] for row in conn.execute(f"PRAGMA table_info({table})")
+                    if row[1] != 'id'
+                ]
+                columns = [c for c in target_columns if c in legacy_columns]
+                column_list = ', '.join(columns)
+                placeholders = ', '.join('?' for _ in columns)
+                rows = legacy.execute(f"SELECT {column_list} FROM {table}").fetchall()
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {table} ({column_list}) VALUES ({placeholders})",
+                    rows
+                )
+                logger.info(f"Imported {len(rows)} rows into {table} from {filename}")
+        finally:
+            legacy.close()
+
+
+def _add_history_indexes(conn: sqlite3.Connection) -> None:
+    # Keyset pagination needs a total order, so legacy rows without a date sort last
+    for table in ('profile_searches', 'company_searches'):
+        conn.execute(f"UPDATE {table} SET search_date = '1970-01-01 00:00:00.000000' WHERE search_date IS NULL")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_profile_searches_user_date
+        ON profile_searches (user_email, search_date DESC, id DESC)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_company_searches_user_date
+        ON company_searches (user_email, search_date DESC, id DESC)
+    ''')
+
+
+def _normalize_company_lists(conn: sqlite3.Connection) -> None:
+    """Move list attributes from comma-joined text to JSON and index them as facets"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS company_search_facets (
+            user_email TEXT NOT NULL,
+            facet TEXT NOT NULL,
+            value_key TEXT NOT NULL,
+            search_id INTEGER NOT NULL REFERENCES company_searches(id) ON DELETE CASCADE,
+            value TEXT NOT NULL,
+            PRIMARY KEY (user_email, facet, value_key, search_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_company_search_facets_search
+        ON company_search_facets (search_id)
+    ''')
+
+    list_columns = ', '.join(LIST_FIELDS)
+    assignments = ', '.join(f"{column} = ?" for column in LIST_FIELDS)
+    for table in ('company_searches', 'user_companies'):
+        rows = conn.execute(f"SELECT id, {list_columns} FROM {table}").fetchall()
+        conn.executemany(
+            f"UPDATE {table} SET {assignments} WHERE id = ?",
+            [[encode_list(decode_list(value)) for value in row[1:]] + [row[0]] for row in rows]
+        )
+
+    columns = ['id', 'user_email', 'company_industry'] + LIST_FIELDS
+    for row in conn.execute(f"SELECT {', '.join(columns)} FROM company_searches").fetchall():
+        fields = dict(zip(columns, row))
+        for name in LIST_FIELDS:
+            fields[name] = decode_list(fields[name])
+        conn.executemany(
+            "INSERT OR IGNORE INTO company_search_facets (user_email, facet, value_key, search_id, value) VALUES (?, ?, ?, ?, ?)",
+            [(fields['user_email'] or '', facet, key, fields['id'], value) for facet, value, key in company_facets(fields)]
+        )
+
+
+def _list_text(column: str) -> str:
+    """SQL reading a JSON list column as its values joined into plain text"""
+    return f"CASE WHEN json_valid({column}) THEN (SELECT group_concat(value, ', ') FROM json_each({column})) " \
+        f"ELSE {column} END"
+
+
+# search_history_fts rowids interleave both sources: profile id * 2, company id * 2 + 1.
+# {date} is search_date until migration 6 renames it to last_seen.
+PROFILE_FTS_ROW = "{row}.id * 2, {row}.full_name, " \
+    "coalesce({row}.current_job_title, '') || ' ' || coalesce({row}.current_company, '') || ' ' || " \
+    "coalesce({row}.professional_background, '') || ' ' || coalesce({row}.past_jobs, '') || ' ' || " \
+    "coalesce({row}.key_achievements, ''), " \
+    "'u' || lower(hex({row}.user_email)), 'profile', {row}.{date}"
+COMPANY_FTS_ROW = "{row}.id * 2 + 1, {row}.company_name, " \
+    "coalesce({row}.company_industry, '') || ' ' || coalesce({row}.company_summary, '') || ' ' || " \
+    "coalesce(" + _list_text("{row}.company_services") + ", '') || ' ' || " \
+    "coalesce(" + _list_text("{row}.company_recent_updates") + ", ''), " \
+    "'u' || lower(hex({row}.user_email)), 'company', {row}.{date}"
+FTS_COLUMNS = "rowid, title, body, owner, kind, search_date"
+
+
+def _index_history_fts(conn: sqlite3.Connection, table: str, row_sql: str, offset: int, date: str) -> None:
+    """(Re)create the triggers mirroring ``table`` into search_history_fts and index its rows"""
+    for event in ('insert', 'delete', 'update'):
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{event}")
+    conn.execute(f'''
+        CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO search_history_fts ({FTS_COLUMNS}) SELECT {row_sql.format(row='new', date=date)};
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM search_history_fts WHERE rowid = old.id * 2 + {offset};
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER {table}_fts_update AFTER UPDATE ON {table} BEGIN
+            DELETE FROM search_history_fts WHERE rowid = old.id * 2 + {offset};
+            INSERT INTO search_history_fts ({FTS_COLUMNS}) SELECT {row_sql.format(row='new', date=date)};
+        END
+    ''')
+    conn.execute(f"DELETE FROM search_history_fts WHERE rowid % 2 = {offset}")
+    conn.execute(f"INSERT INTO search_history_fts ({FTS_COLUMNS}) "
+                 f"SELECT {row_sql.format(row=table, date=date)} FROM {table}")
+
+
+def _add_history_fts(conn: sqlite3.Connection) -> None:
+    """Full-text index over saved research, kept in sync by triggers"""
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_history_fts USING fts5(
+            title,
+            body,
+            owner,
+            kind UNINDEXED,
+            search_date UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    ''')
+    _index_history_fts(conn, 'profile_searches', PROFILE_FTS_ROW, 0, 'search_date')
+    _index_history_fts(conn, 'company_searches', COMPANY_FTS_ROW, 1, 'search_date')
+
+
+def _reindex_company_fts(conn: sqlite3.Connection) -> None:
+    """Index company list attributes as their values instead of the JSON they are stored as"""
+    _index_history_fts(conn, 'company_searches', COMPANY_FTS_ROW, 1, 'last_seen')
+
+
+def _deduplicate_research(conn: sqlite3.Connection) -> None:
+    """Collapse repeated research into one row per entity with first/last seen and a hit count"""
+    conn.create_function('profile_content_hash', 2, profile_content_hash, deterministic=True)
+    conn.create_function('company_content_hash', 1, company_content_hash, deterministic=True)
+
+    for table, hash_sql in (
+        ('profile_searches', 'profile_content_hash(full_name, current_company)'),
+        ('company_searches', 'company_content_hash(company_name)'),
+    ):
+        # Renaming also rewrites the history index and the FTS triggers
+        conn.execute(f"ALTER TABLE {table} RENAME COLUMN search_date TO last_seen")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN content_hash TEXT")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN first_seen TIMESTAMP")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN hit_count INTEGER NOT NULL DEFAULT 1")
+        conn.execute(f"UPDATE {table} SET content_hash = {hash_sql}, first_seen = last_seen")
+
+        # Keep the newest row of each group and fold the older ones into it
+        conn.execute(f'''
+            UPDATE {table} SET
+                first_seen = grouped.first_seen,
+                hit_count = grouped.hits
+            FROM (
+                SELECT MAX(id) AS keep_id, MIN(last_seen) AS first_seen, COUNT(*) AS hits
+                FROM {table}
+                GROUP BY user_email, content_hash
+                HAVING COUNT(*) > 1
+            ) AS grouped
+            WHERE {table}.id = grouped.keep_id
+        ''')
+        conn.execute(f'''
+            DELETE FROM {table}
+            WHERE id NOT IN (SELECT MAX(id) FROM {table} GROUP BY user_email, content_hash)
+        ''')
+        conn.execute(f'''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_user_hash
+            ON {table} (user_email, content_hash)
+        ''')
+
+
+def convert_to_incremental_vacuum(conn: sqlite3.Connection) -> bool:
+    """Switch an existing database to ``auto_vacuum=INCREMENTAL``. The mode
+    only takes effect after a full VACUUM, which rewrites the whole file and
+    holds the write lock throughout. Returns False when already converted."""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def _enable_incremental_vacuum(conn: sqlite3.Connection) -> None:
+    """Let retention hand freed pages back to the OS a few at a time"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_profile_searches_last_seen ON profile_searches (last_seen)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_company_searches_last_seen ON company_searches (last_seen)")
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    size = conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+    if size <= VACUUM_ON_MIGRATE_MAX_BYTES:
+        convert_to_incremental_vacuum(conn)
+        return
+    main_path = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == 'main')
+    logger.warning(
+        f"{main_path} ({size // (1024 * 1024)} MB) keeps its auto_vacuum mode, so deleted rows are not "
+        f"returned to the filesystem. Stop the app and run "
+        f"`python -m insight_tracker.storage.maintenance enable-incremental-vacuum` once to convert it."
+    )
+
+
+def _add_research_payloads(conn: sqlite3.Connection) -> None:
+    """Full streamed research, compressed; read only when a result is opened.
+    The columns come last so list queries never touch the blob's overflow pages."""
+    for table in ('profile_searches', 'company_searches'):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN payload_codec TEXT")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN payload BLOB")
+
+
+def _add_research_cache(conn: sqlite3.Connection) -> None:
+    """Final results of upstream research runs, shared by every user of this database"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS research_cache (
+            cache_key TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            total_tokens INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            expires_at TEXT NOT NULL,
+            hit_count INTEGER NOT NULL DEFAULT 0,
+            payload_codec TEXT NOT NULL,
+            payload BLOB NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_research_cache_expires ON research_cache (expires_at)")
+
+
+def _add_leads(conn: sqlite3.Connection) -> None:
+    """People queued for research, bulk imported from spreadsheets.
+    ``lead_key`` is the profile content hash, so a lead matches the saved search it produces."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS leads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            company TEXT NOT NULL,
+            lead_key TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            source TEXT,
+            imported_at TEXT NOT NULL,
+            researched_at TEXT
+        )
+    ''')
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_leads_user_key ON leads (user_email, lead_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_user_status ON leads (user_email, status, id)")
+
+
+def _add_usage_ledger(conn: sqlite3.Connection) -> None:
+    """One row per API call, rolled up into hourly and daily totals by a trigger
+    so usage dashboards read a few buckets instead of the raw ledger"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS api_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            entity TEXT,
+            total_tokens INTEGER NOT NULL DEFAULT 0,
+            latency_ms REAL NOT NULL DEFAULT 0,
+            cache_hit INTEGER NOT NULL DEFAULT 0,
+            error INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_api_usage_created ON api_usage (created_at)")
+
+    rollups = {
+        'api_usage_hourly': "substr(NEW.created_at, 1, 13) || ':00'",
+        'api_usage_daily': "substr(NEW.created_at, 1, 10)",
+    }
+    for table in rollups:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                user_email TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                cache_hits INTEGER NOT NULL,
+                errors INTEGER NOT NULL,
+                total_tokens INTEGER NOT NULL,
+                latency_ms REAL NOT NULL,
+                PRIMARY KEY (user_email, bucket, endpoint)
+            ) WITHOUT ROWID
+        ''')
+
+    upserts = ''.join(f'''
+            INSERT INTO {table} (user_email, bucket, endpoint, calls, cache_hits, errors, total_tokens, latency_ms)
+            VALUES (NEW.user_email, {bucket}, NEW.endpoint, 1, NEW.cache_hit, NEW.error, NEW.total_tokens, NEW.latency_ms)
+            ON CONFLICT (user_email, bucket, endpoint) DO UPDATE SET
+                calls = calls + 1,
+                cache_hits = cache_hits + excluded.cache_hits,
+                errors = errors + excluded.errors,
+                total_tokens = total_tokens + excluded.total_tokens,
+                latency_ms = latency_ms + excluded.latency_ms;
+    ''' for table, bucket in rollups.items())
+    # Rollups are not decremented on delete, so retention can trim the raw ledger
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS api_usage_rollup AFTER INSERT ON api_usage BEGIN
+            {upserts}
+        END
+    ''')
+
+
+def _add_user_stats(conn: sqlite3.Connection) -> None:
+    """Per-user dashboard counters kept current by triggers on the research tables.
+
+    ``*_searches`` count research runs (the sum of hit_count), ``saved_*`` the
+    deduplicated rows, so ``saved_companies`` is the number of distinct
+    companies. ``user_industry_stats`` counts saved companies per industry
+    facet; rows that drop to zero are removed.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_email TEXT PRIMARY KEY,
+            profile_searches INTEGER NOT NULL DEFAULT 0,
+            company_searches INTEGER NOT NULL DEFAULT 0,
+            saved_profiles INTEGER NOT NULL DEFAULT 0,
+            saved_companies INTEGER NOT NULL DEFAULT 0,
+            last_activity TEXT
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_industry_stats (
+            user_email TEXT NOT NULL,
+            value_key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            companies INTEGER NOT NULL,
+            PRIMARY KEY (user_email, value_key)
+        ) WITHOUT ROWID
+    ''')
+
+    for table, kind, saved in (('profile_searches', 'profile', 'saved_profiles'),
+                               ('company_searches', 'company', 'saved_companies')):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_stats_insert AFTER INSERT ON {table}
+            WHEN NEW.user_email IS NOT NULL BEGIN
+                INSERT INTO user_stats (user_email, {kind}_searches, {saved}, last_activity)
+                VALUES (NEW.user_email, NEW.hit_count, 1, NEW.last_seen)
+                ON CONFLICT (user_email) DO UPDATE SET
+                    {kind}_searches = {kind}_searches + excluded.{kind}_searches,
+                    {saved} = {saved} + 1,
+                    last_activity = max(coalesce(last_activity, ''), excluded.last_activity);
+            END
+        ''')
+        # Repeat research goes through the upsert, which bumps hit_count and last_seen
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_stats_update AFTER UPDATE OF hit_count, last_seen ON {table}
+            WHEN NEW.user_email IS NOT NULL BEGIN
+                UPDATE user_stats SET
+                    {kind}_searches = {kind}_searches + NEW.hit_count - OLD.hit_count,
+                    last_activity = max(coalesce(last_activity, ''), NEW.last_seen)
+                WHERE user_email = NEW.user_email;
+            END
+        ''')
+        # Deletes keep last_activity: it records when the user was last active, not what is still stored
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_stats_delete AFTER DELETE ON {table}
+            WHEN OLD.user_email IS NOT NULL BEGIN
+                UPDATE user_stats SET
+                    {kind}_searches = {kind}_searches - OLD.hit_count,
+                    {saved} = {saved} - 1
+                WHERE user_email = OLD.user_email;
+            END
+        ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS company_search_facets_stats_insert AFTER INSERT ON company_search_facets
+        WHEN NEW.facet = 'industry' BEGIN
+            INSERT INTO user_industry_stats (user_email, value_key, value, companies)
+            VALUES (NEW.user_email, NEW.value_key, NEW.value, 1)
+            ON CONFLICT (user_email, value_key) DO UPDATE SET companies = companies + 1;
+        END
+    ''')
+    # Also fires for facets removed by the ON DELETE CASCADE from company_searches
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS company_search_facets_stats_delete AFTER DELETE ON company_search_facets
+        WHEN OLD.facet = 'industry' BEGIN
+            UPDATE user_industry_stats SET companies = companies - 1
+            WHERE user_email = OLD.user_email AND value_key = OLD.value_key;
+            DELETE FROM user_industry_stats
+            WHERE user_email = OLD.user_email AND value_key = OLD.value_key AND companies <= 0;
+        END
+    ''')
+
+    # Backfill from the rows already stored
+    conn.execute('''
+        INSERT INTO user_stats (user_email, profile_searches, company_searches, saved_profiles, saved_companies, last_activity)
+        SELECT user_email, sum(profile_searches), sum(company_searches), sum(saved_profiles), sum(saved_companies), max(last_activity)
+        FROM (
+            SELECT user_email, sum(hit_count) AS profile_searches, 0 AS company_searches,
+                   count(*) AS saved_profiles, 0 AS saved_companies, max(last_seen) AS last_activity
+            FROM profile_searches WHERE user_email IS NOT NULL GROUP BY user_email
+            UNION ALL
+            SELECT user_email, 0, sum(hit_count), 0, count(*), max(last_seen)
+            FROM company_searches WHERE user_email IS NOT NULL GROUP BY user_email
+        )
+        GROUP BY user_email
+    ''')
+    conn.execute('''
+        INSERT INTO user_industry_stats (user_email, value_key, value, companies)
+        SELECT user_email, value_key, min(value), count(*)
+        FROM company_search_facets
+        WHERE facet = 'industry'
+        GROUP BY user_email, value_key
+    ''')
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial unified schema", _create_initial_schema),
+    Migration(2, "import legacy per-concern database files", _import_legacy_databases),
+    Migration(3, "index search history by user and date", _add_history_indexes),
+    Migration(4, "store company list attributes as JSON with indexed facets", _normalize_company_lists),
+    Migration(5, "full-text index over saved research", _add_history_fts),
+    Migration(6, "deduplicate research by content hash", _deduplicate_research),
+    Migration(7, "index last_seen and enable incremental vacuum", _enable_incremental_vacuum, transactional=False),
+    Migration(8, "store compressed research payloads", _add_research_payloads),
+    Migration(9, "shared research result cache", _add_research_cache),
+    Migration(10, "lead import queue", _add_leads),
+    Migration(11, "API usage ledger with hourly and daily rollups", _add_usage_ledger),
+    Migration(12, "trigger-maintained per-user statistics", _add_user_stats),
+    Migration(13, "index company list attributes as plain text", _reindex_company_fts),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+_migrated: Set[str] = set()
+_migrate_lock = threading.Lock()
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations on ``conn`` and return the resulting schema version"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Read the version inside the write lock so concurrent processes
+        # never apply the same migration twice
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+            logger.info(f"Applying migration {migration.version}: {migration.description}")
+            if migration.transactional:
+                migration.apply(conn)
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+            else:
+                conn.commit()
+                migration.apply(conn)
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+                conn.execute("BEGIN IMMEDIATE")
+            version = migration.version
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return version
+
+
+def ensure_schema(db_path: str = DB_PATH) -> None:
+    """Bring ``db_path`` up to the latest schema once per process"""
+    key = os.path.abspath(db_path)
+    if key in _migrated:
+        return
+    with _migrate_lock:
+        if key in _migrated:
+            return
+        with connection(db_path) as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < SCHEMA_VERSION:
+                version = migrate(conn)
+        logger.info(f"Database {db_path} at schema version {version}")
+        _migrated.add(key)
@@ -0,0 +1,50 @@
+import os
+import json
+import zlib
+import logging
+from typing import Any, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Codec for new payloads: "zlib" (default) or "zstd" when zstandard is installed
+PAYLOAD_CODEC = os.getenv("INSIGHT_PAYLOAD_CODEC", "zlib")
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def _resolve_codec(codec: str) -> str:
+    if codec == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed; storing research payloads with zlib")
+        return "zlib"
+    if codec not in ("zlib", "zstd"):
+        raise ValueError(f"Unknown payload codec: {codec}")
+    return codec
+
+
+def encode_payload(payload: Any, codec: str = PAYLOAD_CODEC) -> Tuple[bytes, str]:
+    """Serialize ``payload`` to compact JSON and compress it; returns ``(blob, codec)``"""
+    codec = _resolve_codec(codec)
+    raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw), codec
+    return zlib.compress(raw, ZLIB_LEVEL), codec
+
+
+def decode_payload(blob: Optional[bytes], codec: Optional[str]) -> Optional[Any]:
+    """Inverse of ``encode_payload``; the codec is stored next to each blob"""
+    if blob is None:
+        return None
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This payload was stored with zstd; install zstandard to read it")
+        raw = zstandard.ZstdDecompressor().decompress(blob)
+    elif codec == "zlib":
+        raw = zlib.decompress(blob)
+    else:
+        raise ValueError(f"Unknown payload codec: {codec}")
+    return json.loads(raw.decode('utf-8'))
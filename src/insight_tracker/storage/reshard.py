@@ -0,0 +1,166 @@
+"""Move user data to the shard that owns it under a new shard layout.
+
+    python -m insight_tracker.storage.reshard --shards 4 [--key domain] [--dry-run]
+
+Scans the primary database and every existing ``*.shardN`` file next to it,
+so it also finishes an interrupted run, drains shards removed by shrinking
+the layout and places legacy rows imported into the primary database. Stop
+the app first, then start it with the new INSIGHT_DB_SHARDS /
+INSIGHT_DB_SHARD_KEY once this completes.
+"""
+import os
+import re
+import glob
+import sqlite3
+import argparse
+import logging
+from collections import defaultdict
+from typing import Dict, List
+
+from insight_tracker.storage.connection import BUSY_TIMEOUT_MS
+from insight_tracker.storage.migrations import DB_PATH, ensure_schema
+from insight_tracker.storage.sharding import SHARD_KEY, ShardRouter, shard_paths
+
+logger = logging.getLogger(__name__)
+
+# Emails moved per transaction
+MOVE_BATCH_SIZE = 200
+
+# table -> column holding the owning user's email
+USER_TABLES = {
+    'users': 'email',
+    'user_companies': 'user_email',
+    'profile_searches': 'user_email',
+    'company_searches': 'user_email',
+    'leads': 'user_email',
+    'api_usage': 'user_email',
+    'api_usage_hourly': 'user_email',
+    'api_usage_daily': 'user_email',
+    'user_stats': 'user_email',
+    'user_industry_stats': 'user_email',
+}
+
+# Kept up to date by triggers on the tables above, which also fire while rows
+# are copied; the source totals replace those partial sums
+ROLLUP_TABLES = {'api_usage_hourly', 'api_usage_daily', 'user_stats', 'user_industry_stats'}
+
+
+def existing_shard_files(primary_path: str = DB_PATH) -> List[str]:
+    stem, ext = os.path.splitext(primary_path)
+    pattern = re.compile(re.escape(stem) + r'\.shard(\d+)' + re.escape(ext or '.db') + '$')
+    found = [path for path in glob.glob(f"{glob.escape(stem)}.shard*{ext or '.db'}") if pattern.match(path)]
+    return sorted(found, key=lambda path: int(pattern.match(path).group(1)))
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> str:
+    return ', '.join(row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})") if row[1] != 'id')
+
+
+def _move_users(conn: sqlite3.Connection, emails: List[str]) -> None:
+    """Copy ``emails``' rows from main into the attached ``dst`` and delete them from main, in one transaction"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM temp.move_emails")
+        conn.executemany("INSERT OR IGNORE INTO temp.move_emails (email) VALUES (?)", [(email,) for email in emails])
+
+        def copy(table: str, email_column: str) -> None:
+            columns = _columns(conn, 'main', table)
+            # Unique keys make reruns idempotent: rows already copied are skipped
+            conflict = 'REPLACE' if table in ROLLUP_TABLES else 'IGNORE'
+            conn.execute(f'''
+                INSERT OR {conflict} INTO dst.{table} ({columns})
+                SELECT {columns} FROM main.{table}
+                WHERE {email_column} IN (SELECT email FROM temp.move_emails)
+            ''')
+
+        for table, email_column in USER_TABLES.items():
+            if table not in ROLLUP_TABLES:
+                copy(table, email_column)
+
+        # Company ids differ between files; re-point facets via the content hash
+        conn.execute('''
+            INSERT OR IGNORE INTO dst.company_search_facets (user_email, facet, value_key, search_id, value)
+            SELECT f.user_email, f.facet, f.value_key, moved.id, f.value
+            FROM main.company_search_facets f
+            JOIN main.company_searches source ON source.id = f.search_id
+            JOIN dst.company_searches moved
+              ON moved.user_email = source.user_email AND moved.content_hash = source.content_hash
+            WHERE f.user_email IN (SELECT email FROM temp.move_emails)
+        ''')
+
+        # Last, once every trigger that feeds them has fired
+        for table, email_column in USER_TABLES.items():
+            if table in ROLLUP_TABLES:
+                copy(table, email_column)
+
+        # Facets cascade and the FTS triggers clean up the search index
+        for table, email_column in USER_TABLES.items():
+            conn.execute(f"DELETE FROM main.{table} WHERE {email_column} IN (SELECT email FROM temp.move_emails)")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def reshard(router: ShardRouter, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    """Move every user not in the shard ``router`` assigns them to. Returns moved users per source -> target."""
+    sources = list(dict.fromkeys([router.global_path] + existing_shard_files(router.global_path) + router.paths))
+    for path in sources:
+        ensure_schema(path)
+
+    moved: Dict[str, Dict[str, int]] = defaultdict(dict)
+    for source in sources:
+        conn = sqlite3.connect(source, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        try:
+            conn.execute("PRAGMA foreign_keys=ON")
+            emails = [row[0] for row in conn.execute('''
+                SELECT email FROM users WHERE email IS NOT NULL
+                UNION SELECT user_email FROM user_companies
+                UNION SELECT user_email FROM profile_searches
+                UNION SELECT user_email FROM company_searches
+                UNION SELECT user_email FROM leads
+                UNION SELECT user_email FROM api_usage_daily
+            ''')]
+            by_target: Dict[str, List[str]] = defaultdict(list)
+            for email in emails:
+                target = router.path_for(email)
+                if target != source:
+                    by_target[target].append(email)
+
+            for target, target_emails in by_target.items():
+                moved[source][target] = len(target_emails)
+                logger.info(f"{'Would move' if dry_run else 'Moving'} {len(target_emails)} users from {source} to {target}")
+                if dry_run:
+                    continue
+                conn.execute("ATTACH DATABASE ? AS dst", (target,))
+                try:
+                    conn.execute("CREATE TEMP TABLE IF NOT EXISTS move_emails (email TEXT PRIMARY KEY)")
+                    for start in range(0, len(target_emails), MOVE_BATCH_SIZE):
+                        _move_users(conn, target_emails[start:start + MOVE_BATCH_SIZE])
+                finally:
+                    conn.execute("DETACH DATABASE dst")
+        finally:
+            conn.close()
+
+    for path in sources:
+        if path not in router.paths:
+            logger.info(f"{path} is no longer part of the layout and can be removed once verified empty")
+    return dict(moved)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move user data into a new shard layout")
+    parser.add_argument("--shards", type=int, required=True, help="number of shards in the new layout")
+    parser.add_argument("--key", choices=("user", "domain"), default=SHARD_KEY, help="shard by full email or by email domain")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would move")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    router = ShardRouter(shard_paths(args.shards), key=args.key)
+    moved = reshard(router, dry_run=args.dry_run)
+    total = sum(count for targets in moved.values() for count in targets.values())
+    print(f"{'Would move' if args.dry_run else 'Moved'} {total} users into {len(router.paths)} shards")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import hashlib
+import logging
+from typing import List, Optional
+
+from insight_tracker.storage.migrations import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# Number of SQLite files user data is spread over. 1 keeps everything in DB_PATH.
+SHARD_COUNT = int(os.getenv("INSIGHT_DB_SHARDS", "1"))
+# "user" shards by the full email; "domain" keeps an organisation's users together
+SHARD_KEY = os.getenv("INSIGHT_DB_SHARD_KEY", "user")
+
+
+def shard_paths(count: int, primary_path: str = DB_PATH) -> List[str]:
+    """Shard 0 is the primary database, so a single-shard layout is the unsharded one"""
+    stem, ext = os.path.splitext(primary_path)
+    return [primary_path] + [f"{stem}.shard{index}{ext or '.db'}" for index in range(1, count)]
+
+
+class ShardRouter:
+    """Maps a user to the SQLite file holding their data.
+
+    Routing is a stable hash of the normalized email (or its domain), so every
+    process agrees on placement without a lookup table. Data that is not owned
+    by a user, such as the shared research cache, lives in ``global_path``.
+    """
+
+    def __init__(self, paths: List[str], key: str = SHARD_KEY):
+        if not paths:
+            raise ValueError("At least one shard path is required")
+        if key not in ("user", "domain"):
+            raise ValueError(f"Unknown shard key: {key}")
+        self.paths = list(paths)
+        self.key = key
+
+    @property
+    def global_path(self) -> str:
+        return self.paths[0]
+
+    def routing_key(self, user_email: str) -> str:
+        email = (user_email or '').strip().lower()
+        if self.key == "domain" and '@' in email:
+            return email.rsplit('@', 1)[1]
+        return email
+
+    def shard_index(self, user_email: str) -> int:
+        if len(self.paths) == 1:
+            return 0
+        digest = hashlib.blake2b(self.routing_key(user_email).encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') % len(self.paths)
+
+    def path_for(self, user_email: Optional[str]) -> str:
+        if user_email is None:
+            return self.global_path
+        return self.paths[self.shard_index(user_email)]
+
+
+_router = ShardRouter(shard_paths(max(SHARD_COUNT, 1)))
+if len(_router.paths) > 1:
+    logger.info(f"Sharding user data over {len(_router.paths)} databases by {_router.key}")
+
+
+def get_router() -> ShardRouter:
+    return _router
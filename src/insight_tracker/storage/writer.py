@@ -0,0 +1,242 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import atexit
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from insight_tracker.storage.connection import connection
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = int(os.getenv("INSIGHT_WRITE_BATCH_SIZE", "200"))
+WRITE_FLUSH_INTERVAL_SECONDS = float(os.getenv("INSIGHT_WRITE_FLUSH_INTERVAL", "0.5"))
+WRITE_QUEUE_MAX = int(os.getenv("INSIGHT_WRITE_QUEUE_MAX", "10000"))
+# Databases (shards) whose part of a batch is committed concurrently
+WRITE_PARALLELISM = int(os.getenv("INSIGHT_WRITE_PARALLELISM", "4"))
+
+
+@dataclass
+class PendingWrite:
+    db_path: str
+    write: Callable[[sqlite3.Connection], None]
+    description: str = ""
+
+
+@dataclass
+class _Barrier:
+    done: threading.Event
+
+
+@dataclass
+class WriterStats:
+    enqueued: int = 0
+    written: int = 0
+    failed: int = 0
+    batches: int = 0
+    flush_seconds: float = 0.0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        data['avg_flush_ms'] = (self.flush_seconds / self.batches) * 1000 if self.batches else 0.0
+        return data
+
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Background writer that groups writes from all sessions into shared transactions.
+
+    Callers hand over a function that performs the write on a connection and
+    return immediately. A single worker thread drains the queue, flushing when
+    ``batch_size`` writes are pending or ``flush_interval`` seconds have passed
+    since the first one, and commits each batch in one transaction per database,
+    committing up to ``parallelism`` databases concurrently. A failing write is
+    rolled back to its own savepoint and logged; it never takes the rest of the
+    batch down with it.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = WRITE_BATCH_SIZE,
+        flush_interval: float = WRITE_FLUSH_INTERVAL_SECONDS,
+        max_queue: int = WRITE_QUEUE_MAX,
+        parallelism: int = WRITE_PARALLELISM
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.parallelism = max(parallelism, 1)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._stats = WriterStats()
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="insight-db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, db_path: str, write: Callable[[sqlite3.Connection], None], description: str = "") -> None:
+        """Queue ``write`` for the next batch. Blocks only if the queue is full."""
+        self._ensure_started()
+        self._queue.put(PendingWrite(db_path, write, description))
+        with self._stats_lock:
+            self._stats.enqueued += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every write submitted before this call is committed"""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        barrier = _Barrier(threading.Event())
+        self._queue.put(barrier)
+        return barrier.done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Flush pending writes and stop the worker thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            data = self._stats.as_dict()
+        data['queue_depth'] = self.depth
+        return data
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[PendingWrite] = []
+            barriers: List[_Barrier] = []
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _Barrier):
+                    barriers.append(item)
+                else:
+                    batch.append(item)
+
+                if stop or barriers or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if stop:
+                # Drain whatever was queued behind the stop marker too
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, _Barrier):
+                        barriers.append(item)
+                    elif item is not _STOP:
+                        batch.append(item)
+
+            if batch:
+                self._write_batch(batch)
+            for barrier in barriers:
+                barrier.done.set()
+            if stop:
+                return
+
+    def _write_db(self, db_path: str, writes: List[PendingWrite]) -> Tuple[int, int]:
+        """Commit one database's share of a batch; returns (written, failed)"""
+        written = failed = 0
+        try:
+            with connection(db_path) as conn:
+                conn.execute("BEGIN")
+                for pending in writes:
+                    conn.execute("SAVEPOINT pending_write")
+                    try:
+                        pending.write(conn)
+                        conn.execute("RELEASE pending_write")
+                        written += 1
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO pending_write")
+                        conn.execute("RELEASE pending_write")
+                        failed += 1
+                        logger.error(f"Write-behind {pending.description or 'write'} failed: {e}")
+        except Exception as e:
+            logger.error(f"Write-behind batch of {len(writes)} writes to {db_path} failed: {e}")
+            return 0, len(writes)
+        return written, failed
+
+    def _write_batch(self, batch: List[PendingWrite]) -> None:
+        started = time.perf_counter()
+        by_db: Dict[str, List[PendingWrite]] = defaultdict(list)
+        for pending in batch:
+            by_db[pending.db_path].append(pending)
+
+        groups = list(by_db.items())
+        results: List[Tuple[int, int]] = []
+        if len(groups) > 1 and self.parallelism > 1:
+            # Each shard has its own write lock, so their commits can overlap.
+            # Plain threads rather than an executor: this also runs from the
+            # atexit drain, after executors stop accepting work.
+            for start in range(0, len(groups), self.parallelism):
+                chunk = groups[start:start + self.parallelism]
+                chunk_results: List[Tuple[int, int]] = [(0, 0)] * len(chunk)
+
+                def write_group(index: int, db_path: str, writes: List[PendingWrite]) -> None:
+                    chunk_results[index] = self._write_db(db_path, writes)
+
+                threads = [
+                    threading.Thread(target=write_group, args=(index, db_path, writes), name="insight-db-writer-shard")
+                    for index, (db_path, writes) in enumerate(chunk)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                results.extend(chunk_results)
+        else:
+            results = [self._write_db(db_path, writes) for db_path, writes in groups]
+        written = sum(result[0] for result in results)
+        failed = sum(result[1] for result in results)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats.written += written
+            self._stats.failed += failed
+            self._stats.batches += 1
+            self._stats.flush_seconds += elapsed_ms / 1000
+            self._stats.last_flush_ms = elapsed_ms
+            self._stats.max_flush_ms = max(self._stats.max_flush_ms, elapsed_ms)
+
+
+_writer = WriteBehindQueue()
+atexit.register(_writer.stop)
+
+
+def get_writer() -> WriteBehindQueue:
+    return _writer
+
+
+def get_writer_stats() -> Dict[str, float]:
+    """Queue depth and flush latency of the process-wide write-behind queue"""
+    return _writer.stats()
@@ -1,14 +1,15 @@
 import streamlit as st
 import pandas as pd
+from contextlib import closing
 from insight_tracker.db import getUserByEmail, save_company_search, get_recent_company_searches
 from insight_tracker.api.client.insight_client import InsightApiClient
 from insight_tracker.api.services.insight_service import InsightService
+from insight_tracker.api.services.research_cache import get_research_cache
 from insight_tracker.api.models.requests import CompanyInsightRequest, ProfileInsightRequest
-from insight_tracker.api.exceptions.api_exceptions import ApiError
-from insight_tracker.api.models.responses import Company
-import asyncio
+from insight_tracker.api.exceptions.api_exceptions import ApiError, ApiTimeoutError
+from insight_tracker.ui.session_state import clear_history_cache
+from insight_tracker.api.models.responses import Company, company_from_insight
 import os
-from insight_tracker.api.models.responses import Company
 from insight_tracker.db import get_user_company_info
 import json
 from datetime import datetime
@@ -95,12 +96,6 @@ def inject_css():
         </style>
     """, unsafe_allow_html=True)
 
-def run_async(coroutine):
-    """Helper function to run async code"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coroutine)
-
 def get_verification_badge(status):
     """Return appropriate badge based on verification status"""
     if status.lower() == 'verified':
@@ -127,6 +122,46 @@ def get_verification_color(status):
     else:
         return "#4A90E2"  # Blue
 
+def format_age(timestamp):
+    """'3h ago' style age of a stored SEARCH_DATE_FORMAT timestamp"""
+    try:
+        seconds = (datetime.now() - datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S.%f")).total_seconds()
+    except (TypeError, ValueError):
+        return "unknown"
+    if seconds < 3600:
+        return f"{max(int(seconds // 60), 1)}m ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h ago"
+    return f"{int(seconds // 86400)}d ago"
+
+def field_freshness_note(field_key):
+    """Per-field freshness line: when the research last ran and when the value last changed"""
+    freshness = st.session_state.get('company_field_freshness', {}).get(field_key)
+    if not freshness:
+        return ""
+    note = f"🕒 Checked {format_age(freshness.get('checked_at'))}"
+    if freshness.get('changed_at') != freshness.get('checked_at'):
+        note += f" · unchanged for {format_age(freshness.get('changed_at')).replace(' ago', '')}"
+    return note
+
+def apply_company_result(event, user_email):
+    """Put a `complete` event (live, cached or refreshed) into session state and history"""
+    content = event['content']
+    if 'company_insight' in content:
+        st.session_state.company_result = content['company_insight']
+    if 'trust_evaluation' in content:
+        st.session_state.company_trust_evaluation = content['trust_evaluation']
+    st.session_state.company_field_freshness = event.get('field_freshness') or {}
+    if content.get('company_insight'):
+        # Keep the full result (verification, sources, trust) beyond this session
+        save_company_search(
+            user_email,
+            company_from_insight(content['company_insight']),
+            payload=content
+        )
+        clear_history_cache()
+    st.session_state.company_search_completed = True
+
 def company_insight_section():
     inject_css()
     st.header("Company Insight")
@@ -140,7 +175,7 @@ def company_insight_section():
         openai_api_key=os.getenv("OPENAI_API_KEY"),
         verify_ssl=False
     )
-    insight_service = InsightService(api_client)
+    insight_service = InsightService(api_client, cache=get_research_cache(), stale_while_revalidate=True, user_email=user_email)
 
     # Input fields for company name and industry
     company_name = st.text_input("Company to research")
@@ -168,72 +203,78 @@ def company_insight_section():
                     transition_status = st.empty()
                 
                 # Regular synchronous iteration
-                for event in insight_service.get_company_analysis_stream(
+                with closing(insight_service.get_company_analysis_stream(
                     company_name=company_name,
                     industry=industry
-                ):
-                    print(f"Debug - UI got event: {event}")
-                    event_type = event.get('type')
-                    content = event.get('content')
+                )) as events:
+                    for event in events:
+                        print(f"Debug - UI got event: {event}")
+                        event_type = event.get('type')
+                        content = event.get('content')
                     
-                    # Add event to history
-                    st.session_state.company_event_history.append({
-                        'type': event_type,
-                        'content': content,
-                        'timestamp': datetime.now().strftime("%H:%M:%S")
-                    })
+                        # Add event to history
+                        st.session_state.company_event_history.append({
+                            'type': event_type,
+                            'content': content,
+                            'timestamp': datetime.now().strftime("%H:%M:%S")
+                        })
                     
-                    # Update UI based on event type
-                    with progress_container.container():
-                        if event_type == "agent_start" and content and content.get('name') and content.get('function'):
-                            # Clear previous agent's thoughts and tasks
-                            thought_status.empty()
-                            task_status.empty()
-                            transition_status.empty()
+                        # Update UI based on event type
+                        with progress_container.container():
+                            if event_type == "agent_start" and content and content.get('name') and content.get('function'):
+                                # Clear previous agent's thoughts and tasks
+                                thought_status.empty()
+                                task_status.empty()
+                                transition_status.empty()
                             
-                            # Add special styling for industry researcher
-                            agent_name = content['name']
-                            agent_function = content['function']
+                                # Add special styling for industry researcher
+                                agent_name = content['name']
+                                agent_function = content['function']
                             
-                            if "industry" in agent_name.lower():
-                                agent_status.markdown(f"""
-                                🏭 **Current Agent: {agent_name}**  
-                                *{agent_function}*
-                                """)
-                            else:
-                                agent_status.markdown(f"""
-                                🤖 **Current Agent: {agent_name}**  
-                                *{agent_function}*
-                                """)
+                                if "industry" in agent_name.lower():
+                                    agent_status.markdown(f"""
+                                    🏭 **Current Agent: {agent_name}**  
+                                    *{agent_function}*
+                                    """)
+                                else:
+                                    agent_status.markdown(f"""
+                                    🤖 **Current Agent: {agent_name}**  
+                                    *{agent_function}*
+                                    """)
                             
-                        elif event_type == "thought" and content:
-                            thought_status.markdown(f"💭 **Thinking:**  \n{content}")
-                            # Clear previous task when new thought starts
-                            task_status.empty()
+                            elif event_type == "thought" and content:
+                                thought_status.markdown(f"💭 **Thinking:**  \n{content}")
+                                # Clear previous task when new thought starts
+                                task_status.empty()
                             
-                        elif event_type == "task_complete" and content:
-                            task_status.markdown(f"✅ **Completed:**  \n{content}")
+                            elif event_type == "task_complete" and content:
+                                task_status.markdown(f"✅ **Completed:**  \n{content}")
                             
-                        elif event_type == "transition" and content:
-                            # Clear all previous states for transition
-                            agent_status.empty()
-                            thought_status.empty()
-                            task_status.empty()
-                            transition_status.markdown(f"🔄 **Transition:**  \n{content}")
+                            elif event_type == "transition" and content:
+                                # Clear all previous states for transition
+                                agent_status.empty()
+                                thought_status.empty()
+                                task_status.empty()
+                                transition_status.markdown(f"🔄 **Transition:**  \n{content}")
                             
-                        elif event_type == "complete" and content:
-                            task_status.empty()
-                            if 'company_insight' in content:
-                                st.session_state.company_result = content['company_insight']
-                            if 'trust_evaluation' in content:
-                                st.session_state.company_trust_evaluation = content['trust_evaluation']
-                            st.session_state.company_search_completed = True
-                            st.success("✨ Analysis Complete!")
-                            break
+                            elif event_type == "complete" and content:
+                                task_status.empty()
+                                apply_company_result(event, user_email)
+                                # Remember what is being refreshed so the new result can be swapped in
+                                st.session_state.company_revalidating = (
+                                    (company_name, industry) if event.get('revalidating') else None
+                                )
+                                st.success("✨ Analysis Complete!")
+                                if event.get('cached'):
+                                    st.info(f"♻️ Reused research from {event.get('cached_at', '')[:16]} instead of starting a new run")
+                                break
                             
-                        elif event_type == "error" and content:
-                            raise Exception(content)
+                            elif event_type == "error" and content:
+                                raise Exception(content)
                     
+            except ApiTimeoutError as e:
+                print(f"Debug - Timeout in UI: {str(e)}")
+                st.error("⏱️ The research service took too long to respond. Please try again in a moment.")
             except Exception as e:
                 print(f"Debug - Error in UI: {str(e)}")
                 st.error(f"An unexpected issue occurred during research: {str(e)}")
@@ -279,6 +320,20 @@ def company_insight_section():
             
             # Main Company Section
             st.header("📊 Company Analysis Results")
+
+            revalidating = st.session_state.get('company_revalidating')
+            if revalidating:
+                if insight_service.is_refreshing_company_analysis(*revalidating):
+                    st.info("⏳ Showing earlier research while a refreshed run completes in the background.")
+                if st.button("🔄 Load refreshed research", key="load_refreshed_company"):
+                    if insight_service.is_refreshing_company_analysis(*revalidating):
+                        st.warning("The refresh is still running. Try again in a minute.")
+                    else:
+                        refreshed = insight_service.get_cached_company_analysis(*revalidating)
+                        st.session_state.company_revalidating = None
+                        if refreshed:
+                            apply_company_result(refreshed, user_email)
+                        st.rerun()
             
             # Debug output
             print(f"Debug - Company result keys: {st.session_state.company_result.keys() if st.session_state.company_result else 'None'}")
@@ -396,6 +451,9 @@ def company_insight_section():
                                 {badge}
                             </div>
                         </div>
+                        <div style="color: #999; font-size: 0.8em; margin-top: 0.2rem;">
+                            {field_freshness_note(field_key)}
+                        </div>
                     </div>
                 """, unsafe_allow_html=True)
                 
@@ -554,6 +612,9 @@ def company_insight_section():
                                 """, unsafe_allow_html=True)
                                 
                                 st.markdown(section_data.get('value', 'N/A'))
+                                freshness_note = field_freshness_note(section_key)
+                                if freshness_note:
+                                    st.caption(freshness_note)
                                 
                                 with st.expander("🔍 Sources & Verification", expanded=False):
                                     # Sources
@@ -570,6 +631,9 @@ def company_insight_section():
                                         st.markdown(f"- {notes}")
                             
                             elif isinstance(section_data, list):
+                                freshness_note = field_freshness_note(section_key)
+                                if freshness_note:
+                                    st.caption(freshness_note)
                                 for item in section_data:
                                     if isinstance(item, dict) and item.get('value'):
                                         verification_level = item.get('verification_level', 'N/A')
@@ -1,16 +1,11 @@
 import streamlit as st
 from insight_tracker.api.client.insight_client import InsightApiClient
+from insight_tracker.api.client.http import run_async
 from insight_tracker.api.services.insight_service import InsightService
 from insight_tracker.db import save_user_company_info, create_user_if_not_exists
 import os
-import asyncio
 from insight_tracker.ui.components.loading_dialog import show_loading_dialog
 
-def run_async(coroutine):
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coroutine)
-
 def onboarding_section(user_email):
     # Initialize onboarding data
     if 'onboarding_data' not in st.session_state:
@@ -130,7 +125,7 @@ def onboarding_section(user_email):
                     openai_api_key=os.getenv('OPENAI_API_KEY'),
                     verify_ssl=False
                 )
-                insight_service = InsightService(api_client)
+                insight_service = InsightService(api_client, user_email=user_email)
 
                 # Get company data based on input method
                 if company_input_method == "Company Name & Industry":
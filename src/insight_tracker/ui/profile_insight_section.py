@@ -1,11 +1,16 @@
 import streamlit as st
 import os
-import asyncio
 import urllib3
+from contextlib import closing
 from insight_tracker.db import getUserByEmail, save_profile_search, get_recent_profile_searches, get_user_company_info
+from insight_tracker.db import get_pending_leads, get_lead_counts, update_lead_status
+from insight_tracker.leads import LEAD_FILE_TYPES, import_lead_file
 from insight_tracker.api.client.insight_client import InsightApiClient
 from insight_tracker.api.services.insight_service import InsightService
-from insight_tracker.api.exceptions.api_exceptions import ApiError
+from insight_tracker.api.services.research_cache import get_research_cache
+from insight_tracker.api.exceptions.api_exceptions import ApiError, ApiTimeoutError
+from insight_tracker.ui.session_state import clear_history_cache
+from insight_tracker.api.models.responses import profile_from_insight
 import re
 from streamlit.runtime.scriptrunner import add_script_run_ctx
 from datetime import datetime
@@ -14,12 +19,6 @@ from datetime import datetime
 # Disable SSL verification warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-def run_async(coroutine):
-    """Helper function to run async code"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coroutine)
-
 def inject_css():
     # First override Streamlit's default theme
     st.markdown("""
@@ -151,6 +150,44 @@ def get_verification_color(status):
     else:
         return "#4A90E2"  # Blue
 
+def start_lead_research(lead):
+    st.session_state.active_lead = {'id': lead.id, 'full_name': lead.full_name, 'company': lead.company}
+
+def lead_queue_section(user_email):
+    """Bulk-imported leads waiting for research"""
+    counts = get_lead_counts(user_email)
+    pending = counts.get('pending', 0)
+    with st.expander(f"📥 Lead queue ({pending:,} pending)", expanded=False):
+        uploaded = st.file_uploader(
+            "Import leads from a spreadsheet with name and company columns",
+            type=list(LEAD_FILE_TYPES),
+            key="lead_upload"
+        )
+        if uploaded is not None and st.button("Import leads", key="import_leads"):
+            with st.spinner("Importing leads..."):
+                try:
+                    report = import_lead_file(user_email, uploaded, uploaded.name)
+                except (ValueError, RuntimeError) as e:
+                    st.error(str(e))
+                else:
+                    st.success(f"Queued {report.inserted:,} of {report.rows:,} rows "
+                               f"({report.duplicates:,} duplicates, {report.invalid:,} invalid)")
+                    for error in report.errors:
+                        st.caption(error)
+                    counts = get_lead_counts(user_email)
+
+        if counts:
+            st.caption(" · ".join(f"{status.title()}: {count:,}" for status, count in sorted(counts.items())))
+        for lead in get_pending_leads(user_email, limit=10):
+            col1, col2, col3 = st.columns([4, 1, 1])
+            with col1:
+                st.write(f"**{lead.full_name}** — {lead.company}")
+            with col2:
+                st.button("Research", key=f"research_lead_{lead.id}", on_click=start_lead_research, args=(lead,))
+            with col3:
+                st.button("Skip", key=f"skip_lead_{lead.id}", on_click=update_lead_status,
+                          args=(user_email, lead.id, 'skipped'))
+
 def profile_insight_section():
     inject_css()
     st.header("Profile Insight")
@@ -164,11 +201,14 @@ def profile_insight_section():
         openai_api_key=os.getenv("OPENAI_API_KEY"),
         verify_ssl=False
     )
-    insight_service = InsightService(api_client)
+    insight_service = InsightService(api_client, cache=get_research_cache(), user_email=user_email)
+
+    lead_queue_section(user_email)
+    active_lead = st.session_state.get('active_lead') or {}
 
     # Input fields
-    name = st.text_input("Name of the person you want to research")
-    company = st.text_input("Their company")
+    name = st.text_input("Name of the person you want to research", value=active_lead.get('full_name', ''))
+    company = st.text_input("Their company", value=active_lead.get('company', ''))
 
     # Create placeholders for updates
     if 'status_placeholder' not in st.session_state:
@@ -240,63 +280,80 @@ def profile_insight_section():
                     transition_status = st.empty()
                 
                 # Regular synchronous iteration
-                for event in insight_service.get_profile_analysis_stream(
+                with closing(insight_service.get_profile_analysis_stream(
                     full_name=name,
                     company_name=company
-                ):
-                    print(f"Debug - UI got event: {event}")
-                    event_type = event.get('type')
-                    content = event.get('content')
+                )) as events:
+                    for event in events:
+                        print(f"Debug - UI got event: {event}")
+                        event_type = event.get('type')
+                        content = event.get('content')
                     
-                    # Add event to history
-                    st.session_state.event_history.append({
-                        'type': event_type,
-                        'content': content,
-                        'timestamp': datetime.now().strftime("%H:%M:%S")
-                    })
+                        # Add event to history
+                        st.session_state.event_history.append({
+                            'type': event_type,
+                            'content': content,
+                            'timestamp': datetime.now().strftime("%H:%M:%S")
+                        })
                     
-                    # Update UI based on event type
-                    with progress_container.container():
-                        if event_type == "agent_start" and content and content.get('name') and content.get('function'):
-                            # Clear previous agent's thoughts and tasks
-                            thought_status.empty()
-                            task_status.empty()
-                            transition_status.empty()
+                        # Update UI based on event type
+                        with progress_container.container():
+                            if event_type == "agent_start" and content and content.get('name') and content.get('function'):
+                                # Clear previous agent's thoughts and tasks
+                                thought_status.empty()
+                                task_status.empty()
+                                transition_status.empty()
                             
-                            agent_status.markdown(f"""
-                            🤖 **Current Agent: {content['name']}**  
-                            *{content['function']}*
-                            """)
+                                agent_status.markdown(f"""
+                                🤖 **Current Agent: {content['name']}**  
+                                *{content['function']}*
+                                """)
                             
-                        elif event_type == "thought" and content:
-                            thought_status.markdown(f"💭 **Thinking:**  \n{content}")
-                            # Clear previous task when new thought starts
-                            task_status.empty()
+                            elif event_type == "thought" and content:
+                                thought_status.markdown(f"💭 **Thinking:**  \n{content}")
+                                # Clear previous task when new thought starts
+                                task_status.empty()
                             
-                        elif event_type == "task_complete" and content:
-                            task_status.markdown(f"✅ **Completed:**  \n{content}")
+                            elif event_type == "task_complete" and content:
+                                task_status.markdown(f"✅ **Completed:**  \n{content}")
                             
-                        elif event_type == "transition" and content:
-                            # Clear all previous states for transition
-                            agent_status.empty()
-                            thought_status.empty()
-                            task_status.empty()
-                            transition_status.markdown(f"🔄 **Transition:**  \n{content}")
+                            elif event_type == "transition" and content:
+                                # Clear all previous states for transition
+                                agent_status.empty()
+                                thought_status.empty()
+                                task_status.empty()
+                                transition_status.markdown(f"🔄 **Transition:**  \n{content}")
                             
-                        elif event_type == "complete" and content:
-                            thought_status.empty()
-                            task_status.empty()
-                            if 'profile_insight' in content:
-                                st.session_state.profile_result = content['profile_insight']
-                            if 'trust_evaluation' in content:
-                                st.session_state.trust_evaluation = content['trust_evaluation']
-                            st.session_state.search_completed = True
-                            st.success("✨ Analysis Complete!")
-                            break
+                            elif event_type == "complete" and content:
+                                thought_status.empty()
+                                task_status.empty()
+                                if 'profile_insight' in content:
+                                    st.session_state.profile_result = content['profile_insight']
+                                if 'trust_evaluation' in content:
+                                    st.session_state.trust_evaluation = content['trust_evaluation']
+                                if content.get('profile_insight'):
+                                    # Keep the full result (verification, sources, trust) beyond this session
+                                    save_profile_search(
+                                        user_email,
+                                        profile_from_insight(content['profile_insight']),
+                                        payload=content
+                                    )
+                                    clear_history_cache()
+                                    if active_lead and (name, company) == (active_lead['full_name'], active_lead['company']):
+                                        update_lead_status(user_email, active_lead['id'], 'researched')
+                                        st.session_state.active_lead = None
+                                st.session_state.search_completed = True
+                                st.success("✨ Analysis Complete!")
+                                if event.get('cached'):
+                                    st.info(f"♻️ Reused research from {event.get('cached_at', '')[:16]} instead of starting a new run")
+                                break
                             
-                        elif event_type == "error" and content:
-                            raise Exception(content)
+                            elif event_type == "error" and content:
+                                raise Exception(content)
                     
+            except ApiTimeoutError as e:
+                print(f"Debug - Timeout in UI: {str(e)}")
+                st.error("⏱️ The research service took too long to respond. Please try again in a moment.")
             except Exception as e:
                 print(f"Debug - Error in UI: {str(e)}")
                 st.error(f"An unexpected issue occurred during research: {str(e)}")
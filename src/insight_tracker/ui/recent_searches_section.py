@@ -1,7 +1,14 @@
 import streamlit as st
-from insight_tracker.db import get_recent_profile_searches, get_recent_company_searches
+import html
+import os
+import tempfile
+from insight_tracker.db import get_profile_search_page, get_company_search_page, find_companies_by_facets, get_facet_values, search_history, get_research_payload, SNIPPET_START, SNIPPET_END, flush_pending_writes
 from datetime import datetime
 from insight_tracker.api.models.responses import ProfessionalProfile
+from insight_tracker.export import EXPORT_FORMATS, export_research
+from insight_tracker.ui.session_state import clear_history_cache
+
+HISTORY_PAGE_SIZE = 10
 
 def inject_recent_searches_css():
     st.markdown("""
@@ -45,6 +52,10 @@ def inject_recent_searches_css():
             text-align: right;
             margin-top: 10px;
         }
+        .search-snippet mark {
+            background-color: #fff3bf;
+            padding: 0 2px;
+        }
         .no-searches-message {
             color: #888;
             font-style: italic;
@@ -57,6 +68,15 @@ def inject_recent_searches_css():
         </style>
     """, unsafe_allow_html=True)
 
+def format_seen(last_seen, hit_count=1):
+    """Footer line for a deduplicated history card"""
+    if not last_seen:
+        return ""
+    text = f"Last researched {format_date(last_seen)}"
+    if hit_count and hit_count > 1:
+        text += f" · {hit_count} times"
+    return text
+
 def format_date(date_string):
     try:
         date_obj = datetime.strptime(date_string, "%Y-%m-%d %H:%M:%S.%f")
@@ -64,7 +84,56 @@ def format_date(date_string):
     except ValueError:
         return "N/A"
 
-def display_profile_search(profile: ProfessionalProfile, index):
+def display_research_field(name, field_data):
+    label = name.replace('_', ' ').title()
+    if not isinstance(field_data, dict) or 'value' not in field_data:
+        st.markdown(f"**{label}:** {field_data}")
+        return
+    value = field_data.get('value')
+    if isinstance(value, list):
+        value = ', '.join(str(item) for item in value)
+    status = field_data.get('verification_status') or field_data.get('verification_level')
+    st.markdown(f"**{label}:** {value if value else 'N/A'}" + (f"  \n*{status}*" if status else ""))
+    for source in field_data.get('sources') or []:
+        st.markdown(f"- {source}")
+
+def display_research_payload(kind, payload):
+    """Render a saved streamed result: every field with its verification and sources"""
+    insight = payload.get(f'{kind}_insight') or {}
+    if kind == 'company' and isinstance(insight.get('company'), dict):
+        sections = [(None, insight['company'])] + [(key, value) for key, value in insight.items() if key != 'company']
+    else:
+        sections = [(None, insight)]
+    for title, section in sections:
+        if title:
+            st.markdown(f"#### {title.replace('_', ' ').title()}")
+        if isinstance(section, dict):
+            for name, field_data in section.items():
+                display_research_field(name, field_data)
+        else:
+            st.write(section)
+    if payload.get('trust_evaluation'):
+        st.markdown("#### Trust Evaluation")
+        st.json(payload['trust_evaluation'], expanded=False)
+
+def open_research(kind, research_id):
+    st.session_state.open_research = (kind, research_id)
+
+def research_payload_action(kind, research_id, has_payload):
+    """'View full research' button; the blob is only read and decompressed once opened"""
+    if not has_payload:
+        return
+    if st.session_state.get('open_research') != (kind, research_id):
+        st.button("📄 View full research", key=f"open_{kind}_{research_id}",
+                  on_click=open_research, args=(kind, research_id))
+        return
+    payload = get_research_payload(st.session_state.user.get('email'), kind, research_id)
+    if payload is None:
+        st.info("The full research for this entry is no longer available.")
+        return
+    display_research_payload(kind, payload)
+
+def display_profile_search(profile: ProfessionalProfile, index, last_seen=None, hit_count=1, research_id=None, has_payload=False):
     
     expander_title = profile.full_name or "Unknown"
     if profile.current_job_title:
@@ -97,10 +166,12 @@ def display_profile_search(profile: ProfessionalProfile, index):
             <div class="search-details">
                 {details_html}
             </div>
+            <div class="search-date">{format_seen(last_seen, hit_count)}</div>
         </div>
         """, unsafe_allow_html=True)
+        research_payload_action('profile', research_id, has_payload)
 
-def display_company_search(company, index):
+def display_company_search(company, index, last_seen=None, hit_count=1, research_id=None, has_payload=False):
     expander_title = company.company_name or "Unknown Company"
     if company.company_industry:
         expander_title += f" - {company.company_industry}"
@@ -140,8 +211,96 @@ def display_company_search(company, index):
             <div class="search-details">
                 {details_html}
             </div>
+            <div class="search-date">{format_seen(last_seen, hit_count)}</div>
         </div>
         """, unsafe_allow_html=True)
+        research_payload_action('company', research_id, has_payload)
+
+def load_history(state_key, fetch_page, user_email):
+    """Return the history pages loaded so far, fetching the first page on first view"""
+    history = st.session_state.get(state_key)
+    if history is None or history['user_email'] != user_email:
+        # Saves are written behind; the cache was just cleared by one
+        flush_pending_writes()
+        page = fetch_page(user_email, limit=HISTORY_PAGE_SIZE)
+        history = {'user_email': user_email, 'entries': page.entries, 'cursor': page.next_cursor}
+        st.session_state[state_key] = history
+    return history
+
+def load_more_history(state_key, fetch_page):
+    """Button callback appending the next keyset page to the loaded history"""
+    history = st.session_state[state_key]
+    page = fetch_page(history['user_email'], limit=HISTORY_PAGE_SIZE, after=history['cursor'])
+    history['entries'] = history['entries'] + page.entries
+    history['cursor'] = page.next_cursor
+
+def display_history_hit(hit):
+    icon = "👤" if hit.kind == "profile" else "🏢"
+    # Escape the stored text, then turn the FTS match markers into highlights
+    snippet = html.escape(hit.snippet or "").replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>")
+    st.markdown(f"""
+    <div class="recent-search-card">
+        <div class="search-type">{icon} {hit.kind}</div>
+        <div class="search-title">{html.escape(hit.title or 'Unknown')}</div>
+        <div class="search-details search-snippet">{snippet}</div>
+        <div class="search-date">{format_date(hit.search_date) if hit.search_date else ''}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def history_search_results(user_email, query):
+    """Ranked full-text results for ``query``, with more pages fetched on demand"""
+    results = st.session_state.get('history_search')
+    if results is None or results['query'] != query or results['user_email'] != user_email:
+        flush_pending_writes()
+        page = search_history(user_email, query, limit=HISTORY_PAGE_SIZE)
+        results = {'query': query, 'user_email': user_email, 'hits': page.hits, 'cursor': page.next_cursor}
+        st.session_state.history_search = results
+    return results
+
+def load_more_search_results():
+    results = st.session_state.history_search
+    page = search_history(results['user_email'], results['query'], limit=HISTORY_PAGE_SIZE, cursor=results['cursor'])
+    results['hits'] = results['hits'] + page.hits
+    results['cursor'] = page.next_cursor
+
+def prepare_export(user_email, kind, fmt):
+    """Stream the export into a temp file, replacing the previous one, and remember it for download"""
+    previous = st.session_state.pop('history_export', None)
+    if previous and os.path.exists(previous['path']):
+        os.unlink(previous['path'])
+    mime, extension = EXPORT_FORMATS[fmt]
+    with tempfile.NamedTemporaryFile(prefix=f"insight-{kind}-", suffix=extension, delete=False) as out:
+        export_research(user_email, kind, fmt, out)
+    st.session_state.history_export = {
+        'path': out.name,
+        'mime': mime,
+        'file_name': f"{kind}_research{extension}",
+    }
+
+def export_section(user_email):
+    with st.expander("⬇️ Export research history", expanded=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            kind = st.selectbox("Research", ["profile", "company"], format_func=lambda k: f"{k.title()} searches", key="export_kind")
+        with col2:
+            fmt = st.selectbox("Format", list(EXPORT_FORMATS), format_func=str.upper, key="export_format")
+        if st.button("Prepare export", key="prepare_export"):
+            with st.spinner("Exporting..."):
+                try:
+                    prepare_export(user_email, kind, fmt)
+                except RuntimeError as e:
+                    st.error(str(e))
+        export = st.session_state.get('history_export')
+        if export and os.path.exists(export['path']):
+            # Rows were streamed to disk in chunks; Streamlit still reads the finished file to serve it
+            with open(export['path'], 'rb') as exported:
+                st.download_button(
+                    f"Download {export['file_name']} ({os.path.getsize(export['path']) / 1024:,.0f} KB)",
+                    data=exported,
+                    file_name=export['file_name'],
+                    mime=export['mime'],
+                    key="download_export",
+                )
 
 def recent_searches_section():
     inject_recent_searches_css()
@@ -149,26 +308,60 @@ def recent_searches_section():
 
     user_email = st.session_state.user.get('email')
 
+    query = st.text_input("Search your research", placeholder="e.g. fintech payments, Series B, cloud migration")
+    if query.strip():
+        results = history_search_results(user_email, query.strip())
+        if results['hits']:
+            for hit in results['hits']:
+                display_history_hit(hit)
+            if results['cursor']:
+                st.button("More results", key="more_search_results", on_click=load_more_search_results)
+        else:
+            st.markdown('<div class="no-searches-message">No saved research matches your search</div>', unsafe_allow_html=True)
+        return
+
+    if st.button("🔄 Refresh", key="refresh_history"):
+        clear_history_cache()
+
+    export_section(user_email)
+
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("Profile Searches")
-        profile_searches = get_recent_profile_searches(user_email, limit=5)
-        if profile_searches:
-            for index, profile in enumerate(profile_searches):
-                print(profile)
-                display_profile_search(profile, index)
+        profile_history = load_history('profile_history', get_profile_search_page, user_email)
+        if profile_history['entries']:
+            for index, entry in enumerate(profile_history['entries']):
+                display_profile_search(entry.record, index, entry.last_seen, entry.hit_count, entry.id, entry.has_payload)
+            if profile_history['cursor']:
+                st.button("Load more profiles", key="more_profiles",
+                          on_click=load_more_history, args=('profile_history', get_profile_search_page))
         else:
             st.markdown('<div class="no-searches-message">No recent profile searches</div>', unsafe_allow_html=True)
 
     with col2:
         st.subheader("Company Searches")
-        company_searches = get_recent_company_searches(user_email, limit=5)
-        if company_searches:
-            for index, company in enumerate(company_searches):
-                display_company_search(company, index)
+        with st.expander("🔎 Filter by industry or service", expanded=False):
+            industry = st.selectbox("Industry", ["Any"] + [value for value, _ in get_facet_values(user_email, 'industry')], key="facet_industry")
+            service = st.selectbox("Service", ["Any"] + [value for value, _ in get_facet_values(user_email, 'service')], key="facet_service")
+        facets = {name: value for name, value in (('industry', industry), ('service', service)) if value != "Any"}
+
+        company_history = load_history('company_history', get_company_search_page, user_email)
+        if facets:
+            matches = find_companies_by_facets(user_email, facets)
+            if matches:
+                for index, entry in enumerate(matches):
+                    display_company_search(entry.record, index, entry.last_seen, entry.hit_count, entry.id, entry.has_payload)
+            else:
+                st.markdown('<div class="no-searches-message">No saved companies match these filters</div>', unsafe_allow_html=True)
+        elif company_history['entries']:
+            for index, entry in enumerate(company_history['entries']):
+                display_company_search(entry.record, index, entry.last_seen, entry.hit_count, entry.id, entry.has_payload)
+            if company_history['cursor']:
+                st.button("Load more companies", key="more_companies",
+                          on_click=load_more_history, args=('company_history', get_company_search_page))
         else:
             st.markdown('<div class="no-searches-message">No recent company searches</div>', unsafe_allow_html=True)
 
-    if not profile_searches and not company_searches:
+    if not profile_history['entries'] and not company_history['entries']:
         st.markdown('<div class="no-searches-message">You haven\'t made any searches yet. Start by searching for a profile or company!</div>', unsafe_allow_html=True)
\ No newline at end of file
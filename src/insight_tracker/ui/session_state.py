@@ -95,4 +95,12 @@ def initialize_session_state():
         
         for key, default_value in defaults.items():
             if key not in st.session_state:
-                st.session_state[key] = default_value
\ No newline at end of file
+                st.session_state[key] = default_value
+
+# Saved research shown on the Recent Searches page, loaded once and kept across reruns
+HISTORY_STATE_KEYS = ('profile_history', 'company_history', 'history_search')
+
+def clear_history_cache():
+    """Drop the loaded history pages and search results so the next view reads them again"""
+    for key in HISTORY_STATE_KEYS:
+        st.session_state.pop(key, None)
@@ -1,22 +1,17 @@
 import streamlit as st
-from insight_tracker.db import create_user_if_not_exists, save_user_company_info
+from contextlib import closing
+from insight_tracker.db import create_user_if_not_exists, save_user_company_info, get_usage_rollup
 from insight_tracker.api.client.insight_client import InsightApiClient
 from insight_tracker.api.services.insight_service import InsightService
 from insight_tracker.api.exceptions.api_exceptions import ApiError
 import os
-import asyncio
 import urllib3
-from datetime import datetime
+import pandas as pd
+from datetime import datetime, timedelta
 
 # Disable SSL verification warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-def run_async(coroutine):
-    """Helper function to run async code"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coroutine)
-
 def inject_css():
     st.markdown("""
         <style>
@@ -133,6 +128,39 @@ def display_company_data(company):
     
     st.markdown('</div></div>', unsafe_allow_html=True)
 
+def usage_dashboard(user_email):
+    """Token and call totals read from the pre-aggregated usage rollups"""
+    st.subheader("📊 API Usage")
+    window = st.radio("Period", ["Last 48 hours", "Last 30 days"], horizontal=True, key="usage_window")
+    if window == "Last 48 hours":
+        buckets = get_usage_rollup(user_email, 'hourly', since=datetime.now() - timedelta(hours=47))
+    else:
+        buckets = get_usage_rollup(user_email, 'daily', since=datetime.now() - timedelta(days=29))
+    if not buckets:
+        st.info("No API usage recorded yet.")
+        return
+
+    usage = pd.DataFrame([vars(bucket) for bucket in buckets])
+    usage['latency_ms'] = usage['avg_latency_ms'] * usage['calls']
+    calls = int(usage['calls'].sum())
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Calls", f"{calls:,}")
+    col2.metric("Tokens", f"{int(usage['total_tokens'].sum()):,}")
+    col3.metric("Cache hit rate", f"{usage['cache_hits'].sum() / calls:.0%}")
+    col4.metric("Avg latency", f"{usage['latency_ms'].sum() / calls / 1000:.1f} s")
+
+    st.bar_chart(usage.pivot_table(index='bucket', columns='endpoint', values='total_tokens', aggfunc='sum', fill_value=0))
+
+    by_endpoint = usage.groupby('endpoint').agg(
+        calls=('calls', 'sum'),
+        tokens=('total_tokens', 'sum'),
+        cache_hits=('cache_hits', 'sum'),
+        errors=('errors', 'sum'),
+        latency_ms=('latency_ms', 'sum'),
+    )
+    by_endpoint['avg_latency_s'] = (by_endpoint.pop('latency_ms') / by_endpoint['calls'] / 1000).round(2)
+    st.dataframe(by_endpoint.sort_values('tokens', ascending=False), use_container_width=True)
+
 def settings_section(user, user_company, setup_complete=True):
     inject_css()
     
@@ -235,7 +263,7 @@ def settings_section(user, user_company, setup_complete=True):
                         openai_api_key=os.getenv('OPENAI_API_KEY'),
                         verify_ssl=False
                     )
-                    insight_service = InsightService(api_client=api_client)
+                    insight_service = InsightService(api_client=api_client, user_email=contact_info or None)
                     
                     # Create containers for live updates
                     progress_container = st.empty()
@@ -249,70 +277,71 @@ def settings_section(user, user_company, setup_complete=True):
                     st.session_state.company_event_history = []
                     
                     # Use the new my_company_insight stream method
-                    for event in insight_service.get_my_company_insight_stream(
+                    with closing(insight_service.get_my_company_insight_stream(
                         company_name=company_name,
                         industry=industry
-                    ):
-                        event_type = event.get('type')
-                        content = event.get('content')
+                    )) as events:
+                        for event in events:
+                            event_type = event.get('type')
+                            content = event.get('content')
                         
-                        # Add event to history
-                        st.session_state.company_event_history.append({
-                            'type': event_type,
-                            'content': content,
-                            'timestamp': datetime.now().strftime("%H:%M:%S")
-                        })
+                            # Add event to history
+                            st.session_state.company_event_history.append({
+                                'type': event_type,
+                                'content': content,
+                                'timestamp': datetime.now().strftime("%H:%M:%S")
+                            })
                         
-                        # Update UI based on event type
-                        with progress_container.container():
-                            if event_type == "agent_start" and content and content.get('name') and content.get('function'):
-                                # Clear previous agent's thoughts and tasks
-                                thought_status.empty()
-                                task_status.empty()
-                                transition_status.empty()
+                            # Update UI based on event type
+                            with progress_container.container():
+                                if event_type == "agent_start" and content and content.get('name') and content.get('function'):
+                                    # Clear previous agent's thoughts and tasks
+                                    thought_status.empty()
+                                    task_status.empty()
+                                    transition_status.empty()
                                 
-                                # Add special styling for industry researcher
-                                agent_name = content['name']
-                                agent_function = content['function']
+                                    # Add special styling for industry researcher
+                                    agent_name = content['name']
+                                    agent_function = content['function']
                                 
-                                if "industry" in agent_name.lower():
-                                    agent_status.markdown(f"""
-                                    🏭 **Current Agent: {agent_name}**  
-                                    *{agent_function}*
-                                    """)
-                                else:
-                                    agent_status.markdown(f"""
-                                    🤖 **Current Agent: {agent_name}**  
-                                    *{agent_function}*
-                                    """)
+                                    if "industry" in agent_name.lower():
+                                        agent_status.markdown(f"""
+                                        🏭 **Current Agent: {agent_name}**  
+                                        *{agent_function}*
+                                        """)
+                                    else:
+                                        agent_status.markdown(f"""
+                                        🤖 **Current Agent: {agent_name}**  
+                                        *{agent_function}*
+                                        """)
                                 
-                            elif event_type == "thought" and content:
-                                thought_status.markdown(f"💭 **Thinking:**  \n{content}")
-                                # Clear previous task when new thought starts
-                                task_status.empty()
+                                elif event_type == "thought" and content:
+                                    thought_status.markdown(f"💭 **Thinking:**  \n{content}")
+                                    # Clear previous task when new thought starts
+                                    task_status.empty()
                                 
-                            elif event_type == "task_complete" and content:
-                                task_status.markdown(f"✅ **Completed:**  \n{content}")
+                                elif event_type == "task_complete" and content:
+                                    task_status.markdown(f"✅ **Completed:**  \n{content}")
                                 
-                            elif event_type == "transition" and content:
-                                # Clear all previous states for transition
-                                agent_status.empty()
-                                thought_status.empty()
-                                task_status.empty()
-                                transition_status.markdown(f"🔄 **Transition:**  \n{content}")
+                                elif event_type == "transition" and content:
+                                    # Clear all previous states for transition
+                                    agent_status.empty()
+                                    thought_status.empty()
+                                    task_status.empty()
+                                    transition_status.markdown(f"🔄 **Transition:**  \n{content}")
                                 
-                            elif event_type == "complete" and content:
-                                if 'company_insight' in content:
-                                    st.session_state.company_result = content
-                                    email = st.session_state.user.get('email')
-                                    save_user_company_info(email, content)
-                                st.session_state.company_search_completed = True
-                                st.success("✨ Company Analysis Complete!")
-                                progress_container.empty()
-                                break
+                                elif event_type == "complete" and content:
+                                    if 'company_insight' in content:
+                                        st.session_state.company_result = content
+                                        email = st.session_state.user.get('email')
+                                        save_user_company_info(email, content)
+                                    st.session_state.company_search_completed = True
+                                    st.success("✨ Company Analysis Complete!")
+                                    progress_container.empty()
+                                    break
                                 
-                            elif event_type == "error" and content:
-                                raise Exception(content)
+                                elif event_type == "error" and content:
+                                    raise Exception(content)
                 
                 st.rerun()  # Rerun to display the results
                 
@@ -485,4 +514,8 @@ def settings_section(user, user_company, setup_complete=True):
                     with col2:
                         if st.button("🗑️", key=f"delete_service_{i}"):
                             st.session_state.custom_services.pop(i)
-                            st.rerun()
\ No newline at end of file
+                            st.rerun()
+
+    st.markdown("<div style='margin-top: 3rem;'></div>", unsafe_allow_html=True)
+    if contact_info:
+        usage_dashboard(contact_info)
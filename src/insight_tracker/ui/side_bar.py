@@ -1,5 +1,21 @@
 import streamlit as st
 from insight_tracker.utils.logger import logger
+from insight_tracker.db import get_user_stats
+
+def display_user_stats(user_email):
+    """Activity summary from the trigger-maintained stats tables (one indexed lookup per rerun)"""
+    try:
+        stats = get_user_stats(user_email)
+    except Exception as e:
+        logger.error(f"Could not load stats for {user_email}: {e}")
+        return
+    col1, col2 = st.columns(2)
+    col1.metric("Searches", f"{stats.profile_searches + stats.company_searches:,}")
+    col2.metric("Companies", f"{stats.saved_companies:,}")
+    if stats.last_activity:
+        st.caption(f"Last activity: {stats.last_activity[:16]}")
+    if stats.top_industries:
+        st.caption("Top industries: " + ", ".join(f"{value} ({count})" for value, count in stats.top_industries))
 
 def display_side_bar():
     """Display the sidebar navigation"""
@@ -34,6 +50,11 @@ def display_side_bar():
                 if st.button(f"{icon} {option}", key=f"nav_{option}", use_container_width=True):
                     st.session_state.nav_bar_option_selected = option
 
+            user_email = st.session_state.user.get('email')
+            if user_email:
+                st.markdown("---")
+                display_user_stats(user_email)
+
     return st.session_state.nav_bar_option_selected
 
 def inject_css():
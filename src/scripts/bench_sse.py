@@ -0,0 +1,92 @@
+"""Per-event cost of parsing insight streams.
+
+    python src/scripts/bench_sse.py [--events 20000] [--chunk-sizes 64,512,4096]
+
+Compares the shared SSE parser with the previous line-based loop
+(requests' iter_lines, decode, startswith('data: '), json.loads) on a
+synthetic stream shaped like the insight endpoints' output.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from insight_tracker.api.client.sse import iter_sse  # noqa: E402
+
+
+def build_stream(events: int) -> bytes:
+    parts = []
+    for index in range(events):
+        if index % 10 == 9:
+            payload = {'type': 'task_complete', 'content': 'Verified employment history ' * 20}
+        else:
+            payload = {'type': 'thought', 'content': f'Step {index}: checking public sources for the company profile'}
+        parts.append(f"id: {index}\ndata: {json.dumps(payload)}\n\n")
+    parts.append(f"data: {json.dumps({'type': 'complete', 'content': {'profile_insight': {'full_name': {'value': 'Jane Doe'}}}})}\n\n")
+    return ''.join(parts).encode('utf-8')
+
+
+def chunked(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def legacy_iter_lines(chunks):
+    """requests.Response.iter_lines without a delimiter"""
+    pending = None
+    for chunk in chunks:
+        if pending is not None:
+            chunk = pending + chunk
+        lines = chunk.splitlines()
+        if lines and lines[-1] and chunk and lines[-1][-1] == chunk[-1]:
+            pending = lines.pop()
+        else:
+            pending = None
+        yield from lines
+    if pending is not None:
+        yield pending
+
+
+def legacy_parse(chunks, decode_json: bool):
+    for line in legacy_iter_lines(chunks):
+        if line:
+            line_text = line.decode('utf-8')
+            if line_text.startswith('data: '):
+                yield json.loads(line_text[6:]) if decode_json else line_text[6:]
+
+
+def sse_parse(chunks, decode_json: bool):
+    for event in iter_sse(chunks):
+        yield event.json() if decode_json else event.data
+
+
+def bench(parse, body: bytes, chunk_size: int, decode_json: bool, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = sum(1 for _ in parse(chunked(body, chunk_size), decode_json))
+        best = min(best, time.perf_counter() - started)
+    return best / count * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--chunk-sizes', default='64,512,4096,65536')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    body = build_stream(args.events)
+    print(f"{args.events + 1} events, {len(body) / 1024:.0f} KB; best of {args.repeat}, microseconds per event")
+    print(f"{'chunk':>7} {'legacy':>9} {'sse':>9} {'legacy+json':>12} {'sse+json':>9}")
+    for size in (int(value) for value in args.chunk_sizes.split(',')):
+        row = [bench(parse, body, size, decode_json, args.repeat)
+               for decode_json in (False, True) for parse in (legacy_parse, sse_parse)]
+        print(f"{size:>7} {row[0]:>9.2f} {row[1]:>9.2f} {row[2]:>12.2f} {row[3]:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
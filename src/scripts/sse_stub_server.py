@@ -0,0 +1,240 @@
+"""Local stand-in for the insight streaming endpoints that drops connections.
+
+    python src/scripts/sse_stub_server.py [--port 8765] [--events 30] [--drop-every 7]
+    python src/scripts/sse_stub_server.py --demo
+
+Serves the three /api/v2/*/stream endpoints as chunked server-sent events
+with numeric ids, and cuts the connection after every ``--drop-every``
+events, once in the middle of an event. A request with ``Last-Event-ID``
+continues after that event; with ``--overlap`` the server also replays the
+event the client already has, as servers that resume inclusively do.
+
+With ``--error-rate`` that fraction of requests is answered 503, as are the
+first ``--fail-first`` requests, with a ``Retry-After`` header when
+``--retry-after`` is given. GET
+/api/getCompanyInsight answers with a small JSON body, for the retries of
+idempotent calls.
+
+``--demo`` starts the server on a background thread and runs ``--runs``
+profile researches through InsightService against it, plus as many company
+lookups, checking that every event arrives exactly once and in order.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+from typing import Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+LOOKUP_PATH = '/api/getCompanyInsight'
+STREAM_PATHS = (
+    '/api/v2/profile_insight/stream',
+    '/api/v2/company_insight/stream',
+    '/api/v2/my_company_insight/stream',
+)
+
+
+def build_events(path: str, request: dict, count: int):
+    """(id, payload) pairs of one research run"""
+    subject = request.get('profile') or request.get('company') or 'unknown'
+    events = [(index, {'type': 'thought', 'content': f'Step {index} for {subject}'}) for index in range(count - 1)]
+    kind = path.split('/')[3].replace('_insight', '')
+    insight = {'full_name': {'value': subject}} if kind == 'profile' else {'company_name': {'value': subject}}
+    events.append((count - 1, {
+        'type': 'complete',
+        'content': {f'{kind}_insight': insight, 'total_tokens': 1234},
+    }))
+    return events
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: "StubServer"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _maybe_fail(self) -> bool:
+        """Answer 503 to the first ``--fail-first`` requests and an ``--error-rate`` share of the rest"""
+        with self.server.lock:
+            self.server.requests += 1
+            if self.server.requests > self.server.fail_first and random.random() >= self.server.error_rate:
+                return False
+            self.server.errors += 1
+        self.send_response(503)
+        if self.server.retry_after is not None:
+            self.send_header('Retry-After', str(self.server.retry_after))
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        return True
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path != LOOKUP_PATH:
+            self.send_error(404)
+            return
+        with self.server.lock:
+            self.server.lookups += 1
+        if self._maybe_fail():
+            return
+        body = json.dumps({'company': {'query': query}, 'total_tokens': 10}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path not in STREAM_PATHS:
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        last_event_id = self.headers.get('Last-Event-ID')
+        start = int(last_event_id) + 1 if last_event_id is not None else 0
+        if last_event_id is not None and self.server.overlap:
+            start -= 1
+        with self.server.lock:
+            self.server.connections += 1
+            if last_event_id is not None:
+                self.server.resumes += 1
+        if self._maybe_fail():
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self._chunk(f"retry: {self.server.retry_ms}\n\n".encode('utf-8'))
+
+        self.close_connection = True
+        try:
+            self._send_events(build_events(self.path, request, self.server.events)[start:])
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the stream: timed out or cancelled
+            pass
+
+    def _send_events(self, events) -> None:
+        sent = 0
+        for event_id, payload in events:
+            message = f"id: {event_id}\ndata: {json.dumps(payload)}\n\n".encode('utf-8')
+            sent += 1
+            if self.server.drop_every and sent > self.server.drop_every:
+                # Cut the connection half-way through an event, without the
+                # chunked terminator, the way a dying proxy does
+                self._chunk(message[:len(message) // 2])
+                self.connection.shutdown(socket.SHUT_RDWR)
+                with self.server.lock:
+                    self.server.drops += 1
+                return
+            self._chunk(message)
+            time.sleep(self.server.interval)
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, events: int = 30, drop_every: int = 7, overlap: bool = False,
+                 interval: float = 0.01, retry_ms: int = 100, error_rate: float = 0.0,
+                 retry_after: Optional[int] = None, fail_first: int = 0, quiet: bool = False):
+        super().__init__(address, StubHandler)
+        self.events = events
+        self.drop_every = drop_every
+        self.overlap = overlap
+        self.interval = interval
+        self.retry_ms = retry_ms
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.fail_first = fail_first
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.resumes = 0
+        self.drops = 0
+        self.requests = 0
+        self.errors = 0
+        self.lookups = 0
+
+
+def demo(server: StubServer, runs: int = 1) -> bool:
+    from insight_tracker.api.client.http import run_async
+    from insight_tracker.api.client.insight_client import InsightApiClient
+    from insight_tracker.api.client.retry import get_retry_stats
+    from insight_tracker.api.services.insight_service import InsightService
+    from insight_tracker.api.exceptions.api_exceptions import ApiError
+
+    host, port = server.server_address
+    client = InsightApiClient(f"http://{host}:{port}", api_key='stub', openai_api_key='stub')
+    service = InsightService(client)
+    researched = looked_up = 0
+    for _ in range(runs):
+        try:
+            events = list(service.get_profile_analysis_stream('Jane Doe', 'Acme'))
+        except ApiError as e:
+            print(f"Research failed: {e}")
+        else:
+            steps = [int(event['content'].split()[1]) for event in events if event['type'] == 'thought']
+            if steps == list(range(server.events - 1)) and events[-1]['type'] == 'complete':
+                researched += 1
+            else:
+                print(f"Research delivered events out of order or twice: {steps}")
+        try:
+            run_async(client.get_company_insight('Acme', 'Software'))
+            looked_up += 1
+        except ApiError as e:
+            print(f"Lookup failed: {e}")
+
+    print(f"{researched}/{runs} researches and {looked_up}/{runs} lookups succeeded over {server.connections} "
+          f"stream connections ({server.drops} drops, {server.resumes} resumes) and {server.lookups} lookup "
+          f"requests; {server.errors} requests answered 503")
+    print(f"Client retries: {get_retry_stats()}")
+    return researched == runs and looked_up == runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--events', type=int, default=30, help='events per research run, the last one complete')
+    parser.add_argument('--drop-every', type=int, default=7, help='events sent per connection before it is cut; 0 never cuts')
+    parser.add_argument('--overlap', action='store_true', help='replay the last event the client received on resume')
+    parser.add_argument('--interval', type=float, default=0.01, help='seconds between events')
+    parser.add_argument('--retry-ms', type=int, default=100, help='reconnect delay advertised with the retry field')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered 503')
+    parser.add_argument('--retry-after', type=int, help='Retry-After seconds sent with each 503')
+    parser.add_argument('--fail-first', type=int, default=0, help='requests answered 503 before any succeeds')
+    parser.add_argument('--demo', action='store_true', help='run researches against the server and exit')
+    parser.add_argument('--runs', type=int, default=1, help='researches and lookups the demo runs')
+    args = parser.parse_args()
+
+    server = StubServer((args.host, 0 if args.demo else args.port), events=args.events,
+                        drop_every=args.drop_every, overlap=args.overlap, interval=args.interval,
+                        retry_ms=args.retry_ms, error_rate=args.error_rate, retry_after=args.retry_after,
+                        fail_first=args.fail_first, quiet=args.demo)
+    if not args.demo:
+        print(f"Serving {', '.join(STREAM_PATHS)} on http://{args.host}:{args.port}")
+        server.serve_forever()
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        ok = demo(server, args.runs)
+    finally:
+        server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from insight_tracker.api.client.sse import SSEParser, iter_sse  # noqa: E402
+
+
+def test_event_cut_off_at_end_of_stream_is_not_skipped_on_resume():
+    parser = SSEParser()
+    events = list(iter_sse([b'id: 6\ndata: {"a":1}\n\n', b'id: 7\ndata: {"type":"thou'], parser))
+
+    assert [(event.id, event.data) for event in events] == [('6', '{"a":1}')]
+    assert parser.last_event_id == '6'
+
+    resumed = SSEParser.resume(parser)
+    assert resumed.last_event_id == '6'
+    # The replayed event gets its own id, not a stale one
+    assert [event.id for event in resumed.feed(b'id: 7\ndata: {"type":"thought"}\n\n')] == ['7']
+
+
+def test_multi_line_event_without_blank_line_is_discarded():
+    parser = SSEParser()
+    events = list(iter_sse([b'id: 1\ndata: {"x":\n', b'data: 1}\n'], parser))
+
+    assert events == []
+    assert parser.last_event_id is None
+    # Nothing of the discarded event leaks into the next one
+    assert [event.data for event in parser.feed(b'data: {"y": 2}\n\n')] == ['{"y": 2}']
+
+
+class _FakeResponse:
+    status_code = 200
+    reason = 'OK'
+    headers = {}
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def iter_content(self, chunk_size=None):
+        yield from self.chunks
+        if self.error is not None:
+            raise self.error
+
+
+class _FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def post(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers))
+        return self.responses.pop(0)
+
+
+def test_retry_before_first_event_discards_the_half_read_line(monkeypatch):
+    import requests
+    from insight_tracker.api.client import insight_client
+    from insight_tracker.api.client.retry import RetryPolicy
+
+    endpoint = '/api/v2/profile_insight/stream'
+    session = _FakeSession([
+        _FakeResponse([b'retry: 10\n\n', b'data: {"type": "thou'], requests.exceptions.ChunkedEncodingError('cut')),
+        _FakeResponse([
+            b'id: 0\ndata: {"type": "thought", "content": "Step 0"}\n\n',
+            b'id: 1\ndata: {"type": "complete", "content": {}}\n\n',
+        ]),
+    ])
+    monkeypatch.setattr(insight_client, 'get_stream_session', lambda: session)
+    client = insight_client.InsightApiClient(
+        'http://stub', api_key='stub', openai_api_key='stub',
+        retry_policies={endpoint: RetryPolicy(max_attempts=2, base_delay=0.01)}
+    )
+
+    events = list(client._stream(endpoint, {'profile': 'Jane Doe'}))
+
+    assert [(event['type'], event[insight_client.STREAM_EVENT_ID_KEY]) for event in events] == [
+        ('thought', '0'), ('complete', '1')
+    ]
+    # Nothing had been received, so the retry is a fresh request
+    assert len(session.requests) == 2
+    assert 'Last-Event-ID' not in session.requests[1]
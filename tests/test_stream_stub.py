@@ -0,0 +1,105 @@
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'src', 'scripts'))
+
+from sse_stub_server import StubServer  # noqa: E402
+from insight_tracker.api.client.http import run_async  # noqa: E402
+from insight_tracker.api.client.insight_client import InsightApiClient, STREAM_EVENT_ID_KEY  # noqa: E402
+from insight_tracker.api.client.retry import NO_RETRY, RetryPolicy, get_retry_stats  # noqa: E402
+from insight_tracker.api.exceptions.api_exceptions import ApiError  # noqa: E402
+from insight_tracker.api.services.insight_service import InsightService  # noqa: E402
+
+PROFILE_STREAM = '/api/v2/profile_insight/stream'
+EVENTS = 20
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**options):
+        server = StubServer(('127.0.0.1', 0), events=EVENTS, interval=0, retry_ms=10, quiet=True, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        host, port = server.server_address
+        # Short backoff so retries do not slow the suite down
+        client = InsightApiClient(
+            f"http://{host}:{port}", api_key='stub', openai_api_key='stub',
+            retry_policies={PROFILE_STREAM: RetryPolicy(base_delay=0.01)}
+        )
+        return server, client
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _stream_ids(client):
+    return [int(event[STREAM_EVENT_ID_KEY]) for event in client._stream(PROFILE_STREAM, {'profile': 'Jane Doe'})]
+
+
+def test_dropped_stream_resumes_without_gaps_or_duplicates(stub):
+    server, client = stub(drop_every=6)
+
+    assert _stream_ids(client) == list(range(EVENTS))
+    assert server.drops == 3
+    assert server.resumes == 3
+
+
+def test_replayed_events_are_delivered_once(stub):
+    server, client = stub(drop_every=6, overlap=True)
+
+    events = list(InsightService._deduplicated(client._stream(PROFILE_STREAM, {'profile': 'Jane Doe'})))
+
+    assert [event['content'].split()[1] for event in events[:-1]] == [str(step) for step in range(EVENTS - 1)]
+    assert events[-1]['type'] == 'complete'
+    assert server.resumes >= 3
+
+
+def test_stream_retries_honour_retry_after_before_the_first_event(stub):
+    server, client = stub(drop_every=0, fail_first=2, retry_after=0)
+    before = get_retry_stats()
+
+    assert _stream_ids(client) == list(range(EVENTS))
+
+    after = get_retry_stats()
+    assert server.errors == 2
+    # Plain retries of the request, not resumes
+    assert server.resumes == 0
+    assert after['retries'] - before['retries'] == 2
+    assert after['retry_after_honoured'] - before['retry_after_honoured'] == 2
+    assert after['recovered'] - before['recovered'] == 1
+
+
+def test_lookup_is_retried_after_a_503(stub):
+    server, client = stub(fail_first=1, retry_after=0)
+
+    result = run_async(client.get_company_insight('Acme', 'Software'))
+
+    assert result['company']['query']
+    assert server.errors == 1
+    assert server.lookups == 2
+
+
+def test_failures_the_policy_never_retries_are_not_counted_as_exhausted(stub):
+    server, client = stub(fail_first=1)
+    client.retry_policies['/api/getCompanyInsight'] = NO_RETRY
+    before = get_retry_stats()
+
+    with pytest.raises(ApiError):
+        run_async(client.get_company_insight('Acme', 'Software'))
+    # The stub serves no lookups by URL: a 404
+    with pytest.raises(ApiError):
+        run_async(client.get_company_insight_by_url('https://acme.example'))
+
+    after = get_retry_stats()
+    assert after['non_retryable'] - before['non_retryable'] == 2
+    assert after['exhausted'] == before['exhausted']
+    assert after['retries'] == before['retries']